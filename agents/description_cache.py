@@ -0,0 +1,206 @@
+# ============================================================================= #
+# Project: Multimodal RAG Pipeline
+# Develop by: Thiago Piovesan
+# Description: Persistent cache for image descriptions
+# Date: 2026-01-08 // YYYY-MM-DD
+# Version: 0.1.0
+# License: MIT
+# ============================================================================= #
+# Libs Importation:
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+
+from rag.telemetry import get_telemetry
+
+# ============================================================================= #
+CACHE_PATH = "data/cache/image_descriptions.sqlite"
+
+# ============================================================================= #
+class DescriptionCache:
+    """
+    Disk-backed (SQLite) cache of image descriptions, keyed by the image content hash
+    plus the prompt and the vision model. WAL mode and a busy timeout make it safe to
+    share between several processes.
+    """
+
+    def __init__(self, path: str = CACHE_PATH, max_entries: int = 50_000,
+                 max_bytes: int = 256 * 1024 * 1024, max_age_days: float = 90.0,
+                 evict_every: int = 100):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_days * 24 * 3600
+        self.evict_every = evict_every
+
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS descriptions (
+                    key TEXT PRIMARY KEY,
+                    image_hash TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    description TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_descriptions_access ON descriptions(last_access)")
+
+    # ---------------------------------------------------------------------------- #
+    def _connect(self) -> sqlite3.Connection:
+        # Uma conexão por thread (sqlite3 não compartilha conexões entre threads)
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # ---------------------------------------------------------------------------- #
+    @staticmethod
+    def make_key(image_hash: str, prompt: str, model: str) -> str:
+        """
+        Builds the cache key from the image content hash, the prompt and the model version.
+        """
+        return hashlib.sha256(f"{model}\0{prompt}\0{image_hash}".encode("utf-8")).hexdigest()
+
+    # ---------------------------------------------------------------------------- #
+    def get(self, image_hash: str, prompt: str, model: str) -> str | None:
+        """
+        Returns the cached description, or None on a miss.
+
+        Args:
+            image_hash (str): Hash of the image content.
+            prompt (str): Prompt used to describe the image.
+            model (str): Vision model name/version.
+
+        Returns:
+            str | None: The cached description.
+        """
+        key = self.make_key(image_hash, prompt, model)
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT description, created_at FROM descriptions WHERE key = ?", (key,)
+        ).fetchone()
+
+        now = time.time()
+        if row is None or now - row[1] > self.max_age_seconds:
+            with self._stats_lock:
+                self.misses += 1
+            get_telemetry().incr("cache_lookups_total", cache="image_description", result="miss")
+            return None
+
+        conn.execute("UPDATE descriptions SET last_access = ? WHERE key = ?", (now, key))
+        with self._stats_lock:
+            self.hits += 1
+        get_telemetry().incr("cache_lookups_total", cache="image_description", result="hit")
+        return row[0]
+
+    # ---------------------------------------------------------------------------- #
+    def set(self, image_hash: str, prompt: str, model: str, description: str) -> None:
+        """
+        Stores a description and evicts old entries from time to time.
+
+        Args:
+            image_hash (str): Hash of the image content.
+            prompt (str): Prompt used to describe the image.
+            model (str): Vision model name/version.
+            description (str): The generated description.
+        """
+        now = time.time()
+        self._connect().execute(
+            "INSERT OR REPLACE INTO descriptions VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (self.make_key(image_hash, prompt, model), image_hash, model, description,
+             len(description.encode("utf-8")), now, now),
+        )
+
+        with self._stats_lock:
+            self._puts += 1
+            should_evict = self._puts % self.evict_every == 0
+        if should_evict:
+            self.evict()
+
+    # ---------------------------------------------------------------------------- #
+    def evict(self) -> int:
+        """
+        Removes expired entries, then the least recently used ones until the cache
+        fits `max_entries` and `max_bytes`.
+
+        Returns:
+            int: Number of removed entries.
+        """
+        conn = self._connect()
+        removed = conn.execute(
+            "DELETE FROM descriptions WHERE created_at < ?", (time.time() - self.max_age_seconds,)
+        ).rowcount
+
+        count, total_bytes = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM descriptions"
+        ).fetchone()
+
+        # Remove os menos acessados até caber nos limites
+        while count > self.max_entries or total_bytes > self.max_bytes:
+            excess = max(count - self.max_entries, 1)
+            rows = conn.execute(
+                "SELECT key, size FROM descriptions ORDER BY last_access LIMIT ?", (excess,)
+            ).fetchall()
+            if not rows:
+                break
+            conn.executemany("DELETE FROM descriptions WHERE key = ?", [(key,) for key, _ in rows])
+            removed += len(rows)
+            count -= len(rows)
+            total_bytes -= sum(size for _, size in rows)
+
+        return removed
+
+    # ---------------------------------------------------------------------------- #
+    def stats(self) -> dict:
+        """
+        Returns hit/miss counters of this process and the current size of the cache.
+
+        Returns:
+            dict: Cache statistics.
+        """
+        count, total_bytes = self._connect().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM descriptions"
+        ).fetchone()
+
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": count,
+            "bytes": total_bytes,
+        }
+
+# ============================================================================= #
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_description_cache() -> DescriptionCache:
+    """
+    Returns the description cache shared by the whole process.
+
+    Returns:
+        DescriptionCache: The shared cache.
+    """
+    global _cache
+
+    with _cache_lock:
+        if _cache is None:
+            _cache = DescriptionCache()
+        return _cache
@@ -8,50 +8,165 @@
 # ============================================================================= #
 # Libs Importation:
 import os
+import re
 import time
+import random
+import threading
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
 
 from langchain_core.messages import HumanMessage
-from langchain_google_genai import ChatGoogleGenerativeAI
+from rag.telemetry import get_telemetry
 
 # pytesseract.pytesseract.tesseract_cmd = 'C:/Program Files/Tesseract-OCR/tesseract' 
 # ============================================================================= #
 # Get env variables
 load_dotenv()  # Carrega as variáveis do arquivo .env
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-
-if not GEMINI_API_KEY:
-    raise ValueError("GEMINI_API_KEY não encontrada. Configure a variável de ambiente.")
-if not GOOGLE_API_KEY:
-    raise ValueError("GOOGLE_API_KEY não encontrada. Configure a variável de ambiente.")
-# if not OPENAI_API_KEY:
-#     raise ValueError("OPENAI_API_KEY não encontrada. Configure a variável de ambiente.")
- 
+
+# ============================================================================= #
+VISION_MODEL_NAME = "gemini-2.5-flash"
+PROMPT_TEXT = "Provide a detailed description of this image, focusing on main objects and colors for search indexing."
+
+# Quota do provedor (requisições por minuto) e paralelismo das chamadas de visão
+VISION_REQUESTS_PER_MINUTE = float(os.getenv("VISION_REQUESTS_PER_MINUTE", "60"))
+VISION_MAX_CONCURRENCY = int(os.getenv("VISION_MAX_CONCURRENCY", "8"))
+VISION_MAX_RETRIES = int(os.getenv("VISION_MAX_RETRIES", "5"))
+
+# ============================================================================= #
+@lru_cache(maxsize=1)
+def get_vision_model():
+    """
+    Returns the Gemini vision model, built (and the API keys checked) only on the first call,
+    so importing this module costs nothing for processes that never describe an image.
+
+    Returns:
+        ChatGoogleGenerativeAI: The shared vision model.
+    """
+    GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+    GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+    
+    if not GEMINI_API_KEY:
+        raise ValueError("GEMINI_API_KEY não encontrada. Configure a variável de ambiente.")
+    if not GOOGLE_API_KEY:
+        raise ValueError("GOOGLE_API_KEY não encontrada. Configure a variável de ambiente.")
+    
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    
+    return ChatGoogleGenerativeAI(model=VISION_MODEL_NAME, temperature=0.7, api_key=GOOGLE_API_KEY)
+
+# ============================================================================= #
+class TokenBucket:
+    """
+    Thread-safe token-bucket rate limiter. Tokens refill continuously at `rate` per
+    second up to `capacity`, so short bursts are allowed while the average rate
+    stays within the provider quota.
+    """
+    
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        
+    # ---------------------------------------------------------------------------- #
+    @classmethod
+    def per_minute(cls, requests_per_minute: float, burst: float | None = None) -> "TokenBucket":
+        return cls(rate=requests_per_minute / 60.0, capacity=burst)
+    
+    # ---------------------------------------------------------------------------- #
+    def acquire(self, tokens: float = 1.0) -> None:
+        """
+        Blocks until `tokens` are available and consumes them.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    break
+                wait = (tokens - self._tokens) / self.rate
+                
+            time.sleep(wait)
+            waited += wait
+        
+        if waited:
+            get_telemetry().incr("rate_limit_wait_seconds_total", waited, limiter="vision")
+
+# ============================================================================= #
+_rate_limiter = TokenBucket.per_minute(VISION_REQUESTS_PER_MINUTE, burst=VISION_MAX_CONCURRENCY)
+
 # ============================================================================= #
-llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", temperature=0.7, api_key=GOOGLE_API_KEY)
+_SERVER_ERROR_RE = re.compile(r"\b(50[0-4]|INTERNAL|UNAVAILABLE|DEADLINE_EXCEEDED)\b")
+_TRANSIENT_ERROR_NAMES = ("DeadlineExceeded", "ServiceUnavailable", "InternalServerError", "Timeout", "ConnectError", "RemoteProtocolError")
+
+def is_rate_limit_error(error: Exception) -> bool:
+    return "429" in str(error) or "RESOURCE_EXHAUSTED" in str(error)
+
+def is_transient_error(error: Exception) -> bool:
+    """
+    Errors worth retrying: quota (429), server errors (5xx), deadlines, timeouts and
+    dropped connections.
+    """
+    if is_rate_limit_error(error) or isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    if isinstance(status, int) and 500 <= status < 600:
+        return True
+    # Exceções do google-api-core / httpx, sem depender dos pacotes
+    if any(name in cls.__name__ for cls in type(error).__mro__ for name in _TRANSIENT_ERROR_NAMES):
+        return True
+    return bool(_SERVER_ERROR_RE.search(str(error)))
 
 # ============================================================================= #
-def describe_image(base64_image: str) -> str: 
+class ImageDescriptionError(RuntimeError):
+    """
+    Raised by `describe_images_batch` when some images could not be described. The
+    other descriptions were still delivered to `on_result` and are in `descriptions`.
+    """
+
+    def __init__(self, errors: dict, descriptions: list):
+        self.errors = errors                # índice -> exceção
+        self.descriptions = descriptions    # None nas posições que falharam
+        first = errors[min(errors)]
+        super().__init__(f"{len(errors)} de {len(descriptions)} imagens não foram descritas "
+                         f"(primeiro erro: {type(first).__name__}: {first})")
+
+# ============================================================================= #
+def describe_image(base64_image: str, model=None, rate_limiter: TokenBucket | None = None,
+                   max_retries: int = VISION_MAX_RETRIES, base_delay: float = 2.0,
+                   max_delay: float = 60.0) -> str: 
     """
     Generate a description for an image provided in base64 format.
+    Transient errors (quota 429, 5xx, deadlines, timeouts, dropped connections) are retried
+    with exponential backoff and full jitter, up to `max_retries`.
 
     Args:
         base64_image (str): The image in base64 format.
+        model: Chat model with an `invoke` method. Defaults to the Gemini vision model.
+        rate_limiter (TokenBucket | None): Limiter shared by concurrent calls. Defaults to the module limiter.
+        max_retries (int): Maximum number of retries on transient errors.
+        base_delay (float): First backoff delay, in seconds.
+        max_delay (float): Upper bound of a single backoff delay, in seconds.
 
     Returns:
         str: The generated description.
     """
+    model = model or get_vision_model()
+    rate_limiter = rate_limiter or _rate_limiter
     
     # Remove o prefixo se já existir
     if base64_image.startswith('data:image'):
         base64_image = base64_image.split(',')[1]
 
-    prompt_text = "Provide a detailed description of this image, focusing on main objects and colors for search indexing."
     message = HumanMessage(
         content=[
-            {"type": "text", "text": prompt_text},
+            {"type": "text", "text": PROMPT_TEXT},
             {
                 "type": "image_url",
                 "image_url": {"url": f"data:image/jpeg;base64,{base64_image}"},
@@ -59,17 +174,71 @@ def describe_image(base64_image: str) -> str:
         ]
     )
 
-    try:
-        response = llm.invoke([message])
-        # print(response.content)
-        # time.sleep(2)  # Aguarda 2 segundos entre chamadas
-        return response.content
-    except Exception as e:
-        if "429" in str(e) or "RESOURCE_EXHAUSTED" in str(e):
-            print("Quota excedida. Aguardando 60 segundos...")
-            time.sleep(60)
-            return describe_image(base64_image)  # Tenta novamente
-        else:
-            raise e
+    telemetry = get_telemetry()
+    for attempt in range(max_retries + 1):
+        rate_limiter.acquire()
+        try:
+            with telemetry.span("describe_image", attempt=attempt):
+                response = model.invoke([message])
+            return response.content
+        except Exception as e:
+            if not is_transient_error(e) or attempt == max_retries:
+                telemetry.incr("errors_total", stage="describe_image")
+                raise
+            
+            # Backoff exponencial com jitter completo
+            delay = random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+            reason = "Quota excedida" if is_rate_limit_error(e) else f"Erro temporário ({type(e).__name__})"
+            print(f"{reason}. Nova tentativa {attempt + 1}/{max_retries} em {delay:.1f} segundos...")
+            telemetry.incr("retries_total", stage="describe_image", reason="rate_limit" if is_rate_limit_error(e) else "transient")
+            telemetry.incr("backoff_seconds_total", delay, stage="describe_image")
+            time.sleep(delay)
+
+# ============================================================================= #
+def describe_images_batch(base64_images: list[str], model=None, rate_limiter: TokenBucket | None = None,
+                          max_concurrency: int = VISION_MAX_CONCURRENCY, on_result=None, **retry_kwargs) -> list[str]:
+    """
+    Describes several images concurrently, bounded by `max_concurrency` and the rate limiter.
+    A failed image does not stop the batch: every image is attempted, every success reaches
+    `on_result`, and `ImageDescriptionError` is raised at the end listing the failures.
+
+    Args:
+        base64_images (list[str]): Images in base64 format.
+        model: Chat model with an `invoke` method. Defaults to the Gemini vision model.
+        rate_limiter (TokenBucket | None): Limiter shared by all calls. Defaults to the module limiter.
+        max_concurrency (int): Maximum number of calls in flight.
+        on_result (callable | None): Called as `on_result(index, description)` as soon as each
+            description arrives (e.g. to persist it before the whole batch finishes).
+        **retry_kwargs: Forwarded to `describe_image` (max_retries, base_delay, max_delay).
+
+    Returns:
+        list[str]: The descriptions, in the same order as `base64_images`.
+    """
+    if not base64_images:
+        return []
+    
+    # Resolve o modelo uma vez (e falha cedo se faltar a chave de API)
+    model = model or get_vision_model()
+    
+    def _describe(b64: str) -> str:
+        return describe_image(b64, model=model, rate_limiter=rate_limiter, **retry_kwargs)
+    
+    descriptions = [None] * len(base64_images)
+    errors = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(base64_images)))) as executor:
+        futures = {executor.submit(_describe, b64): i for i, b64 in enumerate(base64_images)}
+        for future in as_completed(futures):
+            i = futures[future]
+            # Uma falha não interrompe o lote: as outras descrições continuam chegando
+            try:
+                descriptions[i] = future.result()
+                if on_result:
+                    on_result(i, descriptions[i])
+            except Exception as e:
+                errors[i] = e
+    
+    if errors:
+        raise ImageDescriptionError(errors, descriptions) from errors[min(errors)]
     
-# ============================================================================= #
\ No newline at end of file
+    # Mesma ordem de `base64_images`
+    return descriptions
@@ -8,65 +8,268 @@
 # ============================================================================= #
 # Libs Importation:
 import os
+import time
+import threading
 from dotenv import load_dotenv
 
-from langchain.agents import create_agent
-from langchain.chat_models import init_chat_model
-from rag.vector_store import load_vector_store, get_retriever_tool
+from langchain_core.messages import AIMessage, AIMessageChunk, ToolMessage
+from rag.query_cache import QueryCache
+from rag.telemetry import get_telemetry, TelemetryCallbackHandler
+from rag.vector_store import load_vector_store, get_retriever_tool, get_table_tool, get_index_generation
+from rag.collection_store import DEFAULT_COLLECTION, CollectionSearcher, collection_path
 
 # ============================================================================= #
 # Get env variables
 load_dotenv()  # Carrega as variáveis do arquivo .env
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
-if not GEMINI_API_KEY:
-    raise ValueError("GEMINI_API_KEY não encontrada. Configure a variável de ambiente.")
-if not GOOGLE_API_KEY:
-    raise ValueError("GOOGLE_API_KEY não encontrada. Configure a variável de ambiente.")
+# ============================================================================= #
+CHAT_MODEL_NAME = "google_genai:gemini-2.5-flash-lite"
+
+# Respostas só são reaproveitadas para a mesma pergunta (normalizada); definir um valor
+# (ex.: 0.97) liga também o reaproveitamento por similaridade (perguntas quase iguais)
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD")) if os.getenv("ANSWER_CACHE_THRESHOLD") else None
+ANSWER_CACHE_TTL_SECONDS = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600"))
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "1024"))                  # 0 desliga o cache de respostas
+
+# Prompt para AGENTE (sem {context} placeholder fixo)
+# O agente recebe o contexto via mensagens de "ToolMessage"
+SYSTEM_PROMPT = """Você é um assistente técnico Sênior especializado em Visão Computacional e IA.
+    Você tem acesso a uma ferramenta de busca ('search_knowledge_base') que contém documentos PDF processados.
+    
+    Sempre que o usuário fizer uma pergunta técnica, USE a ferramenta para buscar o contexto.
+    Ao responder, cite a fonte (página ou nome do arquivo) se disponível.
+    Se a resposta vier de uma tabela ou descrição de imagem, mencione isso explicitamente.
+    As tabelas aparecem em formato compacto (markdown); se precisar da tabela original completa,
+    use a ferramenta 'get_table' com o table_id indicado.
+    Cada trecho retornado traz a sua citação (arquivo e página); trechos longos podem vir
+    truncados ('[…]' ou linhas omitidas).
+    """
+
+# ============================================================================= #
+def get_chat_model():
+    """
+    Builds the chat model of the agent. The API keys are checked here, on first use,
+    instead of when the module is imported.
+    """
+    if not os.getenv("GEMINI_API_KEY"):
+        raise ValueError("GEMINI_API_KEY não encontrada. Configure a variável de ambiente.")
+    if not os.getenv("GOOGLE_API_KEY"):
+        raise ValueError("GOOGLE_API_KEY não encontrada. Configure a variável de ambiente.")
+    
+    from langchain.chat_models import init_chat_model
+    
+    return init_chat_model(CHAT_MODEL_NAME)
+
+# ============================================================================= #
+class RAGEngine:
+    """
+    Process-wide holder for the vector store, the retriever tool, the chat model and the agent
+    of one set of collections. Everything is built once and the indexes are reloaded only
+    when their files change on disk. Final answers are kept in `answer_cache`, keyed by the
+    index generation: entries computed against an older generation are dropped on lookup.
+    """
+    
+    def __init__(self, index_path: str | None = None, collections: tuple | None = None):
+        # Um diretório explícito (ex.: benchmarks) ou as coleções pelo nome
+        self.collections = tuple(collections or (DEFAULT_COLLECTION,))
+        self.index_path = index_path
+        self.index_paths = [index_path] if index_path else [collection_path(name) for name in self.collections]
+        self._lock = threading.Lock()
+        self._generation = None
+        self._model = None
+        self.vector_store = None
+        self.rag_tool = None
+        self.agent = None
+        self.answer_cache = None
+        
+    # ---------------------------------------------------------------------------- #
+    def get_agent(self):
+        """
+        Returns the current agent, reloading the index first if it changed on disk.
+
+        Returns:
+            The compiled LangChain agent.
+        """
+        return self.get_agent_and_generation()[0]
+
+    def get_agent_and_generation(self) -> tuple:
+        """
+        Same as `get_agent`, plus the index generation the agent is serving.
+        """
+        generation = tuple(get_index_generation(path) for path in self.index_paths)
+        
+        with self._lock:
+            if self.agent is None or generation != self._generation:
+                self._reload(generation)
+            
+            # As sessões usam a referência atual; um reload só troca os objetos
+            return self.agent, self._generation
+        
+    # ---------------------------------------------------------------------------- #
+    def _reload(self, generation) -> None:
+        # Índice já carregado: abre apenas os shards novos (o agente continua o mesmo)
+        if self.vector_store is not None:
+            self.vector_store.refresh()
+            self._generation = generation
+            return
+        
+        from langchain.agents import create_agent
+        
+        print(f"🔄 Carregando coleções {', '.join(self.collections)} no motor RAG...")
+        
+        # 1. Carrega apenas as coleções pedidas (busca em paralelo entre elas)
+        if self.index_path:
+            vector_store = CollectionSearcher(self.collections, stores={self.collections[0]: load_vector_store(self.index_path)})
+        else:
+            vector_store = CollectionSearcher(self.collections)
+        
+        # 2. Cria as tools já configuradas
+        rag_tool = get_retriever_tool(vector_store)
+        table_tool = get_table_tool(self.index_paths)
+        
+        # 3. Modelo (criado uma única vez por processo)
+        if self._model is None:
+            self._model = get_chat_model()
+        
+        # 4. Agente
+        agent = create_agent(self._model, [rag_tool, table_tool], system_prompt=SYSTEM_PROMPT)
+        
+        # 5. Cache de respostas (perguntas iguais; quase iguais só com ANSWER_CACHE_THRESHOLD)
+        self.answer_cache = QueryCache(
+            vector_store.embeddings.embed_query,
+            threshold=ANSWER_CACHE_THRESHOLD,
+            max_entries=ANSWER_CACHE_SIZE,
+            ttl_seconds=ANSWER_CACHE_TTL_SECONDS,
+        )
+        
+        self.vector_store, self.rag_tool, self.agent = vector_store, rag_tool, agent
+        self._generation = generation
 
 # ============================================================================= #
-def rag_agent_response(query: str) -> str:
+_engines = {}
+_engine_lock = threading.Lock()
+
+def get_rag_engine(collections: tuple | list | None = None) -> RAGEngine:
     """
-    Creates a Retrieval-Augmented Generation (RAG) agent using the provided retriever and prompt.
+    Returns the RAG engine of a set of collections, shared by every Streamlit session of this process.
+
+    Args:
+        collections (tuple | list | None): Collection names. None means the default collection.
+
+    Returns:
+        RAGEngine: The shared engine.
+    """
+    key = tuple(sorted(set(collections or (DEFAULT_COLLECTION,))))
+    
+    with _engine_lock:
+        if key not in _engines:
+            _engines[key] = RAGEngine(collections=key)
+        return _engines[key]
+
+# ============================================================================= #
+def rag_agent_response(query: str, collections: tuple | list | None = None, verbose: bool = True) -> str:
+    """
+    Answers the query with the shared RAG agent (see `get_rag_engine`).
+    Repeated (or nearly identical) questions are answered from the answer cache
+    while the index does not change.
     
     Args:
         query (str): The user query to be processed by the RAG agent.
+        collections (tuple | list | None): Collections to search. None means the default collection.
+        verbose (bool): Prints every step of the agent (off for batch runs).
         
     Returns:
         str: The response generated by the RAG agent.
 
     """
-    # 1. Carrega o banco
-    vector_store = load_vector_store()
-    
-    # 2. Cria a tool já configurada
-    rag_tool = get_retriever_tool(vector_store)
-    tools = [rag_tool]
-    
-    # 3. Modelo
-    model = init_chat_model("google_genai:gemini-2.5-flash-lite") # Certifique-se que essa função existe no seu setup
-    
-    # 4. Prompt para AGENTE (sem {context} placeholder fixo)
-    # O agente recebe o contexto via mensagens de "ToolMessage"
-    system_prompt = """Você é um assistente técnico Sênior especializado em Visão Computacional e IA.
-    Você tem acesso a uma ferramenta de busca ('search_knowledge_base') que contém documentos PDF processados.
+    telemetry = get_telemetry()
+    engine = get_rag_engine(collections)
     
-    Sempre que o usuário fizer uma pergunta técnica, USE a ferramenta para buscar o contexto.
-    Ao responder, cite a fonte (página ou nome do arquivo) se disponível.
-    Se a resposta vier de uma tabela ou descrição de imagem, mencione isso explicitamente.
+    with telemetry.span("chat_request") as span:
+        agent_rag, generation = engine.get_agent_and_generation()
+        
+        cached = engine.answer_cache.get(query, generation)
+        telemetry.incr("cache_lookups_total", cache="answer", result="miss" if cached is None else "hit")
+        if cached is not None:
+            if verbose:
+                print(f"--- Resposta reutilizada do cache: {query} ---")
+            span["cached"] = True
+            return cached
+        
+        # Execução (o callback registra cada chamada à LLM, às tools e os tokens)
+        inputs = {"messages": [("user", query)]}
+        config = {"callbacks": [TelemetryCallbackHandler(telemetry)]}
+        
+        if verbose:
+            print(f"--- Processando pergunta: {query} ---")
+        for step in agent_rag.stream(inputs, config=config, stream_mode="values"):
+            # Pega a última mensagem para exibir
+            last_message = step["messages"][-1]
+            if verbose:
+                last_message.pretty_print()
+        
+        engine.answer_cache.put(query, last_message.content, generation)
+        return last_message.content
+
+# ============================================================================= #
+def rag_agent_stream(query: str, collections: tuple | list | None = None, verbose: bool = True):
     """
+    Streaming version of `rag_agent_response`: yields the agent events as they arrive,
+    so the UI can render the answer token by token.
+
+    Args:
+        query (str): The user query to be processed by the RAG agent.
+        collections (tuple | list | None): Collections to search. None means the default collection.
+        verbose (bool): Logs the question being processed.
+
+    Yields:
+        dict: Events with a `type` key:
+            - "tool_call": the agent called a tool (`name`, `args`);
+            - "tool_result": a tool returned (`name`, `content`);
+            - "token": a piece of the final answer (`text`);
+            - "done": the full answer (`text`) and whether it came from the cache (`cached`).
+    """
+    telemetry = get_telemetry()
+    engine = get_rag_engine(collections)
     
-    agent_rag = create_agent(model, tools, system_prompt=system_prompt)
-    
-    # 6. Execução
-    inputs = {"messages": [("user", query)]}
-    
-    print(f"--- Processando pergunta: {query} ---")
-    for step in agent_rag.stream(inputs, stream_mode="values"):
-        # Pega a última mensagem para exibir
-        last_message = step["messages"][-1]
-        last_message.pretty_print()
+    with telemetry.span("chat_request", streaming=True) as span:
+        agent_rag, generation = engine.get_agent_and_generation()
+        
+        cached = engine.answer_cache.get(query, generation)
+        telemetry.incr("cache_lookups_total", cache="answer", result="miss" if cached is None else "hit")
+        if cached is not None:
+            span["cached"] = True
+            yield {"type": "token", "text": cached}
+            yield {"type": "done", "text": cached, "cached": True}
+            return
+        
+        inputs = {"messages": [("user", query)]}
+        config = {"callbacks": [TelemetryCallbackHandler(telemetry)]}
+        start = time.perf_counter()
+        answer = []     # Tokens da última resposta do modelo (a anterior a uma tool call é descartada)
+        
+        if verbose:
+            print(f"--- Processando pergunta (streaming): {query} ---")
+        for message, _ in agent_rag.stream(inputs, config=config, stream_mode="messages"):
+            if isinstance(message, ToolMessage):
+                answer = []
+                yield {"type": "tool_result", "name": message.name, "content": message.content}
+                
+            elif isinstance(message, AIMessage):
+                # Modelos sem streaming entregam a mensagem inteira de uma vez
+                tool_calls = message.tool_call_chunks if isinstance(message, AIMessageChunk) else message.tool_calls
+                for tool_call in tool_calls:
+                    if tool_call.get("name"):
+                        yield {"type": "tool_call", "name": tool_call["name"], "args": tool_call.get("args")}
+                
+                text = message.text
+                if text:
+                    if not answer and "time_to_first_token" not in span:
+                        span["time_to_first_token"] = round(time.perf_counter() - start, 3)
+                        telemetry.record("time_to_first_token", span["time_to_first_token"])
+                    answer.append(text)
+                    yield {"type": "token", "text": text}
         
-    return last_message.content
\ No newline at end of file
+        full_answer = "".join(answer)
+        engine.answer_cache.put(query, full_answer, generation)
+        yield {"type": "done", "text": full_answer, "cached": False}
@@ -0,0 +1,124 @@
+# ============================================================================= #
+# Project: Multimodal RAG Pipeline
+# Develop by: Thiago Piovesan
+# Description: Recall vs latency benchmark of the ANN index types
+# Date: 2026-01-08 // YYYY-MM-DD
+# Version: 0.1.0
+# License: MIT
+# ============================================================================= #
+# Libs Importation:
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+
+sys.path.append(".")
+from rag.ann_index import INDEX_KINDS, IndexConfig, build_index, index_memory_bytes
+
+# ============================================================================= #
+def synthetic_vectors(n: int, dim: int, clusters: int = 256, seed: int = 0) -> np.ndarray:
+    """
+    Clustered gaussian vectors, closer to real embeddings than uniform noise.
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, n)] + 0.3 * rng.normal(size=(n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def index_vectors_from_path(index_path: str) -> np.ndarray:
+    """
+    Live vectors of an existing index (opened without an embedding model).
+    """
+    from rag.sharded_store import ShardedVectorStore, _NullEmbeddings
+    return ShardedVectorStore(index_path, _NullEmbeddings()).live_vectors()
+
+# ============================================================================= #
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    hits = sum(len(set(row_found) & set(row_truth)) for row_found, row_truth in zip(found, truth))
+    return hits / truth.size
+
+def run_benchmark(vectors: np.ndarray, configs: list[IndexConfig], num_queries: int = 200, k: int = 5) -> dict:
+    """
+    Builds each index type over `vectors` and measures it against exact (Flat) search.
+
+    Args:
+        vectors (np.ndarray): The corpus (n, dim).
+        configs (list[IndexConfig]): Index types to compare.
+        num_queries (int): Queries (perturbed corpus vectors).
+        k (int): Neighbours per query.
+
+    Returns:
+        dict: Corpus info and, per index type, build time, memory, recall@k and latency percentiles.
+    """
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.choice(len(vectors), num_queries, replace=False)]
+    queries = (queries + 0.05 * rng.normal(size=queries.shape)).astype(np.float32)
+
+    exact = build_index(vectors, IndexConfig(kind="flat"))
+    _, truth = exact.search(queries, k)
+
+    # ---------------------------------------------------------------------------- #
+    results = []
+    for config in configs:
+        start = time.perf_counter()
+        index = build_index(vectors, config)
+        build_seconds = time.perf_counter() - start
+
+        # Latência de consultas individuais (como no chat)
+        latencies, found = [], []
+        for query in queries:
+            start = time.perf_counter()
+            _, ids = index.search(query[None, :], k)
+            latencies.append((time.perf_counter() - start) * 1000)
+            found.append(ids[0])
+
+        results.append({
+            "kind": config.kind,
+            "index_class": type(index).__name__,
+            "config": config.to_dict(),
+            "build_seconds": round(build_seconds, 3),
+            "memory_bytes": index_memory_bytes(index),
+            f"recall@{k}": round(recall_at_k(np.array(found), truth), 4),
+            "latency_ms_p50": round(float(np.percentile(latencies, 50)), 4),
+            "latency_ms_p99": round(float(np.percentile(latencies, 99)), 4),
+        })
+
+    return {"num_vectors": len(vectors), "dim": vectors.shape[1], "num_queries": num_queries, "k": k, "results": results}
+
+# ============================================================================= #
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compara Flat / HNSW / IVF-Flat / IVF-PQ em recall@k, latência e memória.")
+    parser.add_argument("--index-path", help="Usa os vetores de um índice existente em vez de dados sintéticos.")
+    parser.add_argument("--num-vectors", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--num-queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--kinds", nargs="+", choices=INDEX_KINDS, default=list(INDEX_KINDS))
+    parser.add_argument("--nprobe", type=int, default=16)
+    parser.add_argument("--ef-search", type=int, default=64)
+    parser.add_argument("--pq-m", type=int, default=48)
+    parser.add_argument("--output", help="Arquivo JSON de saída (padrão: stdout).")
+    args = parser.parse_args()
+
+    if args.index_path:
+        vectors = index_vectors_from_path(args.index_path)
+    else:
+        vectors = synthetic_vectors(args.num_vectors, args.dim)
+
+    # min_train_size=0: compara os tipos mesmo em corpora pequenos
+    configs = [
+        IndexConfig(kind=kind, nprobe=args.nprobe, ef_search=args.ef_search, pq_m=args.pq_m, min_train_size=0)
+        for kind in args.kinds
+    ]
+    report = json.dumps(run_benchmark(vectors, configs, args.num_queries, args.k), indent=2)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report)
+    else:
+        print(report)
+
+if __name__ == "__main__":
+    main()
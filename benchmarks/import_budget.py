@@ -0,0 +1,90 @@
+# ============================================================================= #
+# Project: Multimodal RAG Pipeline
+# Develop by: Thiago Piovesan
+# Description: Import-time budget check (cold start of the app and the workers)
+# Date: 2026-01-08 // YYYY-MM-DD
+# Version: 0.1.0
+# License: MIT
+# ============================================================================= #
+# Libs Importation:
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+# ============================================================================= #
+# Módulos importados no início de cada tipo de processo
+MODULES = (
+    "main_interface",           # Streamlit (upload + chat)
+    "agents.rag_agent",         # Chat
+    "rag.job_queue",            # Worker de ingestão (antes do primeiro job)
+    "rag.ingestion",
+    "agents.image_descriptor",
+)
+
+# Dependências pesadas que só podem ser carregadas no primeiro uso
+HEAVY_MODULES = (
+    "torch",
+    "transformers",
+    "sentence_transformers",
+    "unstructured.partition.pdf",
+    "unstructured_inference",
+    "langchain_google_genai",
+)
+
+IMPORT_BUDGET_SECONDS = float(os.getenv("IMPORT_BUDGET_SECONDS", "3.0"))
+
+_PROBE = """
+import sys, json, time, resource
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+heavy = [name for name in {heavy!r} if name in sys.modules]
+print(json.dumps({{"seconds": round(seconds, 3), "peak_rss_mb": round(peak, 1), "heavy_modules": heavy}}))
+"""
+
+# ============================================================================= #
+def measure_import(module: str) -> dict:
+    """
+    Imports `module` in a fresh interpreter and reports its import time, peak RSS and
+    the heavy dependencies it pulled in.
+    """
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+        capture_output=True, text=True, env={**os.environ, "STREAMLIT_LOG_LEVEL": "error"},
+    )
+    if result.returncode != 0:
+        return {"module": module, "error": result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "erro"}
+    return {"module": module, **json.loads(result.stdout.strip().splitlines()[-1])}
+
+# ============================================================================= #
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Verifica o tempo de import e as dependências pesadas carregadas no início.")
+    parser.add_argument("--modules", nargs="*", default=list(MODULES))
+    parser.add_argument("--budget", type=float, default=IMPORT_BUDGET_SECONDS, help="Tempo máximo de import por módulo (s).")
+    args = parser.parse_args()
+
+    failures = 0
+    for module in args.modules:
+        report = measure_import(module)
+        if "error" in report:
+            failures += 1
+            print(f"❌ {module}: falha no import ({report['error']})")
+            continue
+
+        problems = []
+        if report["seconds"] > args.budget:
+            problems.append(f"{report['seconds']}s > {args.budget}s")
+        if report["heavy_modules"]:
+            problems.append(f"carregou {', '.join(report['heavy_modules'])}")
+
+        failures += bool(problems)
+        status = "❌" if problems else "✅"
+        print(f"{status} {module}: {report['seconds']}s, {report['peak_rss_mb']} MB" + (f" ({'; '.join(problems)})" if problems else ""))
+
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+# ============================================================================= #
+# Project: Multimodal RAG Pipeline
+# Develop by: Thiago Piovesan
+# Description: Offline benchmark of the ingestion and query hot paths
+# Date: 2026-01-08 // YYYY-MM-DD
+# Version: 0.1.0
+# License: MIT
+# ============================================================================= #
+# Libs Importation:
+import os
+import re
+import sys
+import json
+import time
+import random
+import hashlib
+import platform
+import resource
+import tempfile
+import contextlib
+import multiprocessing
+import argparse
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+sys.path.append(".")
+
+# ============================================================================= #
+SAMPLE_JSON = "data/layout-parser-paper-output.json"
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+EMBEDDING_DIM = 384
+
+# ============================================================================= #
+class DeterministicEmbeddings(Embeddings):
+    """
+    Offline stand-in for MiniLM: a unit vector seeded by the md5 of the text.
+    Same text -> same vector, in any process, at a few microseconds per text.
+    """
+
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        self.dim = dim
+
+    def _embed(self, text: str) -> list[float]:
+        seed = int.from_bytes(hashlib.md5(text.encode("utf-8")).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+class StubVisionModel:
+    """
+    Answers every vision request with a fixed description (no network).
+    """
+
+    def invoke(self, messages):
+        return AIMessage(content="Stub description: a diagram with boxes and arrows.")
+
+class StubChatModel(BaseChatModel):
+    """
+    Tool-calling chat model without network: first asks for `search_knowledge_base`
+    with the user question, then answers with the start of the tool output.
+    """
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub-chat"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        last = messages[-1]
+        if isinstance(last, ToolMessage):
+            message = AIMessage(content=f"Resposta (stub): {str(last.content)[:200]}")
+        else:
+            message = AIMessage(content="", tool_calls=[
+                {"name": "search_knowledge_base", "args": {"query": str(last.content)}, "id": "call-0"}
+            ])
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+# ============================================================================= #
+def synthetic_corpus(base: list[dict], size: int, seed: int = 0) -> list[dict]:
+    """
+    Scales the sample elements up to `size` NarrativeText elements of ~220 tokens
+    (one chunk each), mixing sentences from the sample with a unique marker.
+    """
+    rng = random.Random(seed)
+    sentences = [s for item in base for s in re.split(r"(?<=[.!?])\s+", item["text"]) if len(s) > 20]
+
+    corpus = []
+    for i in range(size):
+        text = f"[doc {i}]"
+        while len(text) < 880:
+            text += " " + rng.choice(sentences)
+        corpus.append({
+            "type": "NarrativeText",
+            "text": text[:900],
+            "element_id": f"synthetic-{i}",
+            "metadata": {"page_number": i // 50 + 1},
+        })
+    return corpus
+
+def percentiles(values: list[float]) -> dict:
+    return {f"p{p}": round(float(np.percentile(values, p)), 3) for p in (50, 95, 99)}
+
+def peak_rss_mb() -> float:
+    # ru_maxrss: KB no Linux, bytes no macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+@contextlib.contextmanager
+def measure(results: dict, name: str, count: int | None = None):
+    # Pico de RSS do processo ao fim do estágio (tracemalloc distorceria os tempos)
+    start = time.perf_counter()
+    yield
+    seconds = time.perf_counter() - start
+
+    results[name] = {"seconds": round(seconds, 3), "peak_rss_mb": peak_rss_mb()}
+    if count is not None:
+        results[name]["per_second"] = round(count / seconds, 1) if seconds else None
+
+# ============================================================================= #
+def load_corpus(size: int | None) -> tuple[str, list]:
+    with open(SAMPLE_JSON, "r", encoding="utf-8") as f:
+        sample = json.load(f)
+    if size is None:
+        return "sample", sample
+    return f"synthetic-{size}", synthetic_corpus(sample, size)
+
+def run_corpus(size: int | None, num_queries: int, dim: int, with_agent: bool) -> dict:
+    """
+    Runs every measurement on one corpus (the sample JSON if `size` is None) inside a
+    fresh index directory. Executed in a child process so peak RSS belongs to this corpus only.
+    """
+    import rag.vector_store as vector_store
+    from rag.embeddings import CachedEmbeddings, EmbeddingCache
+
+    work_dir = tempfile.mkdtemp(prefix="rag-bench-")
+    index_path = os.path.join(work_dir, "index")
+    model_name = f"deterministic-{dim}"
+    embeddings = CachedEmbeddings(DeterministicEmbeddings(dim), model_name=model_name,
+                                  cache=EmbeddingCache(model_name, cache_dir=os.path.join(work_dir, "embeddings")))
+
+    # Troca o modelo de embeddings e o diretório do índice (sem rede / GPU)
+    vector_store.get_embeddings = lambda: embeddings
+    vector_store.INDEX_PATH = index_path
+
+    name, json_data = load_corpus(size)
+    stages = {}
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        with measure(stages, "create_document", len(json_data)):
+            docs = vector_store.create_document(json_data, name)
+
+        with measure(stages, "vectorize_json", len(json_data)):
+            vector_store.vectorize_json(json_data, name)
+
+        with measure(stages, "index_load"):
+            store = vector_store.load_vector_store(index_path)
+
+        # ---------------------------------------------------------------------------- #
+        tool = vector_store.get_retriever_tool(store)
+        rng = random.Random(1)
+        queries = [" ".join(rng.choice(docs).page_content.split()[2:12]) for _ in range(num_queries)]
+
+        latencies = []
+        with measure(stages, "search_knowledge_base", num_queries):
+            for query in queries:
+                start = time.perf_counter()
+                tool.invoke({"query": query})
+                latencies.append((time.perf_counter() - start) * 1000)
+        stages["search_knowledge_base"]["latency_ms"] = percentiles(latencies)
+
+        if with_agent:
+            from agents.rag_agent import RAGEngine
+
+            engine = RAGEngine(index_path)
+            engine._model = StubChatModel()
+            latencies = []
+            with measure(stages, "agent_stub_chat", num_queries):
+                for query in queries:
+                    start = time.perf_counter()
+                    agent = engine.get_agent()
+                    agent.invoke({"messages": [("user", f"{query}?")]})
+                    latencies.append((time.perf_counter() - start) * 1000)
+            stages["agent_stub_chat"]["latency_ms"] = percentiles(latencies)
+
+    return {
+        "corpus": name,
+        "elements": len(json_data),
+        "chunks": store.ntotal,
+        "stages": stages,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+def _run_in_child(args):
+    return run_corpus(*args)
+
+def run_describe_benchmark(num_images: int = 64) -> dict:
+    """
+    Overhead of the batched description path (thread pool, retries) with a stub model.
+    """
+    try:
+        from agents.image_descriptor import describe_images_batch
+    except ImportError as e:
+        return {"skipped": str(e)}
+
+    stages = {}
+    with measure(stages, "describe_images_batch", num_images):
+        describe_images_batch(["aGVsbG8="] * num_images, model=StubVisionModel(), rate_limiter=None)
+    return stages["describe_images_batch"]
+
+# ============================================================================= #
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark offline (sem rede/GPU) da ingestão e das consultas.")
+    parser.add_argument("--sizes", type=int, nargs="*", default=list(DEFAULT_SIZES), help="Tamanhos dos corpora sintéticos (chunks).")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=EMBEDDING_DIM)
+    parser.add_argument("--with-agent", action="store_true", help="Mede também o agente completo com o chat stub.")
+    parser.add_argument("--output", help="Arquivo JSON de saída (padrão: stdout).")
+    args = parser.parse_args()
+
+    # Um processo por corpus: o pico de memória (RSS) de um não contamina o outro
+    results = []
+    context = multiprocessing.get_context("spawn")
+    for size in [None] + args.sizes:
+        with context.Pool(1) as pool:
+            result = pool.apply(_run_in_child, ((size, args.queries, args.dim, args.with_agent),))
+        results.append(result)
+        print(f"✅ {result['corpus']}: {result['chunks']} chunks", file=sys.stderr)
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "embedding_dim": args.dim,
+        "describe_images_batch": run_describe_benchmark(),
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
@@ -10,19 +10,16 @@
 import os
 import io
 import time
-import json
-import base64
 import zipfile
-import hashlib
+import tempfile
 import pandas as pd
 import streamlit as st
 
-from PIL import Image
-from rag.vector_store import vectorize_json
-from agents.rag_agent import rag_agent_response
-from agents.image_descriptor import describe_image
-from unstructured.partition.pdf import partition_pdf
-from unstructured.staging.base import elements_to_json
+from agents.rag_agent import rag_agent_stream
+from rag import api
+from rag.job_queue import JobQueue, ensure_workers, worker_spans_path
+from rag.collection_store import DEFAULT_COLLECTION, collection_path, list_collections
+from rag.telemetry import get_telemetry, read_span_log, summarize_spans
 
 # ============================================================================= #
 file_path = "./data"
@@ -36,100 +33,58 @@ st.set_page_config(
 )
 
 # ============================================================================= #
-def encode_image(image_path):
-    with open(image_path, "rb") as image_file:
-        image_hash = hashlib.md5(image_file.read()).hexdigest()
-    
-    with Image.open(image_path) as img:    
-        # Converte para RGB se necessário
-        if img.mode != 'RGB':
-            img = img.convert('RGB')
-            
-        # Salva em buffer
-        buffered = io.BytesIO()
-        img.save(buffered, format="JPEG")
-        
-    return base64.b64encode(buffered.getvalue()).decode(), image_hash
-
-# ============================================================================= #
-def process_pdf(file_path, base_file_name, described_images_hashes, mock_file=None):
-    start_time = time.time()
-                
+def process_pdf(file_path, base_file_name, mock_file=None, export_json=False, collection=None, source=None):
     if mock_file:
         with open(f"{file_path}/{base_file_name}.pdf", "wb") as f:
             f.write(mock_file.getvalue())
-                
-    elements = partition_pdf(
-        filename=f"{file_path}/{base_file_name}.pdf",
-        strategy="hi_res",                                  # Obrigatório para tabelas e imagens
-        infer_table_structure=True,                         # Extrai a estrutura da tabela
-        extract_images_in_pdf=True,                         # Salva as imagens localmente
-        extract_image_block_output_dir="./data/temp_images",# Pasta onde as imagens vão cair
-        extract_image_block_types=["Image", "Table"]        # O que deve ser "recortado"
-    )
     
-    described_images_hashes, elements = describe_images_and_tables(elements, described_images_hashes)
-    
-    elements_to_json(elements=elements, filename=f"{file_path}/{base_file_name}-output.json")
-    
-    end_time = time.time()
-    st.success(f"Processing completed in {end_time - start_time:.2f} seconds!")
-    
-    # ---------------------------------------------------------------------------- #
-    # Extract Embbeding to RAG:
-    json_data = ""
-    with open(f"{file_path}/{base_file_name}-output.json", "r", encoding="utf-8") as json_file:
-        json_data = json.load(json_file)
-    
-    vectorize_json(json_data = json_data, base_file_name = base_file_name)
-    
-    return described_images_hashes
+    # A ingestão roda em um worker em segundo plano (partição -> descrição -> embeddings -> índice)
+    # O JSON de saída é apenas um subproduto opcional (mesma API usada pela linha de comando)
+    json_output_path = f"{file_path}/{base_file_name}-output.json" if export_json else None
+    job_id = api.process_pdf(f"{file_path}/{base_file_name}.pdf", source or base_file_name, collection, json_output_path)
+    st.success(f"📥 PDF adicionado à fila de processamento (job {job_id}). Acompanhe o progresso abaixo.")
 
 # ============================================================================= #
-def describe_images_and_tables(elements, described_images_hashes) -> dict:
-    """
-    Process the PDF elements, describe images, and save output to JSON.
-
-    Args:
-        file_path (str): File path for saving output. 
-        base_file_name (str): Base name for the output file.
-        elements (list): List of elements extracted from the PDF.
-        described_images_hashes (dict): Dictionary of image hashes and their descriptions.
-
-    Returns:
-        dict: Updated dictionary of image hashes and their descriptions.
-    """
+@st.fragment(run_every=3)
+def show_jobs_panel():
+    # Apenas consulta o status dos jobs; o processamento acontece nos workers
+    job_queue = JobQueue()
+    jobs = job_queue.list_jobs(limit=50)
+    if not jobs:
+        return
     
-    # ---------------------------------------------------------------------------- #
-    for el in elements:
-        if el.category == "Table":
-            html_table = el.metadata.text_as_html
-            el.text = f"Table HTML: {html_table}"
-            # print(f"Tabela encontrada: {html_table}")   
-            
-    # ---------------------------------------------------------------------------- #
-        elif el.category == "Image":
-            # Salva a imagem com um path no metadata
-            image_path = el.metadata.image_path
-            b64, image_hash = encode_image(image_path=image_path)
-            
-            if image_hash in described_images_hashes:
-                description = described_images_hashes[image_hash]
-                # print(f"Descrição da imagem (hash: {image_hash}) já existente: {description}")
-            else:
-                # Chama o agente de descrição de imagem
-                description = describe_image(base64_image=b64)
-                # image_descriptions.append({'hash': image_hash, 'description': description})
-                described_images_hashes[image_hash] = description
-                # print(f"Nova descrição da imagem (hash: {image_hash}): {description}")
-            
-            # Substitui o conteúdo do elemento:
-            el.text = f"Image Description: {description}"            # Gere um hash da imagem para verificar se já foi descrita
+    counts = job_queue.counts()
+    st.subheader("🗃️ Fila de processamento")
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("⏳ Na fila", counts.get("queued", 0))
+    with col2:
+        st.metric("⚙️ Processando", counts.get("running", 0))
+    with col3:
+        st.metric("✅ Concluídos", counts.get("done", 0) + counts.get("skipped", 0))
+    with col4:
+        st.metric("❌ Erros", counts.get("failed", 0))
+    
+    now = time.time()
+    df_jobs = pd.DataFrame([{
+        "arquivo": job["source"],
+        "status": job["status"],
+        "etapa": job["stage"] or "-",
+        "mensagem": job["message"] or "",
+        "tentativas": job["attempts"],
+        "imagens do cache": job["stats"].get("description_cache_hits"),
+        "imagens descritas": job["stats"].get("description_cache_misses"),
+        "segundos": round((job["finished_at"] or now) - job["started_at"], 1) if job["started_at"] else None,
+    } for job in jobs])
+    st.dataframe(df_jobs, width='stretch')
     
-    return described_images_hashes, elements
+    # As descrições são feitas nos workers: os contadores vêm das linhas dos jobs
+    hits = sum(job["stats"].get("description_cache_hits", 0) for job in jobs)
+    misses = sum(job["stats"].get("description_cache_misses", 0) for job in jobs)
+    st.caption(f"🗂️ Cache de descrições (jobs listados): {hits} hits / {misses} misses")
 
 # ============================================================================= #
-def extract_zip(uploaded_file, file_path, described_images_hashes):
+def extract_zip(uploaded_file, file_path, collection=None):
     # Extrai o arquivo zip
     st.subheader("📦 Processamento de Arquivo ZIP")
             
@@ -174,105 +129,75 @@ def extract_zip(uploaded_file, file_path, described_images_hashes):
         st.error(f"Erro ao ler ZIP: {e}")
     
     # ============================================================================= #
+    max_workers = st.number_input("⚙️ Workers de ingestão", min_value=1, 
+                                  max_value=os.cpu_count() or 1, value=min(2, os.cpu_count() or 1))
+    
     # Botão para processar
     if st.button("🚀 Processar Todos os Arquivos do ZIP", width='stretch'):
         
         # Contadores
-        processados = 0
-        com_sucesso = 0
+        enfileirados = 0
         com_erro = 0
         nao_suportados = 0
         
         resultados_detalhados = []
         
-        # Progress bar
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-        
     # ---------------------------------------------------------------------------- #
+        job_queue = JobQueue()
+        options = {"collection": collection} if collection and collection != DEFAULT_COLLECTION else {}
         try:
             zip_buffer = io.BytesIO(uploaded_file.getvalue())
-            with zipfile.ZipFile(zip_buffer, 'r') as zip_ref:
+            # Pasta temporária própria: os PDFs do ZIP não sobrescrevem arquivos de ./data
+            # (a fila copia cada PDF para a pasta do job)
+            with zipfile.ZipFile(zip_buffer, 'r') as zip_ref, tempfile.TemporaryDirectory(dir=file_path, prefix="zip-") as staging_dir:
                 file_list = [f for f in zip_ref.namelist() 
                             if not f.endswith('/') and not f.startswith('__MACOSX')]
                 
-                total_files = len(file_list)
-                
-                for idx, file_name in enumerate(file_list):
-                    processados += 1
-                    status_text.text(f"Processando {processados}/{total_files}: {file_name}")
-                    progress_bar.progress(processados / total_files)
+                for file_name in file_list:
+                    ext = file_name.split('.')[-1].lower()
                     
-                    # Extrair arquivo
-                    with zip_ref.open(file_name) as file_in_zip:
-                        file_bytes = file_in_zip.read()
-                        
-                        # Criar objeto mock do arquivo
-                        class MockUploadedFile:
-                            def __init__(self, name, content):
-                                self.name = name
-                                self._content = content
-                            
-                            def getvalue(self):
-                                return self._content
-                            
-                            def read(self):
-                                return self._content
-                        
-                        mock_file = MockUploadedFile(
-                            name=os.path.basename(file_name),
-                            content=file_bytes
-                        )
-                        
-                        # Processar baseado no tipo
-                        ext = file_name.split('.')[-1].lower()
-                        resultado = {
+                    # PDF: extrai para a pasta temporária e adiciona à fila dos workers
+                    if ext in ['pdf']:
+                        pdf_path = os.path.join(staging_dir, api.safe_file_name(file_name))
+                        with zip_ref.open(file_name) as file_in_zip, open(pdf_path, "wb") as f:
+                            f.write(file_in_zip.read())
+                        job_id = job_queue.enqueue(pdf_path, file_name, **options)
+                        enfileirados += 1
+                        resultados_detalhados.append({
                             "arquivo": file_name,
                             "tipo": ext,
-                            "status": "Desconhecido",
-                            "mensagem": ""
-                        }
-                        
-                    # ---------------------------------------------------------------------------- #
-                        try:
-                            # PDF:
-                            if ext in ['pdf']:
-                                described_images_hashes = process_pdf(file_path, file_name, described_images_hashes, mock_file=mock_file)
-                            else:
-                                nao_suportados += 1
-                                resultado["status"] = "⚠️ Não suportado"
-                                resultado["mensagem"] = f"Tipo de arquivo não suportado: {ext}"
-                        
-                    # ---------------------------------------------------------------------------- #
-                        except Exception as e:
-                            com_erro += 1
-                            resultado["status"] = "❌ Erro"
-                            resultado["mensagem"] = str(e)
+                            "status": "📥 Na fila",
+                            "mensagem": f"Job {job_id}"
+                        })
+                    else:
+                        nao_suportados += 1
+                        resultados_detalhados.append({
+                            "arquivo": file_name,
+                            "tipo": ext,
+                            "status": "⚠️ Não suportado",
+                            "mensagem": f"Tipo de arquivo não suportado: {ext}"
+                        })
                         
-                        resultados_detalhados.append(resultado)
+    # ---------------------------------------------------------------------------- #
+            # Os workers processam os PDFs em segundo plano (o chat continua disponível)
+            ensure_workers(max_workers)
         
     # ---------------------------------------------------------------------------- #
         except Exception as e:
+            com_erro += 1
             st.error(f"Erro ao processar ZIP: {e}")
         
-    # ---------------------------------------------------------------------------- #
-        # Limpar progress
-        progress_bar.empty()
-        status_text.empty()
-        
     # ---------------------------------------------------------------------------- #
         # Mostrar resultados
         st.write("---")
         st.subheader("📊 Resumo do Processamento")
         
-        col1, col2, col3, col4 = st.columns(4)
+        col1, col2, col3 = st.columns(3)
         with col1:
-            st.metric("📝 Total Processados", processados)
+            st.metric("📥 Na Fila", enfileirados)
         with col2:
-            st.metric("✅ Sucesso", com_sucesso, delta=None, delta_color="normal")
-        with col3:
             st.metric("❌ Erros", com_erro, delta=None, delta_color="inverse")
-        with col4:
+        with col3:
             st.metric("⚠️ Não Suportados", nao_suportados)
         
         # Tabela de resultados
@@ -291,26 +216,68 @@ def extract_zip(uploaded_file, file_path, described_images_hashes):
         #     )
         
     # ---------------------------------------------------------------------------- #
-        if com_sucesso > 0:
-            st.success(f"🎉 {com_sucesso} documento(s) processado(s) e salvo(s) no banco com sucesso!")
+        if enfileirados > 0:
+            st.success(f"🎉 {enfileirados} documento(s) adicionado(s) à fila de processamento!")
         
         if com_erro > 0:
-            st.warning(f"⚠️ {com_erro} arquivo(s) com erro durante o processamento.")
+            st.warning("⚠️ Erro ao ler o arquivo ZIP.")
         
         if nao_suportados > 0:
             st.info(f"ℹ️ {nao_suportados} arquivo(s) não suportado(s) ou pulado(s).")
+    
+# ============================================================================= #
+def show_metrics_panel():
+    # Tempos por etapa: deste processo (consultas) e dos workers de ingestão (log JSON compartilhado)
+    telemetry = get_telemetry()
+    with st.expander("📈 Métricas do pipeline"):
+        summary = telemetry.summary()
+        worker_summary = summarize_spans(read_span_log(worker_spans_path()))
+        if summary:
+            st.caption("Esta interface")
+            st.dataframe(pd.DataFrame(summary), width='stretch')
+        if worker_summary:
+            st.caption("Workers de ingestão")
+            st.dataframe(pd.DataFrame(worker_summary), width='stretch')
+        if not summary and not worker_summary:
+            st.caption("Nenhuma etapa registrada ainda.")
+        
+        counters = telemetry.counters()
+        if counters:
+            st.dataframe(pd.DataFrame(sorted(counters.items()), columns=["contador", "valor"]), width='stretch')
 
-    return described_images_hashes
+# ============================================================================= #
+def stream_answer(query, collections=None):
+    # Renderiza a resposta token a token e as chamadas de ferramenta à medida que chegam
+    status = st.status("🔍 Consultando banco de dados...", expanded=False)
+    placeholder = st.empty()
+    text = ""
     
+    for event in rag_agent_stream(query, collections):
+        if event["type"] == "tool_call":
+            status.write(f"🛠️ `{event['name']}`")
+        elif event["type"] == "tool_result":
+            # Texto anterior à chamada da ferramenta não faz parte da resposta final
+            text = ""
+            placeholder.empty()
+            status.write(f"📄 `{event['name']}` retornou {len(str(event['content']))} caracteres")
+        elif event["type"] == "token":
+            text += event["text"]
+            placeholder.markdown(text + "▌")
+        elif event["type"] == "done":
+            text = event["text"]
+            status.update(label="💾 Resposta do cache" if event["cached"] else "✅ Consulta concluída", state="complete")
+    
+    placeholder.markdown(text)
+    return text
+
 # ============================================================================= #
 def main():
-    described_images_hashes = {}
-    
 # ============================================================================= #
     # Streamlit Interface:
     st.title("Multimodal RAG Pipeline - Image Description Agent")
     st.write("This application processes a PDF document, extracts images, and generates descriptions for each image using a language model.")
     
+    show_metrics_panel()
     st.markdown("---")
     
     # --- Tabs para diferentes modos ---
@@ -320,6 +287,12 @@ def main():
         # Aba 1: File Upload:
         st.header("1. PDF File Upload")
         uploaded_file = st.file_uploader("Upload a file", type=["pdf", 'zip', 'tar', 'gz', 'tgz', 'rar'])
+        collection = st.text_input("🗂️ Coleção", value=DEFAULT_COLLECTION, help="Cada coleção tem o seu próprio índice (letras, números, '_' ou '-').").strip()
+        try:
+            collection_path(collection)
+        except ValueError as e:
+            st.error(str(e))
+            uploaded_file = None
         
         if uploaded_file is not None:
             st.success(f"✅ Arquivo '{uploaded_file.name}' carregado!")
@@ -329,24 +302,32 @@ def main():
 
         # ---------------------------------------------------------------------------- #
             if is_pdf:
-                # Salva o arquivo temporariamente
-                with open(f"{file_path}/{base_file_name}.pdf", "wb") as f:
+                # Cada upload fica com o seu próprio nome (que também é a fonte no índice);
+                # um nome fixo faria cada PDF novo substituir o anterior
+                pdf_name = api.safe_file_name(uploaded_file.name)
+                pdf_base_name = os.path.splitext(pdf_name)[0]
+                with open(f"{file_path}/{pdf_base_name}.pdf", "wb") as f:
                     f.write(uploaded_file.getbuffer())
                     
+                export_json = st.checkbox("💾 Exportar elementos em JSON", value=False)
+                
                 # Botão para iniciar o processamento
                 if st.button("🚀 Processar PDF", width='stretch'):
                     st.info("Processing the PDF file. This may take a few moments...")
-                    described_images_hashes = process_pdf(file_path, base_file_name, described_images_hashes)
+                    process_pdf(file_path, pdf_base_name, export_json=export_json, collection=collection, source=pdf_name)
                     
         # ---------------------------------------------------------------------------- #
             elif is_zip:
                 # Extrai o arquivo zip
-                # TODO: Adicionar multi-processing para processar vários documentos ao mesmo tempo
-                described_images_hashes = extract_zip(uploaded_file, file_path, described_images_hashes)
+                extract_zip(uploaded_file, file_path, collection=collection)
+        
+        # Status dos jobs (atualizado periodicamente sem bloquear a página)
+        show_jobs_panel()
             
 # ============================================================================= #
     with tab2:
         st.markdown("### 📝 Assistente de Documentos")
+        collections = st.multiselect("🗂️ Coleções consultadas", list_collections(), default=[DEFAULT_COLLECTION])
         chat_container = st.container(height=500)
         
         # Histórico de chat
@@ -371,30 +352,30 @@ def main():
             # Gerar resposta com agente
             with chat_container: # Resposta aparece dentro da caixa
                 with st.chat_message("assistant"):
-                    with st.spinner("🔍 Consultando banco de dados..."):
-                        try:
-                            resposta_texto = rag_agent_response(query)
-                            
-                        except KeyError as e:
-                            resposta_texto = f"Erro de chave: {e}. Verifique se os dados do banco estão no formato correto."
-                            st.error("💡 Dica: Pode ser que a estrutura dos dados no banco esteja inconsistente.")
-                        except Exception as e:
-                            resposta_texto = f"Erro ao processar: {e}"
-                            st.error("💡 Dica: Tente reformular sua pergunta de forma mais específica.")
-                            
-                            # Debug info
-                            with st.expander("🔍 Informações de debug"):
-                                st.write("**Erro completo:**")
-                                st.code(str(e))
-                                st.write("**Tipo de erro:**", type(e).__name__)
-                    
+                    try:
+                        # A resposta aparece enquanto é gerada (streaming)
+                        resposta_texto = stream_answer(query, collections or None)
+                        
+                    except KeyError as e:
+                        resposta_texto = f"Erro de chave: {e}. Verifique se os dados do banco estão no formato correto."
+                        st.error("💡 Dica: Pode ser que a estrutura dos dados no banco esteja inconsistente.")
                         st.write(resposta_texto)
-                    
-                        # Adicionar resposta ao histórico
-                        st.session_state.chat_messages.append({
-                            "role": "assistant",
-                            "content": resposta_texto
-                        })
+                    except Exception as e:
+                        resposta_texto = f"Erro ao processar: {e}"
+                        st.error("💡 Dica: Tente reformular sua pergunta de forma mais específica.")
+                        st.write(resposta_texto)
+                        
+                        # Debug info
+                        with st.expander("🔍 Informações de debug"):
+                            st.write("**Erro completo:**")
+                            st.code(str(e))
+                            st.write("**Tipo de erro:**", type(e).__name__)
+                
+                    # Adicionar resposta ao histórico
+                    st.session_state.chat_messages.append({
+                        "role": "assistant",
+                        "content": resposta_texto
+                    })
             
         # What is the main subject of the document: "Decoding Google’s AI Guide" ?
         # What are the 3 steps to go from theory to production talked on "Decoding Google’s AI Guide" ?
@@ -0,0 +1,165 @@
+# ============================================================================= #
+# Project: Multimodal RAG Pipeline
+# Develop by: Thiago Piovesan
+# Description: ANN index types (Flat / HNSW / IVF-Flat / IVF-PQ)
+# Date: 2026-01-08 // YYYY-MM-DD
+# Version: 0.1.0
+# License: MIT
+# ============================================================================= #
+# Libs Importation:
+import os
+import math
+import argparse
+from dataclasses import dataclass, asdict
+
+import faiss
+import numpy as np
+
+# ============================================================================= #
+INDEX_KINDS = ("flat", "hnsw", "ivf_flat", "ivf_pq")
+
+# ============================================================================= #
+@dataclass
+class IndexConfig:
+    """
+    Type and parameters of the FAISS index built for each shard.
+    Shards smaller than `min_train_size` always stay Flat (exact and cheap at that size).
+    """
+    kind: str = "flat"
+    nlist: int | None = None        # Nº de listas IVF (None: 4 * sqrt(n))
+    nprobe: int = 16                # Listas visitadas por consulta (IVF)
+    pq_m: int = 48                  # Sub-quantizadores PQ (deve dividir a dimensão)
+    pq_nbits: int = 8
+    hnsw_m: int = 32
+    ef_construction: int = 200
+    ef_search: int = 64
+    train_sample: int = 100_000     # Vetores usados no treino (IVF/PQ)
+    min_train_size: int = 10_000
+
+    # ---------------------------------------------------------------------------- #
+    @classmethod
+    def from_env(cls) -> "IndexConfig":
+        config = cls(kind=os.getenv("FAISS_INDEX_KIND", "flat"))
+        for field, cast in (("nlist", int), ("nprobe", int), ("pq_m", int), ("hnsw_m", int), ("ef_search", int)):
+            value = os.getenv(f"FAISS_{field.upper()}")
+            if value:
+                setattr(config, field, cast(value))
+        return config
+
+    @classmethod
+    def from_dict(cls, data: dict | None) -> "IndexConfig":
+        return cls(**data) if data else cls.from_env()
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+# ============================================================================= #
+def build_index(vectors: np.ndarray, config: IndexConfig) -> faiss.Index:
+    """
+    Builds (and trains, if needed) a FAISS index with L2 metric and adds the vectors.
+
+    Args:
+        vectors (np.ndarray): float32 matrix (n, dim).
+        config (IndexConfig): Index type and parameters.
+
+    Returns:
+        faiss.Index: The populated index.
+    """
+    if config.kind not in INDEX_KINDS:
+        raise ValueError(f"Tipo de índice desconhecido: '{config.kind}'. Use um de {INDEX_KINDS}.")
+
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    n, dim = vectors.shape
+    kind = config.kind if n >= config.min_train_size else "flat"
+
+    # ---------------------------------------------------------------------------- #
+    if kind == "flat":
+        index = faiss.IndexFlatL2(dim)
+    elif kind == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, config.hnsw_m)
+        index.hnsw.efConstruction = config.ef_construction
+    else:
+        nlist = config.nlist or max(1, int(4 * math.sqrt(n)))
+        quantizer = faiss.IndexFlatL2(dim)
+        if kind == "ivf_flat":
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist)
+        else:
+            index = faiss.IndexIVFPQ(quantizer, dim, nlist, config.pq_m, config.pq_nbits)
+
+        # Treina em uma amostra
+        rng = np.random.default_rng(0)
+        sample = vectors if n <= config.train_sample else vectors[rng.choice(n, config.train_sample, replace=False)]
+        index.train(sample)
+
+    index.add(vectors)
+    apply_search_params(index, config)
+    return index
+
+# ============================================================================= #
+def apply_search_params(index: faiss.Index, config: IndexConfig) -> None:
+    """
+    Sets the query-time knobs (nprobe / efSearch) on a loaded index.
+    """
+    if isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = config.ef_search
+        return
+    try:
+        faiss.extract_index_ivf(index).nprobe = config.nprobe
+    except RuntimeError:
+        pass    # Índice Flat: não há parâmetros de busca
+
+def search_parameters(index: faiss.Index, config: IndexConfig, selector: faiss.IDSelector) -> faiss.SearchParameters:
+    """
+    Per-query search parameters restricted to `selector`. They replace the knobs set
+    on the index, so nprobe / efSearch are passed again.
+    """
+    if isinstance(index, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=config.ef_search)
+    try:
+        faiss.extract_index_ivf(index)
+        return faiss.SearchParametersIVF(sel=selector, nprobe=config.nprobe)
+    except RuntimeError:
+        return faiss.SearchParameters(sel=selector)
+
+# ============================================================================= #
+def index_vectors(index: faiss.Index) -> np.ndarray:
+    """
+    Reads the stored vectors back from a Flat or HNSW index.
+    """
+    if index.ntotal == 0:
+        return np.empty((0, index.d), dtype=np.float32)
+    return index.reconstruct_n(0, index.ntotal)
+
+def index_memory_bytes(index: faiss.Index) -> int:
+    """
+    Size of the serialized index, a good proxy for its resident memory.
+    """
+    return int(faiss.serialize_index(index).nbytes)
+
+# ============================================================================= #
+def main() -> None:
+    """
+    Rebuilds an existing index into the chosen type:
+        python -m rag.ann_index --kind ivf_pq --nprobe 32
+    """
+    from rag.vector_store import INDEX_PATH, load_vector_store
+
+    parser = argparse.ArgumentParser(description="Reconstrói o índice FAISS com outro tipo de índice ANN.")
+    parser.add_argument("--index-path", default=INDEX_PATH)
+    parser.add_argument("--kind", choices=INDEX_KINDS, required=True)
+    parser.add_argument("--nlist", type=int)
+    parser.add_argument("--nprobe", type=int, default=16)
+    parser.add_argument("--pq-m", type=int, default=48)
+    parser.add_argument("--hnsw-m", type=int, default=32)
+    parser.add_argument("--ef-search", type=int, default=64)
+    parser.add_argument("--min-train-size", type=int, default=10_000)
+    args = parser.parse_args()
+
+    config = IndexConfig(
+        kind=args.kind, nlist=args.nlist, nprobe=args.nprobe, pq_m=args.pq_m,
+        hnsw_m=args.hnsw_m, ef_search=args.ef_search, min_train_size=args.min_train_size,
+    )
+    load_vector_store(args.index_path).rebuild(config)
+
+if __name__ == "__main__":
+    main()
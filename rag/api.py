@@ -0,0 +1,338 @@
+# ============================================================================= #
+# Project: Multimodal RAG Pipeline
+# Develop by: Thiago Piovesan
+# Description: Headless Python API (bulk ingest and batch querying, no Streamlit)
+# Date: 2026-01-08 // YYYY-MM-DD
+# Version: 0.1.0
+# License: MIT
+# ============================================================================= #
+# Libs Importation:
+import os
+import re
+import glob
+import json
+import time
+import tarfile
+import zipfile
+import tempfile
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+from rag.job_queue import JobQueue, ensure_workers, worker_name, JOB_HEARTBEAT_SECONDS, DONE, SKIPPED, FAILED
+from rag.collection_store import DEFAULT_COLLECTION, collection_path
+from rag.source_manifest import file_content_hash
+
+# ============================================================================= #
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz")
+QUERY_WORKERS = int(os.getenv("QUERY_WORKERS", "4"))
+
+_GLOB_CHARS = re.compile(r"[*?\[]")
+_JSON_SUFFIX_RE = re.compile(r"(-output)?\.json$", re.IGNORECASE)
+
+_UNSAFE_NAME_RE = re.compile(r"[^\w.\- ]")
+
+# ============================================================================= #
+def safe_file_name(name: str) -> str:
+    """
+    File name of an upload, without directories or characters unsafe on disk.
+    It is also the source name of the document in the index.
+    """
+    name = _UNSAFE_NAME_RE.sub("_", os.path.basename(name.replace("\\", "/"))).strip(" .")
+    return name or "documento.pdf"
+
+# ============================================================================= #
+def process_pdf(pdf_path: str, source: str | None = None, collection: str | None = None,
+                json_output_path: str | None = None, start_workers: bool = True) -> str:
+    """
+    Adds a PDF to the background ingestion queue (partition -> description ->
+    embeddings -> index) and makes sure a worker is running.
+
+    Args:
+        pdf_path (str): Path of the PDF file.
+        source (str | None): Source name in the index. Defaults to the file name.
+        collection (str | None): Target collection. Defaults to the default collection.
+        json_output_path (str | None): Optional export of the partitioned elements.
+        start_workers (bool): Starts the background workers if none is alive.
+
+    Returns:
+        str: The job id.
+    """
+    options = {"json_output_path": json_output_path} if json_output_path else {}
+    if collection and collection != DEFAULT_COLLECTION:
+        collection_path(collection)     # Valida o nome antes de enfileirar
+        options["collection"] = collection
+
+    job_id = JobQueue().enqueue(pdf_path, source or os.path.basename(pdf_path), **options)
+    if start_workers:
+        ensure_workers()
+    return job_id
+
+# ============================================================================= #
+def _extract_archive(archive_path: str, extract_dir: str) -> list[tuple[str, str]]:
+    # Só PDFs; cada membro vai para um arquivo próprio (sem caminhos vindos do arquivo)
+    target_dir = tempfile.mkdtemp(dir=extract_dir)
+    files = []
+
+    def _target(i, name):
+        return os.path.join(target_dir, f"{i:05d}-{os.path.basename(name)}")
+
+    if archive_path.lower().endswith(".zip"):
+        with zipfile.ZipFile(archive_path) as archive:
+            for i, name in enumerate(archive.namelist()):
+                if name.lower().endswith(".pdf") and not name.startswith("__MACOSX"):
+                    with archive.open(name) as src, open(_target(i, name), "wb") as dst:
+                        dst.write(src.read())
+                    files.append((_target(i, name), name))
+    else:
+        with tarfile.open(archive_path) as archive:
+            for i, member in enumerate(archive.getmembers()):
+                if member.isfile() and member.name.lower().endswith(".pdf"):
+                    with archive.extractfile(member) as src, open(_target(i, member.name), "wb") as dst:
+                        dst.write(src.read())
+                    files.append((_target(i, member.name), member.name))
+    return files
+
+def expand_inputs(paths: list[str], extract_dir: str) -> list[tuple[str, str]]:
+    """
+    Resolves the ingest inputs into (file path, source name) pairs.
+
+    - directories: every PDF inside (recursively);
+    - glob patterns: every match (`**` is recursive);
+    - archives (.zip, .tar, .tar.gz, .tgz): the PDFs inside, extracted to `extract_dir`
+      and named by their path in the archive (as in the Streamlit upload);
+    - PDFs and element JSON exports (`<name>-output.json`).
+
+    Args:
+        paths (list[str]): The inputs.
+        extract_dir (str): Where archives are extracted.
+
+    Returns:
+        list[tuple[str, str]]: (path, source), without repeated sources.
+    """
+    files = []
+    for path in paths:
+        if _GLOB_CHARS.search(path):
+            files.extend(expand_inputs(sorted(glob.glob(path, recursive=True)), extract_dir))
+        elif os.path.isdir(path):
+            pdfs = glob.glob(os.path.join(path, "**", "*.pdf"), recursive=True)
+            files.extend((pdf_path, os.path.basename(pdf_path)) for pdf_path in sorted(pdfs))
+        elif path.lower().endswith(ARCHIVE_SUFFIXES):
+            files.extend(_extract_archive(path, extract_dir))
+        elif path.lower().endswith(".pdf"):
+            files.append((path, os.path.basename(path)))
+        elif path.lower().endswith(".json"):
+            # Mesmo nome de fonte do PDF que gerou o JSON
+            files.append((path, _JSON_SUFFIX_RE.sub(".pdf", os.path.basename(path))))
+        else:
+            print(f"⚠️ Entrada ignorada (não é PDF, JSON, pasta ou arquivo compactado): {path}")
+
+    unique, seen = [], set()
+    for path, source in files:
+        if source not in seen:
+            seen.add(source)
+            unique.append((path, source))
+    return unique
+
+# ============================================================================= #
+class CollectionBusyError(RuntimeError):
+    """
+    The collection is being indexed by the queue workers (see `exclusive_collection`).
+    """
+
+@contextmanager
+def exclusive_collection(collection: str | None = None):
+    """
+    Holds the job queue lock of a collection while this process writes its index, so
+    the background workers never write the same index at the same time.
+    """
+    collection = None if collection == DEFAULT_COLLECTION else collection
+    job_queue, owner = JobQueue(), worker_name()
+    if not job_queue.lock_collection(collection, owner):
+        raise CollectionBusyError(
+            f"A coleção '{collection or DEFAULT_COLLECTION}' está sendo indexada pelos workers da fila. "
+            "Use a fila (--queue) ou aguarde os jobs terminarem."
+        )
+
+    stop = threading.Event()
+
+    def _refresh():
+        refresh_queue = JobQueue()
+        while not stop.wait(JOB_HEARTBEAT_SECONDS):
+            refresh_queue.refresh_collection_lock(collection, owner)
+
+    threading.Thread(target=_refresh, name="collection-lock", daemon=True).start()
+    try:
+        yield
+    finally:
+        stop.set()
+        job_queue.unlock_collection(collection, owner)
+
+# ============================================================================= #
+def ingest(paths: list[str], collection: str | None = None, max_workers: int | None = None,
+           describe_workers: int = 2, on_progress=None) -> list[dict]:
+    """
+    Ingests files in this process, at full throughput (partitioning in a process pool,
+    description and indexing in threads). Already indexed files are skipped. The
+    collection is locked for the whole run (see `exclusive_collection`): it fails if a
+    queue worker is indexing it, and queued jobs of the collection wait until it ends.
+
+    Args:
+        paths (list[str]): Directories, globs, archives, PDFs or element JSON files.
+        collection (str | None): Target collection. Defaults to the default collection.
+        max_workers (int | None): Partitioning processes. Defaults to the CPU count.
+        describe_workers (int): Documents described/indexed at the same time.
+        on_progress (callable | None): Called as `on_progress(done, total, result)`.
+
+    Returns:
+        list[dict]: One result per file, with `arquivo`, `status`, `mensagem` and `segundos`.
+    """
+    index_path = collection_path(collection)
+
+    with exclusive_collection(collection), tempfile.TemporaryDirectory() as extract_dir:
+        files = expand_inputs(paths, extract_dir)
+        pdf_files = [(path, source) for path, source in files if not path.lower().endswith(".json")]
+        json_files = [(path, source) for path, source in files if path.lower().endswith(".json")]
+        total = len(files)
+
+        # Importado aqui: a ingestão carrega unstructured, torch e o modelo de visão
+        from rag.ingestion import ingest_pdfs_parallel
+        from rag.vector_store import vectorize_json
+
+        results = []
+        for path, source in json_files:
+            started = time.time()
+            try:
+                # O manifesto usa o hash do PDF (o mesmo da ingestão de PDFs), se ele estiver ao lado do JSON
+                pdf_path = os.path.join(os.path.dirname(path), os.path.basename(source))
+                content_hash = file_content_hash(pdf_path) if os.path.exists(pdf_path) else None
+                with open(path, "r", encoding="utf-8") as f:
+                    vectorize_json(json.load(f), source, index_path, content_hash)
+                result = {"arquivo": source, "status": "✅ Sucesso", "mensagem": "Elementos JSON indexados"}
+            except Exception as e:
+                result = {"arquivo": source, "status": "❌ Erro", "mensagem": str(e)}
+            result["segundos"] = round(time.time() - started, 2)
+            results.append(result)
+            if on_progress:
+                on_progress(len(results), total, result)
+
+        def _pdf_progress(done, _, result):
+            if on_progress:
+                on_progress(len(json_files) + done, total, result)
+
+        results.extend(ingest_pdfs_parallel(
+            pdf_files, {}, max_workers=max_workers, describe_workers=describe_workers,
+            on_progress=_pdf_progress, collection=collection,
+        ))
+    return results
+
+def enqueue(paths: list[str], collection: str | None = None, wait: bool = False,
+            poll_interval: float = 2.0, on_progress=None) -> list[dict]:
+    """
+    Adds the PDFs to the background job queue instead of ingesting them here
+    (the workers survive this process). Optionally waits for the jobs to finish.
+
+    Args:
+        paths (list[str]): Directories, globs, archives or PDFs.
+        collection (str | None): Target collection. Defaults to the default collection.
+        wait (bool): Blocks until every job is done, skipped or failed.
+        poll_interval (float): Seconds between status checks while waiting.
+        on_progress (callable | None): Called as `on_progress(done, total, job)` when a job ends.
+
+    Returns:
+        list[dict]: The jobs (final state if `wait`).
+    """
+    with tempfile.TemporaryDirectory() as extract_dir:
+        # O PDF é copiado para a pasta do job, então os arquivos extraídos podem ser apagados
+        job_ids = [
+            process_pdf(path, source, collection, start_workers=False)
+            for path, source in expand_inputs(paths, extract_dir)
+            if path.lower().endswith(".pdf")
+        ]
+    if job_ids:
+        ensure_workers()
+
+    job_queue = JobQueue()
+    pending, jobs = list(dict.fromkeys(job_ids)), {}
+    while pending:
+        for job_id in list(pending):
+            job = job_queue.get(job_id)
+            if not wait or job is None or job["status"] in (DONE, SKIPPED, FAILED):
+                jobs[job_id] = job
+                pending.remove(job_id)
+                if wait and on_progress:
+                    on_progress(len(jobs), len(job_ids), job)
+        if pending:
+            time.sleep(poll_interval)
+    return [jobs[job_id] for job_id in dict.fromkeys(job_ids) if jobs[job_id] is not None]
+
+# ============================================================================= #
+def query(question: str, collections: list[str] | None = None) -> str:
+    """
+    Answers one question with the RAG agent (same engine and caches as the chat).
+    """
+    from agents.rag_agent import rag_agent_response
+
+    return rag_agent_response(question, collections, verbose=False)
+
+def read_questions(path: str) -> list[dict]:
+    """
+    Reads a JSONL file of questions. Each line is either a JSON string or an object
+    with `question` (or `query`) and optional `id` and `collections` (a name or a list
+    of names).
+    """
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            record = {"question": record} if isinstance(record, str) else dict(record)
+            record.setdefault("question", record.get("query"))
+            if not record["question"]:
+                raise ValueError(f"{path}:{line_number}: linha sem 'question'.")
+
+            # Um nome solto vira lista; uma string nunca é iterada como coleções de um caractere
+            collections = record.get("collections")
+            if isinstance(collections, str):
+                record["collections"] = [collections]
+            elif collections is not None and not (isinstance(collections, list) and all(isinstance(name, str) for name in collections)):
+                raise ValueError(f"{path}:{line_number}: 'collections' deve ser um nome ou uma lista de nomes.")
+            record.setdefault("id", line_number)
+            records.append(record)
+    return records
+
+def query_batch(records: list[dict], collections: list[str] | None = None,
+                max_workers: int = QUERY_WORKERS, on_result=None):
+    """
+    Answers many questions in parallel. Results are yielded in input order as soon as
+    they are ready, so they can be written out while the batch runs.
+
+    Args:
+        records (list[dict]): Questions (see `read_questions`).
+        collections (list[str] | None): Collections used when a record has none.
+        max_workers (int): Questions answered at the same time.
+        on_result (callable | None): Called as `on_result(done, total, result)`.
+
+    Yields:
+        dict: The record plus `answer`, `seconds` and `error`.
+    """
+    from agents.rag_agent import get_rag_engine
+
+    # Carrega o índice e o agente uma vez, antes das threads
+    get_rag_engine(collections).get_agent()
+
+    def _answer(record):
+        started = time.time()
+        answer, error = None, None
+        try:
+            answer = query(record["question"], record.get("collections") or collections)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        return {**record, "answer": answer, "seconds": round(time.time() - started, 2), "error": error}
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        for done, result in enumerate(executor.map(_answer, records), start=1):
+            if on_result:
+                on_result(done, len(records), result)
+            yield result
@@ -0,0 +1,228 @@
+# ============================================================================= #
+# Project: Multimodal RAG Pipeline
+# Develop by: Thiago Piovesan
+# Description: Layout-aware chunking of partitioned elements
+# Date: 2026-01-08 // YYYY-MM-DD
+# Version: 0.1.0
+# License: MIT
+# ============================================================================= #
+# Libs Importation:
+import os
+import re
+
+from rag.tables import split_table, table_id
+
+# ============================================================================= #
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "256"))   # Janela do MiniLM (textos maiores são truncados)
+MARGIN_RATIO = 0.08                                             # Faixa do topo/rodapé da página onde ficam cabeçalhos
+DROP_TYPES = {"Header", "Footer", "PageNumber"}
+STANDALONE_TYPES = {"Table", "Image"}                           # Nunca são fundidos com texto
+TITLE_BUDGET_RATIO = 0.25                                       # Parte do chunk que os títulos pendentes podem ocupar
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?;:])\s+")
+
+# ============================================================================= #
+def estimate_tokens(text: str) -> int:
+    # Aproximação barata (~4 caracteres por token), suficiente para o orçamento
+    return max(1, len(text) // 4)
+
+def split_text(text: str, max_tokens: int) -> list[str]:
+    """
+    Splits a long text at sentence boundaries (words, as a last resort) into pieces
+    that fit the token budget.
+    """
+    pieces, current = [], ""
+    for sentence in _SENTENCE_RE.split(text):
+        parts = [sentence]
+        if estimate_tokens(sentence) > max_tokens:
+            words, parts, part = sentence.split(), [], ""
+            for word in words:
+                if part and estimate_tokens(f"{part} {word}") > max_tokens:
+                    parts.append(part)
+                    part = word
+                else:
+                    part = f"{part} {word}".strip()
+            parts.append(part)
+
+        for part in parts:
+            if current and estimate_tokens(f"{current} {part}") > max_tokens:
+                pieces.append(current)
+                current = part
+            else:
+                current = f"{current} {part}".strip()
+
+    if current:
+        pieces.append(current)
+    return pieces
+
+# ============================================================================= #
+class LayoutChunker:
+    """
+    Turns a stream of `unstructured` elements (as dicts) into retrieval chunks:
+    - page headers/footers and text repeated in the page margins are dropped;
+    - consecutive text elements under the same Title are merged up to `max_tokens`;
+    - pending titles take at most a quarter of the budget: a run of titles without
+      body (short lines labelled Title) is emitted as its own chunk;
+    - elements larger than the budget are split at sentence boundaries;
+    - tables and images stay as their own chunk; large tables are split into row
+      groups (markdown, header repeated) pointing to the original HTML by `table_id`;
+    - every chunk carries its section title, the Title element id, its page span and
+      the types of the elements merged into it (`element_types`).
+
+    The state (current section, seen margin texts) is kept between `feed` calls, so
+    page batches of the same document can be chunked as they arrive.
+    """
+
+    def __init__(self, max_tokens: int = CHUNK_MAX_TOKENS):
+        self.max_tokens = max_tokens
+        self._section = None
+        self._parent_id = None
+        self._title_budget = max(1, int(max_tokens * TITLE_BUDGET_RATIO))
+        self._titles = []           # (texto, página) dos títulos ainda sem corpo (ex.: "Parte 1" + "Introdução")
+        self._body = []             # (texto, tipo, página) do chunk em construção
+        self._margin_texts = set()  # textos de margem já vistos (normalizados)
+        self._last_page = None
+
+    # ---------------------------------------------------------------------------- #
+    def _is_repeated_margin_text(self, item: dict) -> bool:
+        metadata = item.get("metadata", {})
+        coordinates = metadata.get("coordinates")
+        if not coordinates or not coordinates.get("layout_height"):
+            return False
+
+        ys = [point[1] for point in coordinates["points"]]
+        height = coordinates["layout_height"]
+        if min(ys) > MARGIN_RATIO * height and max(ys) < (1 - MARGIN_RATIO) * height:
+            return False
+
+        # Números (datas, nº de página) variam de uma página para outra
+        key = re.sub(r"\d+", "#", item["text"].strip().lower())
+        if key in self._margin_texts:
+            return True
+        self._margin_texts.add(key)
+        return False
+
+    # ---------------------------------------------------------------------------- #
+    def _chunk(self, text: str, element_type: str, first_page, last_page, **extra) -> dict:
+        return {
+            "type": element_type,
+            "text": text,
+            "metadata": {
+                "page_number": first_page,
+                "page_end": last_page,
+                "section": self._section,
+                "parent_id": self._parent_id,
+                **extra,
+            },
+        }
+
+    def _table_chunks(self, item: dict, text: str, page) -> list[dict]:
+        html = item.get("metadata", {}).get("text_as_html")
+        groups = split_table(html, self.max_tokens * 4) if html else []
+        if not groups:
+            return [self._chunk(text, "Table", page, page)]
+
+        extra = {"table_id": table_id(html), "text_as_html": html}
+        return [
+            self._chunk(f"Table ({i}/{len(groups)}):\n{group}" if len(groups) > 1 else f"Table:\n{group}", "Table", page, page, **extra)
+            for i, group in enumerate(groups, start=1)
+        ]
+
+    def _title_tokens(self) -> int:
+        return sum(estimate_tokens(text) for text, _ in self._titles)
+
+    def _flush_titles(self) -> list[dict]:
+        # Títulos sem corpo que passariam do orçamento viram um chunk próprio
+        if not self._titles:
+            return []
+
+        text = "\n".join(text for text, _ in self._titles)
+        first_page, last_page = self._titles[0][1], self._titles[-1][1]
+        self._titles = []
+        return [
+            self._chunk(piece, "Title", first_page, last_page, element_types=["Title"])
+            for piece in split_text(text, self.max_tokens)
+        ]
+
+    def _flush(self) -> list[dict]:
+        if not self._body:
+            return []
+
+        texts = [text for text, _ in self._titles] + [text for text, _, _ in self._body]
+        types = {element_type for _, element_type, _ in self._body}
+        element_type = self._body[0][1] if len(types) == 1 and len(self._body) == 1 else "CompositeElement"
+        # O tipo de um chunk fundido é 'CompositeElement': os tipos originais ficam para os filtros
+        element_types = sorted(types | ({"Title"} if self._titles else set()))
+        chunk = self._chunk("\n".join(texts), element_type, self._body[0][2], self._body[-1][2], element_types=element_types)
+
+        self._titles, self._body = [], []
+        return [chunk]
+
+    # ---------------------------------------------------------------------------- #
+    def feed(self, elements: list[dict]) -> list[dict]:
+        """
+        Chunks the next batch of elements.
+
+        Args:
+            elements (list[dict]): Elements in reading order (`element.to_dict()` format).
+
+        Returns:
+            list[dict]: The chunks completed so far, in the same dict format.
+        """
+        chunks = []
+        for item in elements:
+            text = (item.get("text") or "").strip()
+            element_type = item.get("type")
+            page = item.get("metadata", {}).get("page_number")
+            if not text or element_type in DROP_TYPES or self._is_repeated_margin_text(item):
+                continue
+            self._last_page = page
+
+            # ---------------------------------------------------------------------------- #
+            if element_type == "Title":
+                chunks.extend(self._flush())
+                if self._titles and self._title_tokens() + estimate_tokens(text) > self._title_budget:
+                    chunks.extend(self._flush_titles())
+                self._section = text
+                self._parent_id = item.get("element_id")
+                self._titles.append((text, page))
+                if self._title_tokens() > self._title_budget:
+                    chunks.extend(self._flush_titles())
+
+            elif element_type == "Table":
+                chunks.extend(self._flush())
+                chunks.extend(self._table_chunks(item, text, page))
+
+            elif element_type in STANDALONE_TYPES:
+                chunks.extend(self._flush())
+                chunks.append(self._chunk(text, element_type, page, page))
+
+            else:
+                # O primeiro chunk também leva os títulos pendentes
+                budget = self.max_tokens - self._title_tokens()
+                pieces = split_text(text, budget) if estimate_tokens(text) > budget else [text]
+                for piece in pieces:
+                    used = self._title_tokens() + sum(estimate_tokens(t) for t, _, _ in self._body)
+                    if self._body and used + estimate_tokens(piece) > self.max_tokens:
+                        chunks.extend(self._flush())
+                    self._body.append((piece, element_type, page))
+
+        return chunks
+
+    def flush(self) -> list[dict]:
+        """
+        Returns the last, unfinished chunk (call once at the end of the document).
+        """
+        if not self._body and self._titles:
+            # Título sem corpo no fim do documento: vira um chunk próprio
+            text, page = self._titles.pop()
+            self._body = [(text, "Title", page)]
+        return self._flush()
+
+# ============================================================================= #
+def chunk_elements(json_data: list, max_tokens: int = CHUNK_MAX_TOKENS) -> list[dict]:
+    """
+    Chunks the elements of a whole document (see `LayoutChunker`).
+    """
+    chunker = LayoutChunker(max_tokens)
+    return chunker.feed(json_data) + chunker.flush()
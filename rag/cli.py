@@ -0,0 +1,156 @@
+# ============================================================================= #
+# Project: Multimodal RAG Pipeline
+# Develop by: Thiago Piovesan
+# Description: Headless command line (bulk ingest, questions and batch querying)
+# Date: 2026-01-08 // YYYY-MM-DD
+# Version: 0.1.0
+# License: MIT
+# ============================================================================= #
+# Libs Importation:
+import os
+import sys
+import json
+import argparse
+from contextlib import contextmanager, redirect_stdout
+
+from dotenv import load_dotenv
+
+from rag import api
+from rag.collection_store import list_collections
+
+# ============================================================================= #
+@contextmanager
+def results_stdout():
+    """
+    Keeps stdout for the results of the command: while it runs, everything else written
+    to stdout (library messages, worker processes, native code) goes to stderr, so the
+    output can be piped (e.g. the JSONL of `batch`).
+
+    Yields:
+        The stream the results must be written to (the original stdout).
+    """
+    original = sys.stdout
+    original.flush()
+    try:
+        # No nível do descritor: vale também para processos filhos e bibliotecas nativas
+        saved_fd = os.dup(1)
+        os.dup2(2, 1)
+    except OSError:
+        saved_fd = None
+
+    try:
+        uses_fd = saved_fd is not None and original.fileno() == 1
+    except (AttributeError, OSError, ValueError):
+        uses_fd = False     # stdout sem descritor (ex.: notebooks, testes)
+    results = os.fdopen(os.dup(saved_fd), "w", encoding="utf-8", buffering=1) if uses_fd else original
+
+    try:
+        with redirect_stdout(sys.stderr):
+            yield results
+    finally:
+        results.flush()
+        if results is not original:
+            results.close()
+        if saved_fd is not None:
+            os.dup2(saved_fd, 1)
+            os.close(saved_fd)
+
+# ============================================================================= #
+def cmd_ingest(args) -> int:
+    with results_stdout() as out:
+        def _ingest_progress(done, total, result):
+            print(f"[{done}/{total}] {result['status']} {result['arquivo']} ({result['segundos']}s) {result['mensagem'] or ''}", file=out, flush=True)
+
+        def _job_progress(done, total, job):
+            print(f"[{done}/{total}] {job['status']:<8} {job['source']}  {job['message'] or ''}", file=out, flush=True)
+
+        if args.queue:
+            jobs = api.enqueue(args.paths, args.collection, wait=args.wait, on_progress=_job_progress)
+            if not args.wait:
+                for job in jobs:
+                    print(f"📥 {job['id']}: {job['source']}", file=out)
+            return int(any(job["status"] == api.FAILED for job in jobs))
+
+        try:
+            results = api.ingest(
+                args.paths, args.collection, max_workers=args.workers,
+                describe_workers=args.describe_workers, on_progress=_ingest_progress,
+            )
+        except api.CollectionBusyError as e:
+            print(f"❌ {e}", file=sys.stderr)
+            return 1
+        failed = sum(result["status"].startswith("❌") for result in results)
+        print(f"✅ {len(results) - failed} arquivos processados, ❌ {failed} com erro.", file=out)
+        return int(bool(failed))
+
+def cmd_ask(args) -> int:
+    with results_stdout() as out:
+        print(api.query(args.question, args.collection), file=out)
+    return 0
+
+def cmd_batch(args) -> int:
+    records = api.read_questions(args.input)
+
+    def _progress(done, total, result):
+        status = "❌" if result["error"] else "✅"
+        print(f"[{done}/{total}] {status} {result['id']} ({result['seconds']}s)", file=sys.stderr, flush=True)
+
+    failed = 0
+    # Sem -o, o stdout fica só com o JSONL (mensagens da biblioteca vão para o stderr)
+    with open(args.output, "w", encoding="utf-8") if args.output else results_stdout() as out:
+        for result in api.query_batch(records, args.collection, max_workers=args.workers, on_result=_progress):
+            failed += bool(result["error"])
+            out.write(json.dumps(result, ensure_ascii=False, default=str) + "\n")
+            out.flush()
+
+    print(f"✅ {len(records) - failed} respostas, ❌ {failed} com erro.", file=sys.stderr)
+    return int(bool(failed))
+
+def cmd_collections(args) -> int:
+    for name in list_collections():
+        print(name)
+    return 0
+
+# ============================================================================= #
+def main(argv: list[str] | None = None) -> None:
+    """
+    Headless entry point (`multimodal-rag` console script or `python -m rag.cli`):
+        multimodal-rag ingest data/ reports/*.pdf lote.zip --collection financeiro --workers 8
+        multimodal-rag ingest data/ --queue --wait
+        multimodal-rag ask "Qual é o assunto principal do documento?"
+        multimodal-rag batch perguntas.jsonl -o respostas.jsonl --workers 8
+    """
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(prog="multimodal-rag", description="Pipeline RAG multimodal sem interface (ingestão e consultas).")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    ingest = subparsers.add_parser("ingest", help="Ingere pastas, globs, arquivos compactados, PDFs ou JSONs de elementos.")
+    ingest.add_argument("paths", nargs="+")
+    ingest.add_argument("--collection", default=None, help="Coleção de destino (padrão: default).")
+    ingest.add_argument("--workers", type=int, default=None, help="Processos de partição (padrão: nº de CPUs).")
+    ingest.add_argument("--describe-workers", type=int, default=2, help="Documentos descritos/indexados ao mesmo tempo.")
+    ingest.add_argument("--queue", action="store_true", help="Envia para a fila dos workers em segundo plano.")
+    ingest.add_argument("--wait", action="store_true", help="Com --queue: aguarda os jobs terminarem.")
+    ingest.set_defaults(handler=cmd_ingest)
+
+    ask = subparsers.add_parser("ask", help="Responde uma pergunta.")
+    ask.add_argument("question")
+    ask.add_argument("--collection", action="append", default=None, help="Coleção consultada (pode repetir).")
+    ask.set_defaults(handler=cmd_ask)
+
+    batch = subparsers.add_parser("batch", help="Responde as perguntas de um arquivo JSONL.")
+    batch.add_argument("input", help="JSONL com 'question' (ou 'query') e, opcionalmente, 'id' e 'collections'.")
+    batch.add_argument("-o", "--output", default=None, help="JSONL de saída (padrão: stdout).")
+    batch.add_argument("--collection", action="append", default=None, help="Coleção consultada (pode repetir).")
+    batch.add_argument("--workers", type=int, default=api.QUERY_WORKERS, help="Perguntas respondidas em paralelo.")
+    batch.set_defaults(handler=cmd_batch)
+
+    collections = subparsers.add_parser("collections", help="Lista as coleções.")
+    collections.set_defaults(handler=cmd_collections)
+
+    args = parser.parse_args(argv)
+    sys.exit(args.handler(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+# ============================================================================= #
+# Project: Multimodal RAG Pipeline
+# Develop by: Thiago Piovesan
+# Description: Named collections (one index per collection) and fan-out search
+# Date: 2026-01-08 // YYYY-MM-DD
+# Version: 0.1.0
+# License: MIT
+# ============================================================================= #
+# Libs Importation:
+import os
+import re
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.documents import Document
+from rag.metadata_index import MetadataFilter
+from rag.sharded_store import ShardedVectorStore, MANIFEST_FILE, LEGACY_FILES
+from rag.vector_store import INDEX_PATH, load_vector_store, get_index_generation, get_embeddings
+from rag.telemetry import get_telemetry
+
+# ============================================================================= #
+DEFAULT_COLLECTION = "default"                                      # Índice original (INDEX_PATH)
+COLLECTIONS_DIR = os.getenv("COLLECTIONS_DIR", "rag/collections")   # Uma pasta de índice por coleção
+COLLECTION_SEARCH_WORKERS = int(os.getenv("COLLECTION_SEARCH_WORKERS", "8"))
+
+_NAME_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_-]{0,63}$")
+
+# ============================================================================= #
+def collection_path(name: str | None = None) -> str:
+    """
+    Returns the index directory of a collection. The default collection keeps the
+    original index path, so existing indexes need no migration.
+
+    Args:
+        name (str | None): Collection name (letters, digits, "_" and "-"). None means the default one.
+
+    Returns:
+        str: The index directory.
+    """
+    name = name or DEFAULT_COLLECTION
+    if name == DEFAULT_COLLECTION:
+        return INDEX_PATH
+    if not _NAME_RE.match(name):
+        raise ValueError(f"Nome de coleção inválido: '{name}'. Use letras, números, '_' ou '-'.")
+    return os.path.join(COLLECTIONS_DIR, name)
+
+def _has_index(path: str) -> bool:
+    return any(os.path.exists(os.path.join(path, file_name)) for file_name in (MANIFEST_FILE, *LEGACY_FILES))
+
+def list_collections() -> list[str]:
+    """
+    Lists the collections that have an index on disk (the default one always comes first).
+    """
+    names = [DEFAULT_COLLECTION]
+    if os.path.isdir(COLLECTIONS_DIR):
+        names.extend(sorted(
+            name for name in os.listdir(COLLECTIONS_DIR)
+            if _NAME_RE.match(name) and name != DEFAULT_COLLECTION and _has_index(os.path.join(COLLECTIONS_DIR, name))
+        ))
+    return names
+
+def delete_collection(name: str) -> None:
+    """
+    Deletes a whole collection (index, docstores, tables and source manifest).
+    """
+    if name == DEFAULT_COLLECTION:
+        raise ValueError("A coleção padrão não pode ser apagada.")
+
+    path = collection_path(name)
+    with _stores_lock:
+        _stores.pop(path, None)
+    shutil.rmtree(path, ignore_errors=True)
+    print(f"🗑️ Coleção '{name}' apagada.")
+
+# ============================================================================= #
+_stores = {}
+_stores_lock = threading.Lock()
+
+def open_collection(name: str | None = None) -> ShardedVectorStore:
+    """
+    Returns the loaded store of a collection, opened once per process and shared by
+    every engine that searches it.
+    """
+    path = collection_path(name)
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = load_vector_store(path)
+        return store
+
+# ============================================================================= #
+class CollectionSearcher:
+    """
+    Searches a set of collections as one: the query is embedded once, every collection
+    runs its hybrid search in parallel and the results are merged by RRF score.
+    Only the requested collections are loaded.
+
+    It exposes the part of the `ShardedVectorStore` interface used by the retriever
+    tool and the RAG engine (`embeddings`, `generation`, `hybrid_search`, `vectors_by_id`, `refresh`).
+    """
+
+    def __init__(self, names: list[str] | tuple[str, ...] | None = None, stores: dict | None = None):
+        self.names = tuple(names or (DEFAULT_COLLECTION,))
+        self.stores = stores or {name: open_collection(name) for name in self.names}
+        self.embeddings = next(iter(self.stores.values())).embeddings if self.stores else get_embeddings()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, min(COLLECTION_SEARCH_WORKERS, len(self.stores))))
+
+    # ---------------------------------------------------------------------------- #
+    @property
+    def generation(self) -> tuple:
+        return tuple(store.generation for store in self.stores.values())
+
+    @property
+    def ntotal(self) -> int:
+        return sum(store.ntotal for store in self.stores.values())
+
+    def index_generation(self) -> tuple:
+        # Impressão digital de todas as coleções no disco (muda após qualquer commit)
+        return tuple(get_index_generation(store.index_path) for store in self.stores.values())
+
+    def refresh(self) -> bool:
+        return any([store.refresh() for store in self.stores.values()])
+
+    # ---------------------------------------------------------------------------- #
+    def hybrid_search_with_score(self, query: str, k: int = 4,
+                                 metadata_filter: MetadataFilter | None = None) -> list[tuple[Document, float]]:
+        """
+        Fan-out hybrid search over every collection, merged into one top-k.
+
+        Args:
+            query (str): The query text.
+            k (int): Number of documents to return.
+            metadata_filter (MetadataFilter | None): Restricts the hits of every collection.
+
+        Returns:
+            list[tuple[Document, float]]: The merged top-k, with `metadata["collection"]` set.
+        """
+        # Embeda uma vez: as outras coleções reaproveitam o vetor (cache de consultas)
+        self.embeddings.embed_query(query)
+
+        def _search(item):
+            name, store = item
+            with get_telemetry().span("collection_search", collection=name):
+                return name, store.hybrid_search_with_score(query, k=k, metadata_filter=metadata_filter)
+
+        items = list(self.stores.items())
+        results = [_search(items[0])] if len(items) == 1 else list(self._executor.map(_search, items))
+
+        merged = []
+        for name, hits in results:
+            for doc, score in hits:
+                doc.metadata["collection"] = name
+                merged.append((doc, score))
+        merged.sort(key=lambda hit: hit[1], reverse=True)
+        return merged[:k]
+
+    def hybrid_search(self, query: str, k: int = 4, metadata_filter: MetadataFilter | None = None) -> list[Document]:
+        return [doc for doc, _ in self.hybrid_search_with_score(query, k, metadata_filter)]
+
+    def vectors_by_id(self, doc_ids: list[str]) -> dict:
+        vectors = {}
+        for store in self.stores.values():
+            vectors.update(store.vectors_by_id([doc_id for doc_id in doc_ids if doc_id not in vectors]))
+        return vectors
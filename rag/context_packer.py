@@ -0,0 +1,190 @@
+# ============================================================================= #
+# Project: Multimodal RAG Pipeline
+# Develop by: Thiago Piovesan
+# Description: Token-budgeted context assembly (dedup, MMR, truncation, citations)
+# Date: 2026-01-08 // YYYY-MM-DD
+# Version: 0.1.0
+# License: MIT
+# ============================================================================= #
+# Libs Importation:
+import os
+import re
+
+import numpy as np
+from langchain_core.documents import Document
+
+from rag.chunking import estimate_tokens, split_text
+from rag.telemetry import get_telemetry
+
+# ============================================================================= #
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1200"))               # Tokens do resultado da busca
+CONTEXT_FETCH_K = int(os.getenv("CONTEXT_FETCH_K", "20"))                           # Candidatos antes da seleção
+CONTEXT_MAX_CHUNKS = int(os.getenv("CONTEXT_MAX_CHUNKS", "8"))
+CONTEXT_CHUNK_TOKENS = int(os.getenv("CONTEXT_CHUNK_TOKENS", "400"))               # Nenhum trecho ocupa mais que isso
+CONTEXT_MMR_LAMBDA = float(os.getenv("CONTEXT_MMR_LAMBDA", "0.7"))                  # 1 = só relevância, 0 = só diversidade
+CONTEXT_DUPLICATE_THRESHOLD = float(os.getenv("CONTEXT_DUPLICATE_THRESHOLD", "0.95"))  # Cosseno acima disso = quase duplicado
+CONTEXT_MIN_CHUNK_TOKENS = 40                                                       # Sobra menor que isso não vale um trecho truncado
+
+_SPACES_RE = re.compile(r"\s+")
+
+# ============================================================================= #
+def citation(doc: Document) -> str:
+    """
+    Formats the citation header of a chunk: source, page span, element type,
+    collection and table id (when present).
+    """
+    metadata = doc.metadata
+    page, page_end = metadata.get("page"), metadata.get("page_end")
+    if page is None:
+        pages = "Page ?"
+    elif page_end is not None and page_end != page:
+        pages = f"Pages {page}-{page_end}"
+    else:
+        pages = f"Page {page}"
+
+    header = f"Source: {metadata.get('source', 'Unknown')} ({pages}, {metadata.get('type', 'Text')})"
+    if metadata.get("collection"):
+        header += f" [collection: {metadata['collection']}]"
+    if metadata.get("table_id"):
+        header += f" [table_id: {metadata['table_id']}]"
+    return header
+
+# ============================================================================= #
+def truncate_table(text: str, max_tokens: int) -> str:
+    """
+    Keeps the title, header and separator lines of a markdown table and as many rows
+    as fit; the omitted rows are counted (the full table is available via `get_table`).
+    """
+    lines = text.split("\n")
+    # Título ("Table:"), cabeçalho e separador ficam sempre; sobra espaço para a linha de omitidas
+    head = next((i for i, line in enumerate(lines) if line.startswith("| ---")), 1) + 1
+    omitted_line = f"| … {len(lines)} linhas omitidas |"
+    kept = lines[:head]
+    for line in lines[head:]:
+        if estimate_tokens("\n".join(kept + [line, omitted_line])) > max_tokens:
+            break
+        kept.append(line)
+
+    omitted = len(lines) - len(kept)
+    if omitted:
+        kept.append(f"| … {omitted} linhas omitidas |")
+    return "\n".join(kept)
+
+def truncate_text(text: str, max_tokens: int) -> str:
+    """
+    Cuts a text (narrative or image description) at a sentence boundary.
+    """
+    pieces = split_text(text, max(1, max_tokens - estimate_tokens(" […]")))
+    return pieces[0] + (" […]" if len(pieces) > 1 else "")
+
+def truncate_document(doc: Document, max_tokens: int) -> str:
+    if estimate_tokens(doc.page_content) <= max_tokens:
+        return doc.page_content
+    if doc.metadata.get("type") == "Table":
+        return truncate_table(doc.page_content, max_tokens)
+    return truncate_text(doc.page_content, max_tokens)
+
+# ============================================================================= #
+def select_diverse(query_vector, vectors, relevance, k: int, lambda_mult: float = CONTEXT_MMR_LAMBDA,
+                   duplicate_threshold: float = CONTEXT_DUPLICATE_THRESHOLD) -> list[int]:
+    """
+    Maximal Marginal Relevance over the candidates, dropping near-duplicates.
+
+    Args:
+        query_vector (list[float]): The query embedding.
+        vectors (list[list[float]]): One embedding per candidate.
+        relevance (list[float]): Retrieval score of each candidate (higher is better).
+        k (int): Maximum number of candidates to select.
+        lambda_mult (float): Trade-off between relevance (1) and diversity (0).
+        duplicate_threshold (float): Candidates this similar to a selected one are dropped.
+
+    Returns:
+        list[int]: Indexes of the selected candidates, in selection order.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if not len(vectors):
+        return []
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True).clip(min=1e-12)
+    query_vector = np.asarray(query_vector, dtype=np.float32)
+    query_vector /= max(float(np.linalg.norm(query_vector)), 1e-12)
+
+    # Relevância: score da busca híbrida (RRF) normalizado, com a similaridade densa como desempate
+    relevance = np.asarray(relevance, dtype=np.float32)
+    relevance = relevance / max(float(relevance.max()), 1e-12) + 1e-3 * (vectors @ query_vector)
+
+    similarity = vectors @ vectors.T
+    selected, max_similarity = [], np.zeros(len(vectors), dtype=np.float32)
+    available = np.ones(len(vectors), dtype=bool)
+    while len(selected) < k and available.any():
+        scores = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        max_similarity = np.maximum(max_similarity, similarity[best])
+        available &= max_similarity < duplicate_threshold
+    return selected
+
+# ============================================================================= #
+def pack_context(query: str, hits: list[tuple[Document, float]], embeddings,
+                 token_budget: int = CONTEXT_TOKEN_BUDGET, max_chunks: int = CONTEXT_MAX_CHUNKS,
+                 chunk_tokens: int = CONTEXT_CHUNK_TOKENS, vectors: dict | None = None) -> tuple[str, list[Document]]:
+    """
+    Turns the over-fetched hits of a search into the context given to the LLM:
+    exact and near-duplicates are dropped, MMR picks relevant but diverse chunks and
+    they are packed, with citations, until the token budget is used. Chunks longer than
+    `chunk_tokens` or than the budget left are truncated by type (table rows, sentences).
+
+    Args:
+        query (str): The query text.
+        hits (list[tuple[Document, float]]): (document, retrieval score), best first.
+        embeddings: Embedding model (query vector, and hits without a stored vector).
+        token_budget (int): Maximum tokens of the packed context.
+        max_chunks (int): Maximum number of chunks.
+        chunk_tokens (int): Maximum tokens of a single chunk.
+        vectors (dict | None): Stored vectors of the hits by document id (see
+            `ShardedVectorStore.vectors_by_id`); only the missing ones are embedded.
+
+    Returns:
+        tuple[str, list[Document]]: The serialized context and the packed documents.
+    """
+    telemetry = get_telemetry()
+    with telemetry.span("context_pack", candidates=len(hits)) as span:
+        # 1. Duplicados exatos (mesmo texto em shards ou coleções diferentes)
+        unique, seen = [], set()
+        for doc, score in hits:
+            key = _SPACES_RE.sub(" ", doc.page_content).strip().lower()
+            if key not in seen:
+                seen.add(key)
+                unique.append((doc, score))
+
+        # 2. Quase duplicados + MMR (vetores guardados nos shards; só os que faltam são embedados)
+        order = list(range(len(unique)))
+        if len(unique) > 1:
+            vectors = vectors or {}
+            missing = [doc.page_content for doc, _ in unique if doc.id not in vectors]
+            embedded = iter(embeddings.embed_documents(missing) if missing else ())
+            span["embedded"] = len(missing)
+            order = select_diverse(
+                embeddings.embed_query(query),
+                [vectors[doc.id] if doc.id in vectors else next(embedded) for doc, _ in unique],
+                [score for _, score in unique],
+                k=max_chunks,
+            )
+
+        # 3. Empacota até o orçamento de tokens (separador e arredondamento da estimativa incluídos)
+        blocks, packed, used = [], [], 0
+        for i in order[:max_chunks]:
+            doc = unique[i][0]
+            header = f"[{len(packed) + 1}] {citation(doc)}\nContent: "
+            remaining = min(token_budget - used - estimate_tokens(header) - 2, chunk_tokens)
+            if remaining < CONTEXT_MIN_CHUNK_TOKENS and estimate_tokens(doc.page_content) > remaining:
+                continue
+            content = truncate_document(doc, remaining)
+            blocks.append(header + content)
+            packed.append(doc)
+            used = estimate_tokens("\n\n".join(blocks))
+
+        span.update(packed=len(packed), tokens=used)
+    telemetry.incr("context_tokens_total", used)
+    return "\n\n".join(blocks), packed
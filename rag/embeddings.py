@@ -0,0 +1,212 @@
+# ============================================================================= #
+# Project: Multimodal RAG Pipeline
+# Develop by: Thiago Piovesan
+# Description: Cached and batched embeddings
+# Date: 2026-01-08 // YYYY-MM-DD
+# Version: 0.1.0
+# License: MIT
+# ============================================================================= #
+# Libs Importation:
+import os
+import re
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from rag.telemetry import get_telemetry
+
+# ============================================================================= #
+EMBEDDING_CACHE_DIR = "data/cache/embeddings"
+
+# ============================================================================= #
+class EmbeddingCache:
+    """
+    Persistent embedding cache for one model. Vectors are appended as float32 rows
+    to a flat array file (`vectors.f32`) and a SQLite table maps the text hash to
+    its row. Writers are serialised by a SQLite write transaction, so several
+    processes can share the cache.
+    """
+
+    def __init__(self, model_name: str, cache_dir: str = EMBEDDING_CACHE_DIR):
+        self.model_name = model_name
+        self.directory = os.path.join(cache_dir, re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name))
+        os.makedirs(self.directory, exist_ok=True)
+
+        self.vectors_path = os.path.join(self.directory, "vectors.f32")
+        self.db_path = os.path.join(self.directory, "keys.sqlite")
+        self._local = threading.local()
+
+        conn = self._connect()
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        conn.execute("CREATE TABLE IF NOT EXISTS vectors (hash TEXT PRIMARY KEY, row INTEGER NOT NULL)")
+
+        row = conn.execute("SELECT value FROM meta WHERE key = 'dim'").fetchone()
+        self.dim = int(row[0]) if row else None
+
+    # ---------------------------------------------------------------------------- #
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=60, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    # ---------------------------------------------------------------------------- #
+    def text_hash(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    # ---------------------------------------------------------------------------- #
+    def get_many(self, hashes: list[str]) -> dict:
+        """
+        Looks up several text hashes at once.
+
+        Args:
+            hashes (list[str]): Hashes built with `text_hash`.
+
+        Returns:
+            dict: hash -> float32 vector, only for the hashes found.
+        """
+        if not hashes or self.dim is None:
+            return {}
+
+        conn = self._connect()
+        rows = {}
+        # SQLite limita o número de parâmetros por consulta
+        for start in range(0, len(hashes), 500):
+            chunk = hashes[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows.update(conn.execute(
+                f"SELECT hash, row FROM vectors WHERE hash IN ({placeholders})", chunk
+            ).fetchall())
+
+        if not rows:
+            return {}
+
+        matrix = np.memmap(self.vectors_path, dtype=np.float32, mode="r").reshape(-1, self.dim)
+        return {key: np.array(matrix[row]) for key, row in rows.items() if row < len(matrix)}
+
+    # ---------------------------------------------------------------------------- #
+    def put_many(self, items: dict) -> None:
+        """
+        Appends new vectors to the array file and records their rows.
+
+        Args:
+            items (dict): hash -> vector.
+        """
+        if not items:
+            return
+
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")     # Trava de escrita entre processos
+        try:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'dim'").fetchone()
+            if row is None:
+                self.dim = len(next(iter(items.values())))
+                conn.execute("INSERT INTO meta VALUES ('dim', ?)", (str(self.dim),))
+            else:
+                self.dim = int(row[0])
+
+            new_items = {key: vector for key, vector in items.items()
+                         if conn.execute("SELECT 1 FROM vectors WHERE hash = ?", (key,)).fetchone() is None}
+            if new_items:
+                # A próxima linha vem do SQLite (linhas confirmadas), nunca do tamanho do arquivo:
+                # uma escrita interrompida deixa bytes a mais, que são cortados antes de anexar
+                row_size = self.dim * 4
+                first_row = conn.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM vectors").fetchone()[0]
+                complete_rows = os.path.getsize(self.vectors_path) // row_size if os.path.exists(self.vectors_path) else 0
+                if complete_rows < first_row:
+                    # Arquivo menor que o registrado: as linhas perdidas deixam de ser hits
+                    conn.execute("DELETE FROM vectors WHERE row >= ?", (complete_rows,))
+                    first_row = complete_rows
+
+                with open(self.vectors_path, "r+b" if os.path.exists(self.vectors_path) else "wb") as f:
+                    f.truncate(first_row * row_size)
+                    f.seek(first_row * row_size)
+                    f.write(np.asarray(list(new_items.values()), dtype=np.float32).tobytes())
+
+                conn.executemany(
+                    "INSERT INTO vectors VALUES (?, ?)",
+                    [(key, first_row + offset) for offset, key in enumerate(new_items)],
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+# ============================================================================= #
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper used for both ingestion and queries:
+    - documents: looks up the persistent cache, embeds only the misses in batches of `batch_size`;
+    - queries: keeps the hottest query vectors in an in-memory LRU.
+    """
+
+    def __init__(self, embeddings: Embeddings, model_name: str, batch_size: int = 64,
+                 query_cache_size: int = 1024, cache: EmbeddingCache | None = None):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.query_cache_size = query_cache_size
+        self.cache = cache or EmbeddingCache(model_name)
+
+        self.hits = 0
+        self.misses = 0
+        self._queries = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ---------------------------------------------------------------------------- #
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        hashes = [self.cache.text_hash(text) for text in texts]
+        found = self.cache.get_many(list(set(hashes)))
+
+        # Textos repetidos (ex.: cabeçalhos de página) são embedados uma única vez
+        missing = {}
+        for key, text in zip(hashes, texts):
+            if key not in found:
+                missing.setdefault(key, text)
+
+        hits = len(texts) - sum(1 for key in hashes if key not in found)
+        with self._lock:
+            self.hits += hits
+            self.misses += len(missing)
+
+        telemetry = get_telemetry()
+        telemetry.incr("cache_lookups_total", hits, cache="embedding", result="hit")
+        telemetry.incr("cache_lookups_total", len(missing), cache="embedding", result="miss")
+
+        # ---------------------------------------------------------------------------- #
+        keys = list(missing)
+        for start in range(0, len(keys), self.batch_size):
+            batch_keys = keys[start:start + self.batch_size]
+            with telemetry.span("embed_batch", texts=len(batch_keys)):
+                vectors = self.embeddings.embed_documents([missing[key] for key in batch_keys])
+            new_items = {key: np.asarray(vector, dtype=np.float32) for key, vector in zip(batch_keys, vectors)}
+            self.cache.put_many(new_items)
+            found.update(new_items)
+
+        return [found[key].tolist() for key in hashes]
+
+    # ---------------------------------------------------------------------------- #
+    def embed_query(self, text: str) -> list[float]:
+        with self._lock:
+            if text in self._queries:
+                self._queries.move_to_end(text)
+                return self._queries[text]
+
+        with get_telemetry().span("embed_query"):
+            vector = self.embeddings.embed_query(text)
+
+        with self._lock:
+            self._queries[text] = vector
+            if len(self._queries) > self.query_cache_size:
+                self._queries.popitem(last=False)
+
+        return vector
+
+    # ---------------------------------------------------------------------------- #
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "cached_queries": len(self._queries)}
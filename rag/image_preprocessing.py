@@ -0,0 +1,130 @@
+# ============================================================================= #
+# Project: Multimodal RAG Pipeline
+# Develop by: Thiago Piovesan
+# Description: Image preprocessing before the vision model
+# Date: 2026-01-08 // YYYY-MM-DD
+# Version: 0.1.0
+# License: MIT
+# ============================================================================= #
+# Libs Importation:
+import io
+import os
+import base64
+import hashlib
+import threading
+from dataclasses import dataclass
+
+from PIL import Image, ImageStat
+
+# ============================================================================= #
+IMAGE_MAX_SIDE = int(os.getenv("IMAGE_MAX_SIDE", "1024"))           # Lado maior enviado ao modelo de visão (px)
+IMAGE_JPEG_QUALITY = int(os.getenv("IMAGE_JPEG_QUALITY", "85"))
+IMAGE_MIN_SIDE = int(os.getenv("IMAGE_MIN_SIDE", "48"))             # Recortes menores são ignorados (ícones, ruído)
+IMAGE_MIN_STDDEV = float(os.getenv("IMAGE_MIN_STDDEV", "4.0"))      # Abaixo disso a imagem é considerada em branco
+PHASH_MAX_DISTANCE = int(os.getenv("PHASH_MAX_DISTANCE", "6"))      # Bits diferentes (de 64) para ser "quase duplicada"
+
+# ============================================================================= #
+@dataclass
+class PreparedImage:
+    image_hash: str     # md5 do arquivo original (chave do cache de descrições)
+    phash: int          # hash perceptual (dHash de 64 bits)
+    b64: str            # JPEG reduzido em base64
+    size: tuple         # (largura, altura) original
+
+# ============================================================================= #
+def difference_hash(image: Image.Image) -> int:
+    """
+    64-bit difference hash: compares neighbouring pixels of a 9x8 grayscale thumbnail.
+    Resized, re-encoded or slightly cropped copies of an image get close hashes.
+    """
+    pixels = list(image.convert("L").resize((9, 8), Image.Resampling.LANCZOS).getdata())
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            bits = (bits << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return bits
+
+def hamming_distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+# ============================================================================= #
+def prepare_image(image_path: str, max_side: int = IMAGE_MAX_SIDE, quality: int = IMAGE_JPEG_QUALITY,
+                  min_side: int = IMAGE_MIN_SIDE, min_stddev: float = IMAGE_MIN_STDDEV) -> PreparedImage | None:
+    """
+    Reads an image once, hashes it, filters out tiny or blank crops and re-encodes it
+    as a downscaled JPEG for the vision model.
+
+    Args:
+        image_path (str): Path of the cropped image.
+        max_side (int): Longest side of the encoded image.
+        quality (int): JPEG quality.
+        min_side (int): Images with a smaller side are skipped.
+        min_stddev (float): Images with a lower grayscale standard deviation are skipped.
+
+    Returns:
+        PreparedImage | None: The prepared image, or None if it should not be described.
+    """
+    with open(image_path, "rb") as f:
+        data = f.read()
+
+    with Image.open(io.BytesIO(data)) as img:
+        if min(img.size) < min_side:
+            return None
+
+        img = img.convert("RGB")
+        # Desvio padrão calculado numa miniatura (barato mesmo para imagens grandes)
+        if max(ImageStat.Stat(img.convert("L").resize((64, 64))).stddev) < min_stddev:
+            return None
+
+        phash = difference_hash(img)
+        size = img.size
+        img.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+
+        buffered = io.BytesIO()
+        img.save(buffered, format="JPEG", quality=quality, optimize=True)
+
+    return PreparedImage(
+        image_hash=hashlib.md5(data).hexdigest(),
+        phash=phash,
+        b64=base64.b64encode(buffered.getvalue()).decode(),
+        size=size,
+    )
+
+# ============================================================================= #
+class NearDuplicateIndex:
+    """
+    Process-wide map of perceptual hash -> image hash of the images already described
+    (or being described), so near-identical crops reuse one description.
+    """
+
+    def __init__(self, max_distance: int = PHASH_MAX_DISTANCE, max_entries: int = 100_000):
+        self.max_distance = max_distance
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def add(self, phash: int, image_hash: str) -> None:
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries.pop(next(iter(self._entries)))
+            self._entries.setdefault(phash, image_hash)
+
+    def find(self, phash: int) -> str | None:
+        """
+        Returns the image hash of the closest known image within `max_distance`, if any.
+        """
+        with self._lock:
+            if phash in self._entries:
+                return self._entries[phash]
+            best, best_distance = None, self.max_distance + 1
+            for known, image_hash in self._entries.items():
+                distance = hamming_distance(phash, known)
+                if distance < best_distance:
+                    best, best_distance = image_hash, distance
+            return best
+
+# ============================================================================= #
+_near_duplicates = NearDuplicateIndex()
+
+def get_near_duplicate_index() -> NearDuplicateIndex:
+    return _near_duplicates
@@ -0,0 +1,662 @@
+# ============================================================================= #
+# Project: Multimodal RAG Pipeline
+# Develop by: Thiago Piovesan
+# Description: Document Ingestion Pipeline
+# Date: 2026-01-08 // YYYY-MM-DD
+# Version: 0.1.0
+# License: MIT
+# ============================================================================= #
+# Libs Importation:
+import os
+import sys
+import json
+import time
+import queue
+import hashlib
+import tempfile
+import threading
+from contextlib import nullcontext
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from rag.chunking import LayoutChunker
+from rag.page_scan import scan_pdf, page_runs
+from rag.tables import parse_html_table, table_to_markdown, save_tables, document_table_ids
+from rag.image_preprocessing import prepare_image, get_near_duplicate_index
+from rag.vector_store import INDEX_PATH, create_document, get_embeddings, load_vector_store, get_source_manifest, get_table_store
+from rag.source_manifest import file_content_hash, SKIP, REPLACE
+from rag.collection_store import collection_path
+from rag.telemetry import get_telemetry
+from agents.description_cache import get_description_cache
+from agents.image_descriptor import describe_images_batch, PROMPT_TEXT, VISION_MODEL_NAME
+
+# ============================================================================= #
+IMAGE_OUTPUT_DIR = "./data/temp_images"
+PAGES_PER_BATCH = 8         # Páginas particionadas por vez no modo streaming
+EMBED_BATCH_SIZE = 64       # Documentos por chamada ao modelo de embeddings
+QUEUE_SIZE = 4              # Lotes em espera entre os estágios (limita a memória)
+
+# "adaptive": hi_res só nas páginas com imagens, tabelas ou sem texto; "hi_res": todas as páginas
+PARTITION_MODE = os.getenv("PARTITION_MODE", "adaptive")
+PARTITION_WORKERS = int(os.getenv("PARTITION_WORKERS", "0")) or min(4, os.cpu_count() or 1)
+
+# ============================================================================= #
+def partition_document(pdf_path: str, image_output_dir: str = IMAGE_OUTPUT_DIR, starting_page_number: int = 1,
+                       strategy: str = "hi_res") -> list:
+    """
+    Partitions a PDF with the hi_res strategy (or "fast", text layer only, for pages
+    without images or tables). Top-level so it can run in a worker process.
+
+    Args:
+        pdf_path (str): Path of the PDF file.
+        image_output_dir (str): Folder where the cropped images and tables are saved.
+        starting_page_number (int): Page number of the first page of the file.
+        strategy (str): "hi_res" or "fast".
+
+    Returns:
+        list: The `unstructured` elements of the document.
+    """
+    from unstructured.partition.pdf import partition_pdf
+
+    with get_telemetry().span("partition_document", file=os.path.basename(pdf_path), strategy=strategy) as span:
+        if strategy == "fast":
+            elements = partition_pdf(filename=pdf_path, strategy="fast", starting_page_number=starting_page_number)
+            span["elements"] = len(elements)
+            return elements
+
+        elements = partition_pdf(
+            filename=pdf_path,
+            strategy="hi_res",                                  # Obrigatório para tabelas e imagens
+            infer_table_structure=True,                         # Extrai a estrutura da tabela
+            extract_images_in_pdf=True,                         # Salva as imagens localmente
+            extract_image_block_output_dir=image_output_dir,    # Pasta onde as imagens vão cair
+            extract_image_block_types=["Image", "Table"],       # O que deve ser "recortado"
+            starting_page_number=starting_page_number,
+        )
+        span["elements"] = len(elements)
+    return elements
+
+# ============================================================================= #
+def _write_pages(reader, first: int, last: int, path: str) -> str:
+    # Copia as páginas [first, last] (base 1) para um PDF temporário
+    from pypdf import PdfWriter
+
+    writer = PdfWriter()
+    for page in reader.pages[first - 1:last]:
+        writer.add_page(page)
+    writer.write(path)
+    return path
+
+def _point_to_source(elements: list, pdf_path: str) -> list:
+    # Metadados apontam para o PDF original, não para o lote temporário
+    for el in elements:
+        el.metadata.filename = os.path.basename(pdf_path)
+        el.metadata.file_directory = os.path.dirname(pdf_path)
+    return elements
+
+# ============================================================================= #
+def iter_adaptive_batches(pdf_path: str, pages_per_batch: int | None = PAGES_PER_BATCH,
+                          image_output_dir: str = IMAGE_OUTPUT_DIR, max_workers: int = PARTITION_WORKERS):
+    """
+    Adaptive partitioning: a cheap per-page scan (see `rag.page_scan`) sends only the
+    pages with images, table-like structure or no text layer to hi_res, in parallel
+    processes; the other pages use the fast text-layer strategy. Batches are yielded
+    in page order.
+
+    Args:
+        pdf_path (str): Path of the PDF file.
+        pages_per_batch (int | None): Maximum pages per batch.
+        image_output_dir (str): Folder where the cropped images and tables are saved.
+        max_workers (int): hi_res processes. 1 runs everything in the calling process.
+
+    Yields:
+        list: The `unstructured` elements of each page run, in page order.
+    """
+    from pypdf import PdfReader
+
+    telemetry = get_telemetry()
+    with telemetry.span("page_scan", file=os.path.basename(pdf_path)):
+        scans = scan_pdf(pdf_path)
+    runs = page_runs(scans, pages_per_batch or len(scans) or 1)
+
+    hi_res_pages = sum(scan.needs_hi_res for scan in scans)
+    telemetry.incr("pages_partitioned_total", hi_res_pages, strategy="hi_res")
+    telemetry.incr("pages_partitioned_total", len(scans) - hi_res_pages, strategy="fast")
+    print(f"📄 {hi_res_pages} de {len(scans)} páginas precisam de hi_res (imagens, tabelas ou sem texto).")
+
+    reader = PdfReader(pdf_path)
+    use_pool = max_workers > 1 and sum(strategy == "hi_res" for strategy, _, _ in runs) > 1
+    pool = ProcessPoolExecutor(max_workers=max_workers, initializer=_init_partition_worker) if use_pool else nullcontext()
+
+    # ---------------------------------------------------------------------------- #
+    with tempfile.TemporaryDirectory() as tmp_dir, pool:
+        # Todas as páginas hi_res são enviadas de uma vez; as "fast" rodam aqui enquanto isso
+        tasks = []
+        for strategy, first, last in runs:
+            args = (
+                _write_pages(reader, first, last, os.path.join(tmp_dir, f"pages-{first}.pdf")),
+                os.path.join(image_output_dir, f"pages-{first}"),
+                first,
+                strategy,
+            )
+            tasks.append(pool.submit(partition_document, *args) if use_pool and strategy == "hi_res" else args)
+
+        try:
+            for task in tasks:
+                elements = task.result() if isinstance(task, Future) else partition_document(*task)
+                yield _point_to_source(elements, pdf_path)
+        finally:
+            # Gerador fechado antes do fim (ingestão abortada): as páginas ainda na fila são canceladas
+            if use_pool:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+# ============================================================================= #
+def iter_partitioned_batches(pdf_path: str, pages_per_batch: int | None = PAGES_PER_BATCH,
+                             image_output_dir: str = IMAGE_OUTPUT_DIR, mode: str = PARTITION_MODE,
+                             max_workers: int = PARTITION_WORKERS):
+    """
+    Partitions a PDF a few pages at a time, so later stages can start before the
+    whole document is parsed.
+
+    Args:
+        pdf_path (str): Path of the PDF file.
+        pages_per_batch (int | None): Pages per batch. None partitions the whole file at once.
+        image_output_dir (str): Folder where the cropped images and tables are saved.
+        mode (str): "adaptive" (see `iter_adaptive_batches`) or "hi_res" on every page.
+        max_workers (int): hi_res processes in adaptive mode.
+
+    Yields:
+        list: The `unstructured` elements of each page batch, in page order.
+    """
+    if mode == "adaptive":
+        yield from iter_adaptive_batches(pdf_path, pages_per_batch, image_output_dir, max_workers)
+        return
+
+    from pypdf import PdfReader
+
+    reader = PdfReader(pdf_path)
+    total_pages = len(reader.pages)
+
+    if not pages_per_batch or total_pages <= pages_per_batch:
+        yield partition_document(pdf_path, image_output_dir)
+        return
+
+    # ---------------------------------------------------------------------------- #
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for start in range(0, total_pages, pages_per_batch):
+            batch_path = _write_pages(reader, start + 1, start + pages_per_batch, os.path.join(tmp_dir, f"pages-{start + 1}.pdf"))
+            elements = partition_document(
+                batch_path,
+                os.path.join(image_output_dir, f"pages-{start + 1}"),
+                starting_page_number=start + 1,
+            )
+            yield _point_to_source(elements, pdf_path)
+
+# ============================================================================= #
+def partition_file(pdf_path: str, image_output_dir: str = IMAGE_OUTPUT_DIR, mode: str = PARTITION_MODE) -> list:
+    """
+    Partitions a whole PDF in the calling process (one PDF per worker of `ingest_pdfs_parallel`).
+    """
+    return [el for batch in iter_partitioned_batches(pdf_path, PAGES_PER_BATCH, image_output_dir, mode, max_workers=1) for el in batch]
+
+# ============================================================================= #
+def describe_images_and_tables(elements, described_images_hashes) -> dict:
+    """
+    Process the PDF elements, describe images, and save output to JSON.
+
+    Args:
+        elements (list): List of elements extracted from the PDF.
+        described_images_hashes (dict): Dictionary of image hashes and their descriptions.
+
+    Returns:
+        dict: Updated dictionary of image hashes and their descriptions.
+    """
+
+    telemetry = get_telemetry()
+    cache = get_description_cache()
+    near_duplicates = get_near_duplicate_index()
+    pending = {}    # hash -> base64 das imagens que ainda precisam de descrição
+    aliases = {}    # hash -> hash de uma imagem quase idêntica (reaproveita a descrição)
+    image_elements = []
+    skipped = 0
+
+    # ---------------------------------------------------------------------------- #
+    for el in elements:
+        if el.category == "Table":
+            # Markdown compacto (o HTML original continua em metadata.text_as_html)
+            html_table = el.metadata.text_as_html
+            header, rows = parse_html_table(html_table) if html_table else ([], [])
+            if header:
+                el.text = f"Table:\n{table_to_markdown(header, rows)}"
+
+    # ---------------------------------------------------------------------------- #
+        elif el.category == "Image":
+            # Lê, filtra e reduz a imagem numa única passada
+            with telemetry.span("prepare_image"):
+                prepared = prepare_image(el.metadata.image_path)
+            if prepared is None:
+                # Recorte minúsculo ou em branco: texto vazio, o chunker descarta
+                el.text = ""
+                skipped += 1
+                telemetry.incr("images_skipped_total", reason="small_or_blank")
+                continue
+
+            image_hash = prepared.image_hash
+            image_elements.append((el, image_hash))
+
+            if image_hash in described_images_hashes or image_hash in pending or image_hash in aliases:
+                continue
+
+            # Cache em disco compartilhado entre sessões, reinícios e documentos
+            description = cache.get(image_hash, PROMPT_TEXT, VISION_MODEL_NAME)
+            if description is not None:
+                described_images_hashes[image_hash] = description
+                near_duplicates.add(prepared.phash, image_hash)
+                continue
+
+            # Imagem quase idêntica a outra já descrita (ou na fila)
+            similar = near_duplicates.find(prepared.phash)
+            if similar is not None and similar not in described_images_hashes and similar not in pending:
+                description = cache.get(similar, PROMPT_TEXT, VISION_MODEL_NAME)
+                if description is not None:
+                    described_images_hashes[similar] = description
+                else:
+                    similar = None
+            if similar is not None:
+                aliases[image_hash] = similar
+                telemetry.incr("images_skipped_total", reason="near_duplicate")
+                continue
+
+            pending[image_hash] = prepared.b64
+            near_duplicates.add(prepared.phash, image_hash)
+
+    # ---------------------------------------------------------------------------- #
+    # Descreve todas as imagens novas do documento em paralelo (com rate limit)
+    if pending:
+        pending_hashes = list(pending)
+
+        def _save(i, description):
+            # Cada descrição (trabalho pago) vai para o cache assim que chega
+            cache.set(pending_hashes[i], PROMPT_TEXT, VISION_MODEL_NAME, description)
+            described_images_hashes[pending_hashes[i]] = description
+
+        with telemetry.span("describe_images_batch", images=len(pending)):
+            describe_images_batch(list(pending.values()), on_result=_save)
+        telemetry.incr("images_described_total", len(pending))
+
+    for image_hash, similar in aliases.items():
+        described_images_hashes[image_hash] = described_images_hashes[similar]
+        cache.set(image_hash, PROMPT_TEXT, VISION_MODEL_NAME, described_images_hashes[similar])
+
+    if skipped or aliases:
+        print(f"🖼️ {skipped} imagens ignoradas (pequenas ou em branco), {len(aliases)} quase duplicadas reaproveitadas.")
+
+    for el, image_hash in image_elements:
+        # Substitui o conteúdo do elemento:
+        el.text = f"Image Description: {described_images_hashes[image_hash]}"
+
+    return described_images_hashes, elements
+
+# ============================================================================= #
+class IndexWriter:
+    """
+    Single owner of the vector index inside a process. Every ingestion adds its
+    embeddings through it, so concurrent documents never race on the index files.
+    The tables of a replaced version are removed when the new version is saved.
+    """
+
+    def __init__(self, index_path: str = INDEX_PATH):
+        self.index_path = index_path
+        self._lock = threading.Lock()
+
+        print(f"🔄 Carregando índice em '{index_path}'...")
+        self.vector_store = load_vector_store(index_path)
+        self.sources = get_source_manifest(self.vector_store)
+        self.tables = get_table_store(self.vector_store)
+        self._in_progress = set()
+        self._table_ids = {}    # fonte -> table_ids da versão sendo indexada
+
+    # ---------------------------------------------------------------------------- #
+    def check(self, source: str, content_hash: str | None) -> tuple:
+        """
+        Decides whether a source must be indexed (see `SourceManifest.decide`) and
+        reserves it, so the same source is never ingested twice at the same time.
+
+        Returns:
+            tuple: (SKIP, reason), (NEW, None) or (REPLACE, old vector ids).
+        """
+        with self._lock:
+            if source in self._in_progress:
+                return SKIP, f"O arquivo '{source}' já está sendo processado"
+
+            action, detail = self.sources.decide(source, content_hash)
+            if action != SKIP:
+                self._in_progress.add(source)
+            return action, detail
+
+    # ---------------------------------------------------------------------------- #
+    def add(self, source: str, docs: list, vectors: list) -> list[str]:
+        """
+        Adds already embedded documents to the pending shard of their source.
+
+        Args:
+            source (str): Source of the documents.
+            docs (list[Document]): The documents to add.
+            vectors (list[list[float]]): One embedding per document.
+
+        Returns:
+            list[str]: The ids of the new vectors.
+        """
+        with self._lock:
+            self._table_ids.setdefault(source, set()).update(document_table_ids(docs))
+        return self.vector_store.add_embedded_documents(docs, vectors, pending_key=source)
+
+    # ---------------------------------------------------------------------------- #
+    def save(self, source: str, content_hash: str | None, ids: list[str], replaced_ids: list[str] | None = None) -> None:
+        """
+        Writes the source as a new shard (tombstoning the vectors it replaces) and
+        records it in the source manifest; tables only the old version had are removed.
+        """
+        with self._lock:
+            self.sources.begin(source, content_hash, ids)
+            shard = self.vector_store.commit(pending_key=source, deleted_ids=replaced_ids)
+            self.sources.put(source, content_hash, ids, shard)
+            table_ids = self._table_ids.pop(source, set())
+            if replaced_ids is not None:
+                self.tables.delete_source(source, keep=table_ids)
+            self._in_progress.discard(source)
+
+    def discard(self, source: str) -> None:
+        with self._lock:
+            self.vector_store.discard(pending_key=source)
+            self._table_ids.pop(source, None)
+            # Fonte nova que falhou: as tabelas já salvas não pertencem a nenhum documento
+            if self.sources.get(source) is None:
+                self.tables.delete_source(source)
+            self._in_progress.discard(source)
+
+# ============================================================================= #
+_DONE = object()
+
+class _StageError:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+# ============================================================================= #
+def _run_stage(iterable, out_queue: queue.Queue, stop: threading.Event) -> threading.Thread:
+    """
+    Runs `iterable` in a thread, pushing each item into a bounded queue.
+    """
+    def _put(item) -> bool:
+        while not stop.is_set():
+            try:
+                out_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _target():
+        try:
+            for item in iterable:
+                if not _put(item):
+                    return
+        except BaseException as e:
+            _put(_StageError(e))
+        finally:
+            # Fecha o gerador produtor também quando a ingestão é interrompida (libera, por
+            # exemplo, o pool de processos hi_res de `iter_adaptive_batches`)
+            try:
+                close = getattr(iterable, "close", None)
+                if close is not None:
+                    close()
+            finally:
+                _put(_DONE)
+
+    thread = threading.Thread(target=_target, daemon=True)
+    thread.start()
+    return thread
+
+def _iter_queue(in_queue: queue.Queue):
+    while True:
+        item = in_queue.get()
+        if item is _DONE:
+            return
+        if isinstance(item, _StageError):
+            raise item.error
+        yield item
+
+# ============================================================================= #
+class _JsonArrayWriter:
+    """
+    Writes a JSON array incrementally (optional side output of the pipeline).
+    """
+
+    def __init__(self, path: str):
+        self._file = open(path, "w", encoding="utf-8")
+        self._file.write("[")
+        self._first = True
+
+    def write(self, item: dict) -> None:
+        self._file.write("\n" if self._first else ",\n")
+        self._file.write(json.dumps(item, ensure_ascii=False))
+        self._first = False
+
+    def close(self) -> None:
+        self._file.write("\n]\n")
+        self._file.close()
+
+# ============================================================================= #
+def run_ingest_pipeline(element_batches, source: str, writer: IndexWriter, described_images_hashes: dict,
+                        json_output_path: str | None = None, embed_batch_size: int = EMBED_BATCH_SIZE,
+                        queue_size: int = QUEUE_SIZE, content_hash: str | None = None,
+                        replaced_ids: list[str] | None = None) -> int:
+    """
+    Streams element batches through description, layout-aware chunking, batched embedding
+    and index insertion. Stages run in threads connected by bounded queues, so
+    embedding overlaps with partitioning and memory stays flat.
+
+    Args:
+        element_batches (iterable): Batches of `unstructured` elements (e.g. `iter_partitioned_batches`).
+        source (str): Source name stored in the metadata.
+        writer (IndexWriter): The index writer of the process (the source must have passed `writer.check`).
+        described_images_hashes (dict): Dictionary of image hashes and their descriptions.
+        json_output_path (str | None): If given, the described elements are also exported to this JSON file.
+        embed_batch_size (int): Documents per embedding call.
+        queue_size (int): Maximum number of batches waiting between two stages.
+        content_hash (str | None): Hash of the source content, recorded in the source manifest.
+        replaced_ids (list[str] | None): Vectors of a previous version of the source, deleted on commit.
+
+    Returns:
+        int: Number of documents added to the index.
+    """
+    stop = threading.Event()
+    partitioned = queue.Queue(maxsize=queue_size)
+    described = queue.Queue(maxsize=queue_size)
+
+    # ---------------------------------------------------------------------------- #
+    telemetry = get_telemetry()
+
+    def _describe():
+        for elements in _iter_queue(partitioned):
+            with telemetry.span("describe_batch", source=source, elements=len(elements)):
+                describe_images_and_tables(elements, described_images_hashes)
+            yield [el.to_dict() for el in elements]
+
+    _run_stage(element_batches, partitioned, stop)
+    _run_stage(_describe(), described, stop)
+
+    # ---------------------------------------------------------------------------- #
+    embeddings = get_embeddings()
+    json_writer = _JsonArrayWriter(json_output_path) if json_output_path else None
+    chunker = LayoutChunker()
+    pending_docs = []
+    ids = []
+
+    def _embed_and_add(docs):
+        with telemetry.span("embed_documents", source=source, documents=len(docs)):
+            vectors = embeddings.embed_documents([doc.page_content for doc in docs])
+        ids.extend(writer.add(source, docs, vectors))
+
+    try:
+        for json_data in _iter_queue(described):
+            if json_writer:
+                for item in json_data:
+                    json_writer.write(item)
+
+            with telemetry.span("chunk_batch", source=source, elements=len(json_data)) as span:
+                chunks = chunker.feed(json_data)
+                save_tables(chunks, writer.vector_store.index_path, source)
+                pending_docs.extend(create_document(chunks, source))
+                span["chunks"] = len(chunks)
+            while len(pending_docs) >= embed_batch_size:
+                _embed_and_add(pending_docs[:embed_batch_size])
+                pending_docs = pending_docs[embed_batch_size:]
+
+        pending_docs.extend(create_document(chunker.flush(), source))
+        if pending_docs:
+            _embed_and_add(pending_docs)
+    except BaseException:
+        writer.discard(source)
+        telemetry.incr("errors_total", stage="ingest")
+        raise
+    finally:
+        stop.set()
+        if json_writer:
+            json_writer.close()
+
+    with telemetry.span("index_commit", source=source, documents=len(ids)):
+        writer.save(source, content_hash, ids, replaced_ids)
+    telemetry.incr("documents_ingested_total")
+    print(f"➕ Adicionados {len(ids)} novos chunks ao índice.")
+    return len(ids)
+
+# ============================================================================= #
+def ingest_pdf(pdf_path: str, source: str, described_images_hashes: dict, writer: IndexWriter | None = None,
+               json_output_path: str | None = None, pages_per_batch: int | None = PAGES_PER_BATCH,
+               collection: str | None = None) -> int:
+    """
+    Streaming ingestion of a single PDF (see `run_ingest_pipeline`). Unchanged files
+    are skipped before partitioning; changed files replace their previous vectors.
+
+    Args:
+        pdf_path (str): Path of the PDF file.
+        source (str): Source name stored in the metadata.
+        described_images_hashes (dict): Dictionary of image hashes and their descriptions.
+        writer (IndexWriter | None): The index writer of the process. A new one is created if None.
+        json_output_path (str | None): Optional JSON export of the described elements.
+        pages_per_batch (int | None): Pages partitioned at a time.
+        collection (str | None): Target collection when `writer` is None. Defaults to the default collection.
+
+    Returns:
+        int: Number of documents added to the index (0 if the file was skipped).
+    """
+    writer = writer or IndexWriter(collection_path(collection))
+    content_hash = file_content_hash(pdf_path)
+    
+    action, detail = writer.check(source, content_hash)
+    if action == SKIP:
+        print(f"⚠️ {detail}. Pulando processamento.")
+        return 0
+
+    image_dir = os.path.join(IMAGE_OUTPUT_DIR, hashlib.md5(source.encode("utf-8")).hexdigest()[:12])
+    with get_telemetry().span("ingest_pdf", source=source):
+        return run_ingest_pipeline(
+            iter_partitioned_batches(pdf_path, pages_per_batch, image_dir),
+            source, writer, described_images_hashes, json_output_path=json_output_path,
+            content_hash=content_hash, replaced_ids=detail if action == REPLACE else None,
+        )
+
+# ============================================================================= #
+def _init_partition_worker() -> None:
+    # Cada processo usa um núcleo; o paralelismo vem do número de processos
+    os.environ.setdefault("OMP_NUM_THREADS", "1")
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(1)
+
+# ============================================================================= #
+def ingest_pdfs_parallel(pdf_files: list[tuple[str, str]], described_images_hashes: dict,
+                         max_workers: int | None = None, describe_workers: int = 2,
+                         on_progress=None, collection: str | None = None) -> list[dict]:
+    """
+    Ingests several PDFs at once: partitioning runs in a process pool (one PDF per core),
+    image description shares the process-wide rate limiter and indexing goes through a
+    single `IndexWriter`.
+
+    Args:
+        pdf_files (list[tuple[str, str]]): Pairs of (pdf_path, source name).
+        described_images_hashes (dict): Dictionary of image hashes and their descriptions.
+        max_workers (int | None): Number of partitioning processes. Defaults to the CPU count.
+        describe_workers (int): Documents described/indexed at the same time.
+        on_progress (callable | None): Called in the caller thread as `on_progress(done, total, result)`.
+        collection (str | None): Target collection. Defaults to the default collection.
+
+    Returns:
+        list[dict]: One result per file, with `arquivo`, `status`, `mensagem` and `segundos`.
+    """
+    total = len(pdf_files)
+    results = []
+    if not total:
+        return results
+
+    max_workers = max(1, min(max_workers or os.cpu_count() or 1, total))
+    writer = IndexWriter(collection_path(collection))
+    started = {}
+    versions = {}   # fonte -> (hash do conteúdo, ids substituídos)
+
+    # ---------------------------------------------------------------------------- #
+    def _finish(source, status, message):
+        result = {
+            "arquivo": source,
+            "status": status,
+            "mensagem": message,
+            "segundos": round(time.time() - started[source], 2),
+        }
+        if not status.startswith("⚠️"):
+            get_telemetry().record("ingest_pdf", result["segundos"], started[source], source=source,
+                                   error=None if status.startswith("✅") else "error")
+        results.append(result)
+        if on_progress:
+            on_progress(len(results), total, result)
+
+    # ---------------------------------------------------------------------------- #
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_partition_worker) as partitioners, \
+         ThreadPoolExecutor(max_workers=describe_workers) as describers:
+
+        pending = {}
+        for pdf_path, source in pdf_files:
+            started[source] = time.time()
+            content_hash = file_content_hash(pdf_path)
+            action, detail = writer.check(source, content_hash)
+            if action == SKIP:
+                _finish(source, "⚠️ Já indexado", detail)
+                continue
+
+            versions[source] = (content_hash, detail if action == REPLACE else None)
+            image_dir = os.path.join(IMAGE_OUTPUT_DIR, hashlib.md5(source.encode("utf-8")).hexdigest()[:12])
+            pending[partitioners.submit(partition_file, pdf_path, image_dir)] = ("partition", source)
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, source = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    writer.discard(source)
+                    _finish(source, "❌ Erro", f"{stage}: {e}")
+                    continue
+
+                if stage == "partition":
+                    # O span de partition_document fica no processo filho; aqui mede-se fila + execução
+                    get_telemetry().record("partition_pool", time.time() - started[source], started[source], source=source)
+                    # Descrição + embeddings seguem em threads enquanto outros PDFs são particionados
+                    content_hash, replaced_ids = versions[source]
+                    next_future = describers.submit(
+                        run_ingest_pipeline, [result], source, writer, described_images_hashes,
+                        content_hash=content_hash, replaced_ids=replaced_ids,
+                    )
+                    pending[next_future] = ("index", source)
+                else:
+                    _finish(source, "✅ Sucesso", f"{result} elementos indexados")
+
+    return results
@@ -0,0 +1,543 @@
+# ============================================================================= #
+# Project: Multimodal RAG Pipeline
+# Develop by: Thiago Piovesan
+# Description: Background ingestion job queue (SQLite) with resumable checkpoints
+# Date: 2026-01-08 // YYYY-MM-DD
+# Version: 0.1.0
+# License: MIT
+# ============================================================================= #
+# Libs Importation:
+import os
+import sys
+import json
+import time
+import uuid
+import shutil
+import socket
+import sqlite3
+import argparse
+import threading
+import subprocess
+
+import numpy as np
+
+# ============================================================================= #
+JOBS_DIR = os.getenv("JOBS_DIR", "data/jobs")
+JOBS_DB = "jobs.sqlite"
+WORKER_SPANS_FILE = "spans.jsonl"                                       # Tempos por etapa dos workers (lidos pela interface)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "1"))                        # Workers iniciados pela interface
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", "10"))
+JOB_STALE_SECONDS = float(os.getenv("JOB_STALE_SECONDS", "120"))        # Sem heartbeat: worker considerado morto
+JOB_WORKER_IDLE_EXIT = float(os.getenv("JOB_WORKER_IDLE_EXIT", "600"))  # Worker ocioso encerra após N segundos
+
+# Estados do job e etapas concluídas (checkpoints), em ordem
+QUEUED, RUNNING, DONE, SKIPPED, FAILED = "queued", "running", "done", "skipped", "failed"
+STAGES = ("partitioned", "described", "embedded", "indexed")
+
+# ============================================================================= #
+def _write_json(path: str, data) -> None:
+    # Escrita atômica: um crash no meio nunca deixa um checkpoint pela metade
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def _read_json(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+# ============================================================================= #
+class JobQueue:
+    """
+    Local ingestion queue stored in SQLite (no external broker). Each job keeps a copy
+    of its PDF and the checkpoint files of the stages already done in its own folder,
+    so a restarted worker resumes from the last completed stage.
+    """
+
+    def __init__(self, jobs_dir: str = JOBS_DIR):
+        self.jobs_dir = jobs_dir
+        self.path = os.path.join(jobs_dir, JOBS_DB)
+        self._local = threading.local()
+
+        os.makedirs(jobs_dir, exist_ok=True)
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                pdf_path TEXT NOT NULL,
+                content_hash TEXT,
+                options TEXT NOT NULL DEFAULT '{}',
+                status TEXT NOT NULL,
+                stage TEXT,
+                message TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                stats TEXT NOT NULL DEFAULT '{}',
+                worker TEXT,
+                heartbeat REAL,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL
+            )
+        """)
+        if "stats" not in {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}:
+            # Filas criadas antes dos contadores por job
+            try:
+                conn.execute("ALTER TABLE jobs ADD COLUMN stats TEXT NOT NULL DEFAULT '{}'")
+            except sqlite3.OperationalError:
+                pass    # Outro processo adicionou a coluna ao mesmo tempo
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at)")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS workers (
+                id TEXT PRIMARY KEY,
+                pid INTEGER NOT NULL,
+                heartbeat REAL NOT NULL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS collection_locks (
+                collection TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                heartbeat REAL NOT NULL
+            )
+        """)
+
+    # ---------------------------------------------------------------------------- #
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def job_dir(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, job_id)
+
+    # ---------------------------------------------------------------------------- #
+    def enqueue(self, pdf_path: str, source: str, **options) -> str:
+        """
+        Adds a PDF to the queue. The file is copied into the job folder, so the upload
+        can be overwritten or deleted right away. A source already waiting with the
+        same content is not queued twice.
+
+        Args:
+            pdf_path (str): Path of the PDF file.
+            source (str): Source name stored in the metadata.
+            **options: Extra job options (`collection`, `json_output_path`).
+
+        Returns:
+            str: The job id (the existing one for a duplicate).
+        """
+        from rag.source_manifest import file_content_hash
+
+        content_hash = file_content_hash(pdf_path)
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT id FROM jobs WHERE source = ? AND content_hash = ? AND status IN (?, ?)",
+            (source, content_hash, QUEUED, RUNNING),
+        ).fetchone()
+        if row is not None:
+            return row["id"]
+
+        job_id = f"{int(time.time() * 1000):013d}-{uuid.uuid4().hex[:8]}"
+        os.makedirs(self.job_dir(job_id), exist_ok=True)
+        job_pdf = os.path.join(self.job_dir(job_id), "source.pdf")
+        shutil.copyfile(pdf_path, job_pdf)
+
+        conn.execute(
+            "INSERT INTO jobs (id, source, pdf_path, content_hash, options, status, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (job_id, source, job_pdf, content_hash, json.dumps(options), QUEUED, time.time()),
+        )
+        return job_id
+
+    # ---------------------------------------------------------------------------- #
+    def claim(self, worker_id: str) -> dict | None:
+        """
+        Atomically takes the oldest queued job (or a running job whose worker stopped
+        sending heartbeats). Two jobs of the same source never run at the same time, and
+        jobs of a collection locked by an in-process ingest (`lock_collection`) wait.
+
+        Returns:
+            dict | None: The claimed job, or None if there is nothing to do.
+        """
+        conn = self._connect()
+        now = time.time()
+        stale = now - JOB_STALE_SECONDS
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("""
+                SELECT * FROM jobs
+                WHERE (status = ? OR (status = ? AND heartbeat < ?))
+                  AND source NOT IN (SELECT source FROM jobs WHERE status = ? AND heartbeat >= ?)
+                  AND COALESCE(json_extract(options, '$.collection'), '') NOT IN
+                      (SELECT collection FROM collection_locks WHERE heartbeat >= ?)
+                ORDER BY created_at LIMIT 1
+            """, (QUEUED, RUNNING, stale, RUNNING, stale, stale)).fetchone()
+
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+
+            if row["attempts"] >= JOB_MAX_ATTEMPTS:
+                # Job que derrubou o worker várias vezes: não tenta de novo
+                conn.execute(
+                    "UPDATE jobs SET status = ?, message = ?, finished_at = ? WHERE id = ?",
+                    (FAILED, f"Interrompido {row['attempts']} vezes", now, row["id"]),
+                )
+                conn.execute("COMMIT")
+                return self.claim(worker_id)
+
+            conn.execute(
+                "UPDATE jobs SET status = ?, worker = ?, attempts = attempts + 1, heartbeat = ?, "
+                "started_at = COALESCE(started_at, ?) WHERE id = ?",
+                (RUNNING, worker_id, now, now, row["id"]),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+        return self.get(row["id"])
+
+    # ---------------------------------------------------------------------------- #
+    def checkpoint(self, job_id: str, stage: str, message: str | None = None) -> None:
+        self._connect().execute(
+            "UPDATE jobs SET stage = ?, message = ?, heartbeat = ? WHERE id = ?",
+            (stage, message, time.time(), job_id),
+        )
+
+    def update_stats(self, job_id: str, **stats) -> None:
+        """
+        Merges counters collected by the worker (e.g. description cache hits) into the
+        job row, where the interface reads them.
+        """
+        conn = self._connect()
+        row = conn.execute("SELECT stats FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is not None:
+            conn.execute("UPDATE jobs SET stats = ? WHERE id = ?", (json.dumps({**json.loads(row["stats"]), **stats}), job_id))
+
+    def finish(self, job_id: str, status: str, message: str | None = None) -> None:
+        self._connect().execute(
+            "UPDATE jobs SET status = ?, message = ?, finished_at = ?, heartbeat = ? WHERE id = ?",
+            (status, message, time.time(), time.time(), job_id),
+        )
+        if status in (DONE, SKIPPED):
+            # Checkpoints não são mais necessários (o índice já tem o resultado)
+            shutil.rmtree(self.job_dir(job_id), ignore_errors=True)
+
+    def retry_later(self, job_id: str, message: str) -> None:
+        self._connect().execute(
+            "UPDATE jobs SET status = ?, message = ?, worker = NULL WHERE id = ?",
+            (QUEUED, message, job_id),
+        )
+
+    def heartbeat(self, worker_id: str, job_id: str | None = None, pid: int | None = None) -> None:
+        conn = self._connect()
+        now = time.time()
+        conn.execute("INSERT OR REPLACE INTO workers (id, pid, heartbeat) VALUES (?, ?, ?)", (worker_id, pid or os.getpid(), now))
+        if job_id is not None:
+            conn.execute("UPDATE jobs SET heartbeat = ? WHERE id = ? AND worker = ?", (now, job_id, worker_id))
+
+    def unregister(self, worker_id: str) -> None:
+        self._connect().execute("DELETE FROM workers WHERE id = ?", (worker_id,))
+
+    # ---------------------------------------------------------------------------- #
+    def lock_collection(self, collection: str | None, owner: str) -> bool:
+        """
+        Reserves a collection for an ingest that writes its index outside the queue
+        (`rag.api.ingest`). It fails while a worker is running a job of the collection;
+        once taken, the workers leave the queued jobs of that collection alone until
+        `unlock_collection` (or until the owner stops calling `refresh_collection_lock`).
+
+        Args:
+            collection (str | None): Collection name, as in the job options (None = default).
+            owner (str): Lock owner (e.g. `worker_name()`).
+
+        Returns:
+            bool: True if the lock was taken.
+        """
+        conn = self._connect()
+        now = time.time()
+        stale = now - JOB_STALE_SECONDS
+        key = collection or ""
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            busy = conn.execute(
+                "SELECT 1 FROM jobs WHERE status = ? AND heartbeat >= ? AND COALESCE(json_extract(options, '$.collection'), '') = ? "
+                "UNION ALL SELECT 1 FROM collection_locks WHERE collection = ? AND owner != ? AND heartbeat >= ?",
+                (RUNNING, stale, key, key, owner, stale),
+            ).fetchone()
+            if busy is None:
+                conn.execute("INSERT OR REPLACE INTO collection_locks VALUES (?, ?, ?)", (key, owner, now))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return busy is None
+
+    def refresh_collection_lock(self, collection: str | None, owner: str) -> None:
+        self._connect().execute(
+            "UPDATE collection_locks SET heartbeat = ? WHERE collection = ? AND owner = ?",
+            (time.time(), collection or "", owner),
+        )
+
+    def unlock_collection(self, collection: str | None, owner: str) -> None:
+        self._connect().execute("DELETE FROM collection_locks WHERE collection = ? AND owner = ?", (collection or "", owner))
+
+    # ---------------------------------------------------------------------------- #
+    def get(self, job_id: str) -> dict | None:
+        row = self._connect().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["options"] = json.loads(job["options"])
+        job["stats"] = json.loads(job["stats"])
+        return job
+
+    def list_jobs(self, limit: int = 100) -> list[dict]:
+        rows = self._connect().execute(
+            "SELECT id, source, status, stage, message, attempts, stats, created_at, started_at, finished_at "
+            "FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,),
+        ).fetchall()
+        return [{**dict(row), "stats": json.loads(row["stats"])} for row in rows]
+
+    def counts(self) -> dict:
+        rows = self._connect().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def live_workers(self) -> int:
+        rows = self._connect().execute(
+            "SELECT id, pid FROM workers WHERE heartbeat >= ?", (time.time() - JOB_STALE_SECONDS,)
+        ).fetchall()
+        return sum(1 for row in rows if _pid_alive(row["pid"]))
+
+# ============================================================================= #
+def worker_name(pid: int | None = None) -> str:
+    return f"{socket.gethostname()}-{pid or os.getpid()}"
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+# ============================================================================= #
+def run_job(job_queue: JobQueue, job: dict, writer) -> tuple[str, str]:
+    """
+    Runs (or resumes) one job stage by stage, writing a checkpoint after each one:
+    partitioned -> described -> embedded -> indexed. Image descriptions and embeddings
+    are also kept in their persistent caches as soon as they are computed.
+
+    Args:
+        job_queue (JobQueue): The queue that owns the job.
+        job (dict): The claimed job.
+        writer (IndexWriter): The index writer of the worker process.
+
+    Returns:
+        tuple: (final status, message).
+    """
+    from agents.description_cache import get_description_cache
+    from rag.ingestion import IMAGE_OUTPUT_DIR, iter_partitioned_batches, describe_images_and_tables
+    from rag.vector_store import create_document, get_embeddings
+    from rag.chunking import chunk_elements
+    from rag.tables import save_tables
+    from rag.source_manifest import SKIP, REPLACE
+    from rag.telemetry import get_telemetry
+
+    job_id, source, stage = job["id"], job["source"], job["stage"]
+    job_dir = job_queue.job_dir(job_id)
+    done = STAGES.index(stage) + 1 if stage else 0
+
+    # Fonte já indexada: na primeira tentativa, pula; numa retomada, o crash foi após o commit,
+    # mas só se for esta mesma fonte (não outra com o mesmo conteúdo ou uma versão anterior)
+    action, detail = writer.check(source, job["content_hash"])
+    if action == SKIP:
+        entry = writer.sources.get(source)
+        if stage in ("embedded", "indexed") and entry is not None and entry["content_hash"] == job["content_hash"]:
+            return DONE, "Indexado (retomado após o commit)"
+        return SKIPPED, detail
+    replaced_ids = detail if action == REPLACE else None
+
+    telemetry = get_telemetry()
+    try:
+        with telemetry.span("ingest_job", source=source, resumed_from=stage):
+            # 1. Particionamento (CPU): elementos salvos em JSON
+            partitioned_path = os.path.join(job_dir, "partitioned.json")
+            if done < 1:
+                image_dir = os.path.join(IMAGE_OUTPUT_DIR, job_id)
+                elements = [el.to_dict() for batch in iter_partitioned_batches(job["pdf_path"], image_output_dir=image_dir) for el in batch]
+                _write_json(partitioned_path, elements)
+                job_queue.checkpoint(job_id, "partitioned", f"{len(elements)} elementos")
+
+            # 2. Descrição das imagens e tabelas (chamadas pagas, cache por imagem)
+            described_path = os.path.join(job_dir, "described.json")
+            if done < 2:
+                from unstructured.staging.base import elements_from_dicts
+
+                elements = elements_from_dicts(_read_json(partitioned_path))
+                # Contadores do cache de descrições deste job (a interface lê da linha do job)
+                cache = get_description_cache()
+                hits, misses = cache.hits, cache.misses
+                describe_images_and_tables(elements, {})
+                job_queue.update_stats(job_id, description_cache_hits=cache.hits - hits, description_cache_misses=cache.misses - misses)
+                described = [el.to_dict() for el in elements]
+                _write_json(described_path, described)
+                if job["options"].get("json_output_path"):
+                    _write_json(job["options"]["json_output_path"], described)
+                job_queue.checkpoint(job_id, "described", f"{len(described)} elementos descritos")
+
+            # 3. Chunking + embeddings (vetores salvos ao lado dos chunks)
+            chunks_path = os.path.join(job_dir, "chunks.json")
+            vectors_path = os.path.join(job_dir, "vectors.npy")
+            if done < 3:
+                chunks = chunk_elements(_read_json(described_path))
+                vectors = np.asarray(get_embeddings().embed_documents([chunk["text"] for chunk in chunks]), dtype=np.float32)
+                np.save(f"{vectors_path}.tmp.npy", vectors)
+                os.replace(f"{vectors_path}.tmp.npy", vectors_path)
+                _write_json(chunks_path, chunks)
+                job_queue.checkpoint(job_id, "embedded", f"{len(chunks)} chunks")
+
+            # 4. Índice: um novo shard (substitui a versão anterior da fonte, se houver)
+            chunks = _read_json(chunks_path)
+            vectors = np.load(vectors_path)
+            save_tables(chunks, writer.vector_store.index_path, source)
+            ids = writer.add(source, create_document(chunks, source), vectors.tolist())
+            writer.save(source, job["content_hash"], ids, replaced_ids)
+            job_queue.checkpoint(job_id, "indexed")
+    except BaseException:
+        writer.discard(source)
+        raise
+
+    return DONE, f"{len(ids)} chunks indexados"
+
+# ============================================================================= #
+def run_worker(jobs_dir: str = JOBS_DIR, poll_interval: float = 2.0, idle_exit: float = JOB_WORKER_IDLE_EXIT) -> None:
+    """
+    Worker loop: claims jobs until the queue stays empty for `idle_exit` seconds
+    (0 = never exits). A heartbeat thread marks the worker and its current job alive.
+    Stage timings are appended to `<jobs_dir>/spans.jsonl` (see `worker_spans_path`).
+    """
+    from rag.telemetry import get_telemetry, JsonLogExporter
+
+    job_queue = JobQueue(jobs_dir)
+    get_telemetry().add_exporter(JsonLogExporter(worker_spans_path(jobs_dir)))
+    worker_id = worker_name()
+    current = {"job_id": None}
+    stop = threading.Event()
+
+    def _heartbeat():
+        heartbeat_queue = JobQueue(jobs_dir)
+        while not stop.wait(JOB_HEARTBEAT_SECONDS):
+            heartbeat_queue.heartbeat(worker_id, current["job_id"])
+
+    job_queue.heartbeat(worker_id)
+    threading.Thread(target=_heartbeat, name="job-heartbeat", daemon=True).start()
+    print(f"👷 Worker '{worker_id}' aguardando jobs em '{jobs_dir}'...")
+
+    writers = {}    # coleção -> IndexWriter
+    idle_since = time.time()
+    try:
+        while True:
+            job = job_queue.claim(worker_id)
+            if job is None:
+                if idle_exit and time.time() - idle_since > idle_exit:
+                    print("💤 Fila vazia. Encerrando o worker.")
+                    return
+                time.sleep(poll_interval)
+                continue
+
+            # ---------------------------------------------------------------------------- #
+            current["job_id"] = job["id"]
+            print(f"▶️ Job {job['id']} ({job['source']}) a partir de: {job['stage'] or 'início'}")
+            try:
+                collection = job["options"].get("collection")
+                if collection not in writers:
+                    # Modelos e índice só são carregados quando há trabalho
+                    from rag.ingestion import IndexWriter
+                    from rag.collection_store import collection_path
+                    writers[collection] = IndexWriter(collection_path(collection))
+                status, message = run_job(job_queue, job, writers[collection])
+                job_queue.finish(job["id"], status, message)
+                print(f"✅ Job {job['id']}: {message}")
+            except Exception as e:
+                message = f"{type(e).__name__}: {e}"
+                if job["attempts"] < JOB_MAX_ATTEMPTS:
+                    job_queue.retry_later(job["id"], message)
+                else:
+                    job_queue.finish(job["id"], FAILED, message)
+                print(f"❌ Job {job['id']}: {message}")
+            finally:
+                current["job_id"] = None
+                idle_since = time.time()
+    finally:
+        stop.set()
+        job_queue.unregister(worker_id)
+
+def worker_spans_path(jobs_dir: str = JOBS_DIR) -> str:
+    """
+    JSON span log shared by the workers of a queue (see `rag.telemetry.read_span_log`).
+    """
+    return os.path.join(jobs_dir, WORKER_SPANS_FILE)
+
+# ============================================================================= #
+def ensure_workers(count: int = JOB_WORKERS, jobs_dir: str = JOBS_DIR) -> int:
+    """
+    Starts worker processes until `count` are alive. Workers are detached from the
+    caller (e.g. Streamlit), so reruns, refreshes and app restarts do not stop them.
+
+    Returns:
+        int: Number of workers started now.
+    """
+    job_queue = JobQueue(jobs_dir)
+    missing = max(0, count - job_queue.live_workers())
+
+    log = open(os.path.join(jobs_dir, "worker.log"), "a", encoding="utf-8")
+    for _ in range(missing):
+        process = subprocess.Popen(
+            [sys.executable, "-m", "rag.job_queue", "worker", "--jobs-dir", jobs_dir],
+            stdout=log, stderr=subprocess.STDOUT, start_new_session=True,
+        )
+        # Registra o worker antes de ele subir, para reruns seguidos não iniciarem workers a mais
+        job_queue.heartbeat(worker_name(process.pid), pid=process.pid)
+    log.close()
+    return missing
+
+# ============================================================================= #
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fila de ingestão em segundo plano.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    worker = subparsers.add_parser("worker", help="Processa os jobs da fila.")
+    worker.add_argument("--jobs-dir", default=JOBS_DIR)
+    worker.add_argument("--idle-exit", type=float, default=JOB_WORKER_IDLE_EXIT, help="Segundos ociosos até encerrar (0 = nunca).")
+
+    enqueue = subparsers.add_parser("enqueue", help="Adiciona PDFs à fila.")
+    enqueue.add_argument("pdfs", nargs="+")
+    enqueue.add_argument("--collection", default=None, help="Coleção de destino (padrão: default).")
+    enqueue.add_argument("--jobs-dir", default=JOBS_DIR)
+
+    status = subparsers.add_parser("status", help="Lista os jobs.")
+    status.add_argument("--jobs-dir", default=JOBS_DIR)
+    args = parser.parse_args()
+
+    if args.command == "worker":
+        run_worker(args.jobs_dir, idle_exit=args.idle_exit)
+    elif args.command == "enqueue":
+        job_queue = JobQueue(args.jobs_dir)
+        for pdf_path in args.pdfs:
+            options = {"collection": args.collection} if args.collection else {}
+            print(f"📥 {job_queue.enqueue(pdf_path, os.path.basename(pdf_path), **options)}: {pdf_path}")
+    else:
+        for job in JobQueue(args.jobs_dir).list_jobs():
+            print(f"{job['id']}  {job['status']:<8} {job['stage'] or '-':<12} {job['source']}  {job['message'] or ''}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+# ============================================================================= #
+# Project: Multimodal RAG Pipeline
+# Develop by: Thiago Piovesan
+# Description: BM25 inverted index (memory-mapped segments)
+# Date: 2026-01-08 // YYYY-MM-DD
+# Version: 0.1.0
+# License: MIT
+# ============================================================================= #
+# Libs Importation:
+import os
+import re
+from collections import Counter
+
+import numpy as np
+
+from rag.metadata_index import test_bits
+
+# ============================================================================= #
+LEXICAL_DIR = "lexical"
+TERM_BYTES = 32             # Termos maiores são truncados (o vocabulário tem largura fixa)
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Mantém juntos valores como "3.1", "gpt-4", "v2.5" e também indexa as partes
+_TOKEN_RE = re.compile(r"\w+(?:[.\-/]\w+)*")
+_SPLIT_RE = re.compile(r"[.\-/]")
+
+# ============================================================================= #
+def tokenize(text: str) -> list[str]:
+    """
+    Lower-cases and splits a text into BM25 terms. Compound tokens such as
+    section numbers or model names are kept whole and also split into parts.
+
+    Args:
+        text (str): The text.
+
+    Returns:
+        list[str]: The terms.
+    """
+    terms = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        terms.append(token)
+        parts = _SPLIT_RE.split(token)
+        if len(parts) > 1:
+            terms.extend(part for part in parts if part)
+    return terms
+
+def _encode_term(term: str) -> bytes:
+    return term.encode("utf-8")[:TERM_BYTES]
+
+# ============================================================================= #
+def build_segment(segment_path: str, doc_ids: list[str], texts: list[str]) -> None:
+    """
+    Writes the inverted index of one shard as flat numpy arrays:
+    sorted vocabulary, posting offsets, posting doc ordinals and term frequencies,
+    document lengths and the ordinal -> document id table.
+
+    Args:
+        segment_path (str): Output directory.
+        doc_ids (list[str]): Docstore id of each document.
+        texts (list[str]): Text of each document.
+    """
+    postings = {}
+    doc_len = np.zeros(len(texts), dtype=np.int32)
+
+    for ordinal, text in enumerate(texts):
+        counts = Counter(_encode_term(term) for term in tokenize(text))
+        doc_len[ordinal] = sum(counts.values())
+        for term, tf in counts.items():
+            postings.setdefault(term, []).append((ordinal, tf))
+
+    vocabulary = sorted(postings)
+    offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+    for i, term in enumerate(vocabulary):
+        offsets[i + 1] = offsets[i] + len(postings[term])
+
+    docs = np.empty(offsets[-1], dtype=np.int32)
+    tfs = np.empty(offsets[-1], dtype=np.float32)
+    for i, term in enumerate(vocabulary):
+        entries = postings[term]
+        docs[offsets[i]:offsets[i + 1]] = [ordinal for ordinal, _ in entries]
+        tfs[offsets[i]:offsets[i + 1]] = [tf for _, tf in entries]
+
+    # ---------------------------------------------------------------------------- #
+    tmp_path = f"{segment_path}.tmp"
+    os.makedirs(tmp_path, exist_ok=True)
+    np.save(os.path.join(tmp_path, "terms.npy"), np.array(vocabulary, dtype=f"S{TERM_BYTES}"))
+    np.save(os.path.join(tmp_path, "offsets.npy"), offsets)
+    np.save(os.path.join(tmp_path, "docs.npy"), docs)
+    np.save(os.path.join(tmp_path, "tfs.npy"), tfs)
+    np.save(os.path.join(tmp_path, "doc_len.npy"), doc_len)
+    id_bytes = [doc_id.encode("utf-8") for doc_id in doc_ids]
+    np.save(os.path.join(tmp_path, "doc_ids.npy"), np.array(id_bytes, dtype=f"S{max(map(len, id_bytes), default=1)}"))
+
+    os.replace(tmp_path, segment_path)
+
+# ============================================================================= #
+class LexicalSegment:
+    """
+    Read-only BM25 segment of one shard. Arrays are memory-mapped, so a lookup only
+    touches the postings of the query terms.
+    """
+
+    def __init__(self, segment_path: str):
+        def _load(name):
+            return np.load(os.path.join(segment_path, name), mmap_mode="r")
+
+        self.terms = _load("terms.npy")
+        self.offsets = _load("offsets.npy")
+        self.docs = _load("docs.npy")
+        self.tfs = _load("tfs.npy")
+        self.doc_len = _load("doc_len.npy")
+        self.doc_ids = _load("doc_ids.npy")
+
+        self.num_docs = len(self.doc_len)
+        self.total_len = int(self.doc_len.sum()) if self.num_docs else 0
+
+    # ---------------------------------------------------------------------------- #
+    def postings(self, term: bytes) -> tuple[np.ndarray, np.ndarray] | None:
+        if not len(self.terms):
+            return None
+
+        # Busca binária no vocabulário ordenado
+        i = int(np.searchsorted(self.terms, term))
+        if i >= len(self.terms) or self.terms[i] != term:
+            return None
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return self.docs[start:end], self.tfs[start:end]
+
+    # ---------------------------------------------------------------------------- #
+    def score(self, term_idf: dict, avgdl: float) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Scores the documents that contain at least one query term.
+
+        Args:
+            term_idf (dict): Encoded term -> global IDF.
+            avgdl (float): Global average document length.
+
+        Returns:
+            tuple: (doc ordinals, BM25 scores).
+        """
+        all_docs, all_scores = [], []
+        for term, idf in term_idf.items():
+            found = self.postings(term)
+            if found is None:
+                continue
+            docs, tfs = found
+            dl = self.doc_len[docs]
+            all_docs.append(np.asarray(docs))
+            all_scores.append(idf * tfs * (BM25_K1 + 1) / (tfs + BM25_K1 * (1 - BM25_B + BM25_B * dl / avgdl)))
+
+        if not all_docs:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+
+        docs, inverse = np.unique(np.concatenate(all_docs), return_inverse=True)
+        return docs, np.bincount(inverse, weights=np.concatenate(all_scores))
+
+# ============================================================================= #
+def bm25_search(segments: dict, query: str, k: int, deleted: frozenset = frozenset(),
+                allowed: dict | None = None) -> list[tuple[str, str, float]]:
+    """
+    BM25 search over several segments with corpus-wide statistics.
+
+    Args:
+        segments (dict): Shard name -> LexicalSegment.
+        query (str): The query text.
+        k (int): Number of hits.
+        deleted (frozenset): Tombstoned document ids to skip.
+        allowed (dict | None): Shard name -> packed bitmap of the ordinals that may match (metadata filter).
+
+    Returns:
+        list[tuple[str, str, float]]: (shard name, document id, score), best first.
+    """
+    terms = {_encode_term(term) for term in tokenize(query)}
+    num_docs = sum(segment.num_docs for segment in segments.values())
+    if not terms or not num_docs:
+        return []
+
+    avgdl = max(sum(segment.total_len for segment in segments.values()) / num_docs, 1.0)
+
+    # IDF global (soma do df de todos os segmentos)
+    term_idf = {}
+    for term in terms:
+        df = 0
+        for segment in segments.values():
+            found = segment.postings(term)
+            df += len(found[0]) if found is not None else 0
+        if df:
+            term_idf[term] = float(np.log(1 + (num_docs - df + 0.5) / (df + 0.5)))
+
+    # ---------------------------------------------------------------------------- #
+    hits = []
+    for name, segment in segments.items():
+        docs, scores = segment.score(term_idf, avgdl)
+        if allowed is not None and len(docs):
+            keep = test_bits(allowed[name], docs)
+            docs, scores = docs[keep], scores[keep]
+        if not len(docs):
+            continue
+
+        found = 0
+        for i in np.argsort(-scores):
+            doc_id = segment.doc_ids[int(docs[i])].decode("utf-8")
+            if doc_id in deleted:
+                continue
+            hits.append((name, doc_id, float(scores[i])))
+            found += 1
+            if found == k:
+                break
+
+    hits.sort(key=lambda hit: -hit[2])
+    return hits[:k]
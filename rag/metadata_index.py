@@ -0,0 +1,225 @@
+# ============================================================================= #
+# Project: Multimodal RAG Pipeline
+# Develop by: Thiago Piovesan
+# Description: Precomputed metadata bitmaps (type / source / pages) for filtered search
+# Date: 2026-01-08 // YYYY-MM-DD
+# Version: 0.1.0
+# License: MIT
+# ============================================================================= #
+# Libs Importation:
+import os
+import json
+from dataclasses import dataclass
+
+import numpy as np
+
+# ============================================================================= #
+METADATA_DIR = "metadata"
+FACET_FIELDS = ("type", "source")   # Um bitmap por valor de cada campo
+PAGE_INDEX_FILE = "page_index.npy"
+
+# ============================================================================= #
+@dataclass
+class MetadataFilter:
+    """
+    Metadata restrictions of a search. Empty fields do not restrict anything;
+    `types` and `sources` match case-insensitively (a source also matches without
+    its file extension) and the page range keeps chunks that overlap it. A type matches
+    the chunk type and the types of the elements merged into it (`element_types`), so
+    'NarrativeText' also finds the 'CompositeElement' chunks that contain narrative text.
+    """
+    types: list[str] | None = None
+    sources: list[str] | None = None
+    page_min: int | None = None
+    page_max: int | None = None
+
+    # ---------------------------------------------------------------------------- #
+    @property
+    def is_empty(self) -> bool:
+        return not self.types and not self.sources and self.page_min is None and self.page_max is None
+
+    def key(self) -> tuple:
+        return (
+            tuple(sorted(value.lower() for value in self.types or ())),
+            tuple(sorted(value.lower() for value in self.sources or ())),
+            self.page_min,
+            self.page_max,
+        )
+
+# ============================================================================= #
+def _doc_values(doc, field: str) -> list:
+    value = doc.metadata.get(field)
+    values = [] if value is None else [value]
+    if field == "type":
+        values.extend(doc.metadata.get("element_types") or ())
+    return values
+
+def build_page_index(pages: np.ndarray) -> np.ndarray:
+    """
+    Sorts the documents by first and by last page, so a page range is resolved by
+    binary search: rows are (ordinals by first page, first pages sorted, ordinals by
+    last page, last pages sorted).
+    """
+    by_first = np.argsort(pages[:, 0], kind="stable")
+    by_last = np.argsort(pages[:, 1], kind="stable")
+    return np.stack([by_first, pages[by_first, 0], by_last, pages[by_last, 1]]).astype(np.int32)
+
+def build_metadata_index(index_path: str, documents: list) -> None:
+    """
+    Writes the metadata index of one shard: for each facet field, one packed bitmap
+    (bit i = ordinal i) per distinct value, plus the first/last page of each document
+    and the page index (see `build_page_index`).
+
+    Args:
+        index_path (str): Output directory.
+        documents (list[tuple[str, Document]]): (doc_id, Document) in index order.
+    """
+    n = len(documents)
+    values = {field: {} for field in FACET_FIELDS}
+    pages = np.full((n, 2), -1, dtype=np.int32)
+
+    for ordinal, (_, doc) in enumerate(documents):
+        for field in FACET_FIELDS:
+            for value in dict.fromkeys(_doc_values(doc, field)):
+                values[field].setdefault(str(value), []).append(ordinal)
+
+        page = doc.metadata.get("page")
+        if page is not None:
+            pages[ordinal] = (int(page), int(doc.metadata.get("page_end") or page))
+
+    # ---------------------------------------------------------------------------- #
+    tmp_path = f"{index_path}.tmp"
+    os.makedirs(tmp_path, exist_ok=True)
+    for field in FACET_FIELDS:
+        masks = np.zeros((len(values[field]), n), dtype=bool)
+        for row, ordinals in enumerate(values[field].values()):
+            masks[row, ordinals] = True
+        np.save(os.path.join(tmp_path, f"{field}.npy"), np.packbits(masks, axis=1, bitorder="little"))
+    np.save(os.path.join(tmp_path, "pages.npy"), pages)
+    np.save(os.path.join(tmp_path, PAGE_INDEX_FILE), build_page_index(pages))
+    with open(os.path.join(tmp_path, "values.json"), "w", encoding="utf-8") as f:
+        json.dump({field: list(values[field]) for field in FACET_FIELDS}, f, ensure_ascii=False)
+
+    os.replace(tmp_path, index_path)
+
+# ============================================================================= #
+def _matches(value: str, wanted: set) -> bool:
+    value = value.lower()
+    return value in wanted or os.path.splitext(value)[0] in wanted
+
+def clear_bits(bitmap: np.ndarray, ordinals: np.ndarray) -> None:
+    """
+    Clears the bits of `ordinals` in a packed (little-endian) bitmap, in place.
+    """
+    ordinals = np.asarray(ordinals, dtype=np.int64)
+    np.bitwise_and.at(bitmap, ordinals >> 3, ~np.left_shift(1, ordinals & 7).astype(np.uint8))
+
+def set_bits(bitmap: np.ndarray, ordinals: np.ndarray) -> None:
+    """
+    Sets the bits of `ordinals` in a packed (little-endian) bitmap, in place.
+    """
+    ordinals = np.asarray(ordinals, dtype=np.int64)
+    np.bitwise_or.at(bitmap, ordinals >> 3, np.left_shift(1, ordinals & 7).astype(np.uint8))
+
+def test_bits(bitmap: np.ndarray, ordinals: np.ndarray) -> np.ndarray:
+    """
+    Returns, for each ordinal, whether its bit is set in a packed (little-endian) bitmap.
+    """
+    ordinals = np.asarray(ordinals, dtype=np.int64)
+    return ((bitmap[ordinals >> 3] >> (ordinals & 7)) & 1).astype(bool)
+
+# ============================================================================= #
+class MetadataIndex:
+    """
+    Read-only metadata index of one shard. Bitmaps are memory-mapped; resolving a
+    filter ORs the bitmaps of the wanted values and ANDs the fields together, so its
+    cost does not depend on how many documents match. Page ranges are resolved by
+    binary search over the page index, touching only the documents on the more
+    selective side of the range.
+    """
+
+    def __init__(self, index_path: str):
+        with open(os.path.join(index_path, "values.json"), encoding="utf-8") as f:
+            self.values = json.load(f)
+        self.bitmaps = {
+            field: np.load(os.path.join(index_path, f"{field}.npy"), mmap_mode="r") for field in FACET_FIELDS
+        }
+        self.pages = np.load(os.path.join(index_path, "pages.npy"), mmap_mode="r")
+        self.num_docs = len(self.pages)
+
+        page_index_path = os.path.join(index_path, PAGE_INDEX_FILE)
+        if os.path.exists(page_index_path):
+            self.page_index = np.load(page_index_path, mmap_mode="r")
+        else:
+            # Shards gravados antes do índice de páginas: montado em memória
+            self.page_index = build_page_index(np.asarray(self.pages))
+
+    # ---------------------------------------------------------------------------- #
+    def page_bitmap(self, page_min: int | None, page_max: int | None) -> np.ndarray:
+        """
+        Packed bitmap of the documents whose page span overlaps [page_min, page_max]
+        (documents without a page never match).
+        """
+        by_first, first_pages, by_last, last_pages = self.page_index
+        page_min = max(page_min or 0, 0)
+        page = first_pages.dtype.type    # Mesmo dtype do índice: a busca não converte o array inteiro
+
+        # Primeira página entre 0 e page_max; última página >= page_min
+        first_start = np.searchsorted(first_pages, page(0), side="left")
+        first_end = len(first_pages) if page_max is None else np.searchsorted(first_pages, page(page_max), side="right")
+        last_start = np.searchsorted(last_pages, page(page_min), side="left")
+
+        # Intervalo largo: uma varredura vetorizada das páginas sai mais barata que marcar bit a bit
+        if 8 * min(first_end - first_start, len(last_pages) - last_start) > self.num_docs:
+            in_range = (self.pages[:, 0] >= 0) & (self.pages[:, 1] >= page_min)
+            if page_max is not None:
+                in_range &= self.pages[:, 0] <= page_max
+            return np.packbits(in_range, bitorder="little")
+
+        # Percorre só o lado mais seletivo e confere o outro limite nesses documentos
+        if first_end - first_start <= len(last_pages) - last_start:
+            ordinals = np.asarray(by_first[first_start:first_end])
+            ordinals = ordinals[self.pages[ordinals, 1] >= page_min]
+        else:
+            ordinals = np.asarray(by_last[last_start:])
+            first = self.pages[ordinals, 0]
+            keep = first >= 0
+            if page_max is not None:
+                keep &= first <= page_max
+            ordinals = ordinals[keep]
+
+        bitmap = np.zeros((self.num_docs + 7) // 8, dtype=np.uint8)
+        set_bits(bitmap, ordinals)
+        return bitmap
+
+    # ---------------------------------------------------------------------------- #
+    def bitmap(self, metadata_filter: MetadataFilter) -> np.ndarray:
+        """
+        Resolves a filter into a packed bitmap of the allowed ordinals (a new array the
+        caller may modify).
+
+        Args:
+            metadata_filter (MetadataFilter): The filter.
+
+        Returns:
+            np.ndarray: uint8 bitmap of `ceil(num_docs / 8)` bytes, bit i = ordinal i.
+        """
+        allowed = np.full((self.num_docs + 7) // 8, 0xFF, dtype=np.uint8)
+
+        for field, wanted in (("type", metadata_filter.types), ("source", metadata_filter.sources)):
+            if not wanted:
+                continue
+            wanted = {value.lower() for value in wanted}
+            rows = [row for row, value in enumerate(self.values[field]) if _matches(value, wanted)]
+            if not rows:
+                return np.zeros_like(allowed)
+            allowed &= np.bitwise_or.reduce(self.bitmaps[field][rows], axis=0)
+
+        if metadata_filter.page_min is not None or metadata_filter.page_max is not None:
+            # O chunk entra se o seu intervalo de páginas cruza o intervalo pedido
+            allowed &= self.page_bitmap(metadata_filter.page_min, metadata_filter.page_max)
+
+        # Bits além do último documento ficam zerados
+        if self.num_docs % 8:
+            allowed[-1] &= (1 << (self.num_docs % 8)) - 1
+        return allowed
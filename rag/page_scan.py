@@ -0,0 +1,140 @@
+# ============================================================================= #
+# Project: Multimodal RAG Pipeline
+# Develop by: Thiago Piovesan
+# Description: Cheap per-page scan that decides where hi_res partitioning is needed
+# Date: 2026-01-08 // YYYY-MM-DD
+# Version: 0.1.0
+# License: MIT
+# ============================================================================= #
+# Libs Importation:
+import os
+import re
+from dataclasses import dataclass, field
+
+from rag.image_preprocessing import IMAGE_MIN_SIDE
+
+# ============================================================================= #
+PAGE_MIN_TEXT_CHARS = int(os.getenv("PAGE_MIN_TEXT_CHARS", "50"))      # Menos que isso: sem camada de texto (OCR)
+TABLE_MIN_ROWS = int(os.getenv("TABLE_MIN_ROWS", "4"))                 # Linhas com 3+ colunas alinhadas
+TABLE_MIN_RULES = int(os.getenv("TABLE_MIN_RULES", "12"))              # Retângulos/linhas desenhados (bordas de tabela)
+
+_RULE_RE = re.compile(rb"(?:\sre|\s[lm]\s+[-\d.]+\s+[-\d.]+\s+l)\s")
+_INLINE_IMAGE_RE = re.compile(rb"\sBI\s")
+
+# ============================================================================= #
+@dataclass
+class PageScan:
+    page_number: int
+    text_chars: int = 0
+    images: int = 0
+    table_rows: int = 0
+    rules: int = 0
+    reasons: list = field(default_factory=list)
+
+    @property
+    def needs_hi_res(self) -> bool:
+        return bool(self.reasons)
+
+# ============================================================================= #
+def _count_images(resources, depth: int = 0) -> int:
+    # Imagens (XObject) grandes o bastante para serem descritas, inclusive dentro de Forms
+    xobjects = (resources or {}).get("/XObject") or {}
+    count = 0
+    for xobject in xobjects.values():
+        xobject = xobject.get_object()
+        subtype = xobject.get("/Subtype")
+        if subtype == "/Image":
+            if min(int(xobject.get("/Width", 0)), int(xobject.get("/Height", 0))) >= IMAGE_MIN_SIDE:
+                count += 1
+        elif subtype == "/Form" and depth < 2:
+            count += _count_images(xobject.get("/Resources"), depth + 1)
+    return count
+
+def _count_table_rows(runs: list[tuple[float, float, float]]) -> int:
+    """
+    Counts text lines split into 3+ columns by wide gaps (typical of table rows).
+    `runs` are (x, y, width) of the text runs of a page.
+    """
+    lines = {}
+    for x, y, width in runs:
+        lines.setdefault(round(y / 3), []).append((x, x + width))
+
+    table_rows = 0
+    for spans in lines.values():
+        spans.sort()
+        columns, end = 1, spans[0][1]
+        for start, stop in spans[1:]:
+            if start - end > 12:     # ~ 3 espaços em fonte de 10pt
+                columns += 1
+            end = max(end, stop)
+        table_rows += columns >= 3
+    return table_rows
+
+# ============================================================================= #
+def scan_page(page, page_number: int) -> PageScan:
+    """
+    Looks at one `pypdf` page without rendering it: text layer size, embedded images,
+    column-aligned text rows and drawn rules. Any of them flags the page for hi_res.
+    """
+    scan = PageScan(page_number)
+    runs = []
+
+    def _visitor(text, cm, tm, font_dict, font_size):
+        if not text.strip():
+            return
+        scan.text_chars += len(text.strip())
+        # Posição na página (matriz de texto x matriz de transformação)
+        x = tm[4] * cm[0] + tm[5] * cm[2] + cm[4]
+        y = tm[4] * cm[1] + tm[5] * cm[3] + cm[5]
+        size = (font_size or 10) * (abs(tm[0] * cm[0]) or 1)
+        runs.append((x, y, len(text) * size * 0.5))
+
+    page.extract_text(visitor_text=_visitor)
+    scan.images = _count_images(page.get("/Resources"))
+    scan.table_rows = _count_table_rows(runs)
+
+    contents = page.get_contents()
+    data = contents.get_data() if contents is not None else b""
+    scan.rules = len(_RULE_RE.findall(data))
+    scan.images += len(_INLINE_IMAGE_RE.findall(data))
+
+    # ---------------------------------------------------------------------------- #
+    if scan.text_chars < PAGE_MIN_TEXT_CHARS:
+        scan.reasons.append("no_text_layer")
+    if scan.images:
+        scan.reasons.append("images")
+    if scan.table_rows >= TABLE_MIN_ROWS or scan.rules >= TABLE_MIN_RULES:
+        scan.reasons.append("table")
+    return scan
+
+def scan_pdf(pdf_path: str) -> list[PageScan]:
+    """
+    Scans every page of a PDF (see `scan_page`).
+
+    Args:
+        pdf_path (str): Path of the PDF file.
+
+    Returns:
+        list[PageScan]: One scan per page, in page order.
+    """
+    from pypdf import PdfReader
+
+    reader = PdfReader(pdf_path)
+    return [scan_page(page, i) for i, page in enumerate(reader.pages, start=1)]
+
+# ============================================================================= #
+def page_runs(scans: list[PageScan], max_pages: int) -> list[tuple[str, int, int]]:
+    """
+    Groups consecutive pages with the same strategy into runs of at most `max_pages`.
+
+    Returns:
+        list[tuple]: (strategy, first page, last page) in page order; strategy is "hi_res" or "fast".
+    """
+    runs = []
+    for scan in scans:
+        strategy = "hi_res" if scan.needs_hi_res else "fast"
+        if runs and runs[-1][0] == strategy and scan.page_number - runs[-1][1] < max_pages:
+            runs[-1] = (strategy, runs[-1][1], scan.page_number)
+        else:
+            runs.append((strategy, scan.page_number, scan.page_number))
+    return runs
@@ -0,0 +1,134 @@
+# ============================================================================= #
+# Project: Multimodal RAG Pipeline
+# Develop by: Thiago Piovesan
+# Description: Exact + semantic cache for repeated questions
+# Date: 2026-01-08 // YYYY-MM-DD
+# Version: 0.1.0
+# License: MIT
+# ============================================================================= #
+# Libs Importation:
+import re
+import time
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# ============================================================================= #
+def normalize_query(query: str) -> str:
+    """
+    Lower-cases, collapses whitespace and drops trailing punctuation.
+    """
+    return re.sub(r"\s+", " ", query.strip().lower()).rstrip("?!.;: ")
+
+# ============================================================================= #
+class QueryCache:
+    """
+    Two-level, in-process cache keyed by the query text:
+    1. exact match on the normalized query (no embedding needed);
+    2. similarity match, only when `threshold` is set: the query embedding is compared
+       (cosine) to the cached ones and the closest entry is reused if it is above it.
+
+    Entries expire after `ttl_seconds`, the least recently used are evicted beyond
+    `max_entries`, and everything is dropped when the index generation changes.
+    """
+
+    def __init__(self, embed_query, threshold: float | None = None,
+                 max_entries: int = 1024, ttl_seconds: float = 3600.0):
+        self.embed_query = embed_query
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self.generation = None
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()   # consulta normalizada -> (criado em, vetor, valor)
+        self._lock = threading.Lock()
+
+    # ---------------------------------------------------------------------------- #
+    def _embed(self, key: str) -> np.ndarray:
+        vector = np.asarray(self.embed_query(key), dtype=np.float32)
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    def _check_generation(self, generation) -> None:
+        # Novo índice (ingestão/remoção): respostas antigas podem estar erradas
+        if generation != self.generation:
+            self._entries.clear()
+            self.generation = generation
+
+    # ---------------------------------------------------------------------------- #
+    def get(self, query: str, generation=None):
+        """
+        Looks up a query.
+
+        Args:
+            query (str): The query text.
+            generation: Current index generation; a different value clears the cache.
+
+        Returns:
+            The cached value, or None.
+        """
+        key = normalize_query(query)
+        now = time.time()
+
+        with self._lock:
+            self._check_generation(generation)
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] <= self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.exact_hits += 1
+                return entry[2]
+            if not self._entries or self.threshold is None:
+                self.misses += 1
+                return None
+
+        # ---------------------------------------------------------------------------- #
+        vector = self._embed(key)
+
+        with self._lock:
+            if generation != self.generation:
+                return None
+            live = [(k, e) for k, e in self._entries.items() if now - e[0] <= self.ttl_seconds]
+            if live:
+                similarities = np.stack([e[1] for _, e in live]) @ vector
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    best_key, best_entry = live[best]
+                    self._entries.move_to_end(best_key)
+                    self.semantic_hits += 1
+                    return best_entry[2]
+            self.misses += 1
+            return None
+
+    # ---------------------------------------------------------------------------- #
+    def put(self, query: str, value, generation=None) -> None:
+        """
+        Stores a value. Values computed against an older index generation are dropped.
+        """
+        key = normalize_query(query)
+        vector = self._embed(key) if self.threshold is not None else None
+
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[key] = (time.time(), vector, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    # ---------------------------------------------------------------------------- #
+    def stats(self) -> dict:
+        total = self.exact_hits + self.semantic_hits + self.misses
+        return {
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": (self.exact_hits + self.semantic_hits) / total if total else 0.0,
+            "entries": len(self._entries),
+        }
@@ -0,0 +1,302 @@
+# ============================================================================= #
+# Project: Multimodal RAG Pipeline
+# Develop by: Thiago Piovesan
+# Description: Memory-mapped shard (FAISS file + SQLite docstore)
+# Date: 2026-01-08 // YYYY-MM-DD
+# Version: 0.1.0
+# License: MIT
+# ============================================================================= #
+# Libs Importation:
+import os
+import json
+import sqlite3
+import tempfile
+import threading
+from urllib.parse import quote
+
+import faiss
+import numpy as np
+from langchain_core.documents import Document
+
+from rag.ann_index import IndexConfig, apply_search_params, index_vectors, search_parameters
+from rag.lexical_index import LEXICAL_DIR, build_segment
+from rag.metadata_index import METADATA_DIR, MetadataIndex, build_metadata_index
+
+# ============================================================================= #
+INDEX_FILE = "index.faiss"
+DOCSTORE_FILE = "docstore.sqlite"
+PICKLE_FILE = "index.pkl"           # Docstore antigo (save_local do LangChain)
+VECTORS_FILE = "vectors.npy"        # Vetores originais (só para índices não-Flat)
+
+# Flat/HNSW: mapeia os vetores direto do arquivo (sem cópia); IVF: mapeia as listas invertidas
+MMAP_FLAGS = faiss.IO_FLAG_MMAP | getattr(faiss, "IO_FLAG_MMAP_IFC", 0) | faiss.IO_FLAG_READ_ONLY
+IVF_MMAP_FLAGS = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+
+# ============================================================================= #
+def read_index_mmap(path: str) -> faiss.Index:
+    """
+    Opens a FAISS index file memory-mapped instead of copying it into RAM.
+    """
+    try:
+        return faiss.read_index(path, MMAP_FLAGS)
+    except RuntimeError:
+        # Índices IVF não aceitam as duas formas de mmap juntas
+        return faiss.read_index(path, IVF_MMAP_FLAGS)
+
+# ============================================================================= #
+class SqliteDocstore:
+    """
+    Read-only documents of one shard, keyed by their ordinal in the FAISS index.
+    Nothing is loaded up front: texts and metadata are read only for the hits being
+    returned, and the file pages are shared between processes through the OS cache.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._uri = f"file:{quote(os.path.abspath(path))}?mode=ro&immutable=1"
+        self._local = threading.local()
+
+    # ---------------------------------------------------------------------------- #
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._uri, uri=True, check_same_thread=False)
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _to_document(doc_id: str, page_content: str, metadata: str) -> Document:
+        return Document(id=doc_id, page_content=page_content, metadata=json.loads(metadata))
+
+    # ---------------------------------------------------------------------------- #
+    @staticmethod
+    def write(path: str, documents) -> None:
+        """
+        Writes a docstore file from (doc_id, Document) pairs given in index order.
+        """
+        # Arquivo temporário exclusivo: duas escritas simultâneas não apagam uma a outra
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=f"{os.path.basename(path)}.", suffix=".tmp")
+        os.close(fd)
+
+        try:
+            conn = sqlite3.connect(tmp_path)
+            conn.execute("PRAGMA journal_mode=OFF")
+            conn.execute("""
+                CREATE TABLE docs (
+                    ordinal INTEGER PRIMARY KEY,
+                    id TEXT NOT NULL UNIQUE,
+                    page_content TEXT NOT NULL,
+                    metadata TEXT NOT NULL
+                )
+            """)
+            conn.executemany("INSERT INTO docs VALUES (?, ?, ?, ?)", (
+                (ordinal, doc_id, doc.page_content, json.dumps(doc.metadata, ensure_ascii=False, default=str))
+                for ordinal, (doc_id, doc) in enumerate(documents)
+            ))
+            conn.commit()
+            conn.close()
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        os.replace(tmp_path, path)
+
+    # ---------------------------------------------------------------------------- #
+    def search(self, doc_id: str) -> Document | None:
+        row = self._connect().execute(
+            "SELECT id, page_content, metadata FROM docs WHERE id = ?", (doc_id,)
+        ).fetchone()
+        return self._to_document(*row) if row else None
+
+    def ids_by_ordinal(self, ordinals: list[int]) -> dict:
+        return self._select("SELECT ordinal, id FROM docs WHERE ordinal IN ({})", ordinals)
+
+    def documents_by_ordinal(self, ordinals: list[int]) -> dict:
+        rows = self._select("SELECT ordinal, id, page_content, metadata FROM docs WHERE ordinal IN ({})", ordinals, pairs=False)
+        return {row[0]: self._to_document(*row[1:]) for row in rows}
+
+    def ordinal_by_id(self, doc_ids) -> dict:
+        return self._select("SELECT id, ordinal FROM docs WHERE id IN ({})", list(doc_ids))
+
+    def ordinals_by_id(self, doc_ids) -> np.ndarray:
+        rows = self._select("SELECT ordinal FROM docs WHERE id IN ({})", list(doc_ids), pairs=False)
+        return np.array(sorted(ordinal for (ordinal,) in rows), dtype=np.int64)
+
+    def count_ids(self, doc_ids) -> int:
+        return sum(count for (count,) in self._select("SELECT COUNT(*) FROM docs WHERE id IN ({})", list(doc_ids), pairs=False))
+
+    def _select(self, query: str, values: list, pairs: bool = True):
+        conn = self._connect()
+        rows = []
+        # SQLite limita o número de parâmetros por consulta
+        for start in range(0, len(values), 500):
+            chunk = values[start:start + 500]
+            rows.extend(conn.execute(query.format(",".join("?" * len(chunk))), chunk).fetchall())
+        return dict(rows) if pairs else rows
+
+    # ---------------------------------------------------------------------------- #
+    def ids(self) -> list[str]:
+        return [row[0] for row in self._connect().execute("SELECT id FROM docs ORDER BY ordinal")]
+
+    def iter_documents(self):
+        """
+        Yields (doc_id, Document) in index order, streaming from disk.
+        """
+        cursor = self._connect().execute("SELECT id, page_content, metadata FROM docs ORDER BY ordinal")
+        for row in cursor:
+            yield row[0], self._to_document(*row)
+
+    def __len__(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+# ============================================================================= #
+class Shard:
+    """
+    One immutable shard on disk: a memory-mapped FAISS index, its SQLite docstore, its
+    BM25 segment and its metadata bitmaps. Opening a shard costs a few system calls
+    regardless of its size and never writes to its directory.
+    """
+
+    def __init__(self, shard_path: str, config: IndexConfig):
+        self.path = shard_path
+        self.config = config
+
+        # Só leitura: shards antigos são atualizados antes, por `upgrade_shard`
+        self.index = read_index_mmap(os.path.join(shard_path, INDEX_FILE))
+        apply_search_params(self.index, config)
+        self.docstore = SqliteDocstore(os.path.join(shard_path, DOCSTORE_FILE))
+        self.metadata = MetadataIndex(os.path.join(shard_path, METADATA_DIR))
+
+    # ---------------------------------------------------------------------------- #
+    @property
+    def ntotal(self) -> int:
+        return self.index.ntotal
+
+    def search(self, vector: np.ndarray, k: int, allowed: np.ndarray | None = None) -> list[tuple[int, float]]:
+        """
+        Returns (ordinal, L2 distance) of the k nearest vectors; documents are not read.
+
+        Args:
+            vector (np.ndarray): The query vector.
+            k (int): Number of neighbours.
+            allowed (np.ndarray | None): Packed bitmap of the ordinals that may be returned.
+                It is applied inside the FAISS search, so k hits come back whenever k
+                documents are allowed.
+        """
+        query = np.asarray(vector, dtype=np.float32).reshape(1, -1)
+        if allowed is None:
+            distances, ordinals = self.index.search(query, k)
+            return [(int(i), float(d)) for i, d in zip(ordinals[0], distances[0]) if i != -1]
+
+        candidates = np.flatnonzero(np.unpackbits(allowed, count=self.ntotal, bitorder="little"))
+        k = min(k, len(candidates))
+        if not k:
+            return []
+
+        # `allowed` precisa continuar vivo durante a busca (o seletor só guarda o ponteiro)
+        allowed = np.ascontiguousarray(allowed)
+        selector = faiss.IDSelectorBitmap(self.ntotal, faiss.swig_ptr(allowed))
+        distances, ordinals = self.index.search(query, k, params=search_parameters(self.index, self.config, selector))
+        hits = [(int(i), float(d)) for i, d in zip(ordinals[0], distances[0]) if i != -1]
+        if len(hits) == k:
+            return hits
+
+        # Índices aproximados (IVF/HNSW) podem não alcançar k vetores de um filtro muito
+        # seletivo: nesse caso a busca é exata sobre os vetores permitidos
+        vectors = np.asarray(self.vectors()[candidates], dtype=np.float32)
+        distances = ((vectors - query) ** 2).sum(axis=1)
+        best = np.argsort(distances)[:k]
+        return [(int(candidates[i]), float(distances[i])) for i in best]
+
+    def vectors(self) -> np.ndarray:
+        vectors_path = os.path.join(self.path, VECTORS_FILE)
+        if os.path.exists(vectors_path):
+            return np.load(vectors_path, mmap_mode="r")
+        # Índices Flat guardam os próprios vetores
+        return index_vectors(self.index)
+
+    def vectors_by_ordinal(self, ordinals: list[int]) -> np.ndarray:
+        """
+        Returns the stored vectors of a few ordinals without reading the whole shard.
+        """
+        if os.path.exists(os.path.join(self.path, VECTORS_FILE)):
+            return np.asarray(self.vectors()[np.asarray(ordinals, dtype=np.int64)], dtype=np.float32)
+        if not len(ordinals):
+            return np.empty((0, self.index.d), dtype=np.float32)
+        return np.stack([self.index.reconstruct(int(ordinal)) for ordinal in ordinals])
+
+# ============================================================================= #
+def write_shard(shard_path: str, index: faiss.Index, vectors: np.ndarray, documents: list[tuple[str, Document]]) -> None:
+    """
+    Writes a new shard directory: FAISS index, docstore, BM25 segment, metadata bitmaps and, for
+    trained (non-Flat) indexes, the raw vectors needed to rebuild it later.
+
+    Args:
+        shard_path (str): Directory of the shard.
+        index (faiss.Index): Index built over `vectors`.
+        vectors (np.ndarray): Vectors in index order.
+        documents (list[tuple[str, Document]]): (doc_id, Document) in index order.
+    """
+    os.makedirs(shard_path, exist_ok=True)
+    faiss.write_index(index, os.path.join(shard_path, INDEX_FILE))
+    if not isinstance(index, faiss.IndexFlat):
+        np.save(os.path.join(shard_path, VECTORS_FILE), np.asarray(vectors, dtype=np.float32))
+
+    SqliteDocstore.write(os.path.join(shard_path, DOCSTORE_FILE), documents)
+    build_segment(
+        os.path.join(shard_path, LEXICAL_DIR),
+        [doc_id for doc_id, _ in documents],
+        [doc.page_content for _, doc in documents],
+    )
+    build_metadata_index(os.path.join(shard_path, METADATA_DIR), documents)
+
+# ============================================================================= #
+def shard_needs_upgrade(shard_path: str) -> bool:
+    """
+    Tells whether a shard was written by an older version: pickled docstore, or no
+    BM25 segment or metadata bitmaps.
+    """
+    return not all(os.path.exists(os.path.join(shard_path, name)) for name in (DOCSTORE_FILE, LEXICAL_DIR, METADATA_DIR))
+
+def upgrade_shard(shard_path: str) -> None:
+    """
+    One-time upgrade of a shard written by an older version: converts the pickled
+    docstore to SQLite and builds the missing BM25 segment and metadata bitmaps.
+    Must run under the `ManifestLock` of the index, before the shard is opened.
+    """
+    convert_pickled_docstore(shard_path)
+
+    lexical_path = os.path.join(shard_path, LEXICAL_DIR)
+    metadata_path = os.path.join(shard_path, METADATA_DIR)
+    if os.path.exists(lexical_path) and os.path.exists(metadata_path):
+        return
+
+    documents = list(SqliteDocstore(os.path.join(shard_path, DOCSTORE_FILE)).iter_documents())
+    if not os.path.exists(lexical_path):
+        build_segment(lexical_path, [doc_id for doc_id, _ in documents], [doc.page_content for _, doc in documents])
+    if not os.path.exists(metadata_path):
+        build_metadata_index(metadata_path, documents)
+
+def convert_pickled_docstore(shard_path: str) -> None:
+    """
+    Converts a shard written by `FAISS.save_local` (pickled `index.pkl`) into the
+    SQLite docstore. `index.faiss` has the same format and is kept.
+    """
+    pickle_path = os.path.join(shard_path, PICKLE_FILE)
+    docstore_path = os.path.join(shard_path, DOCSTORE_FILE)
+    if os.path.exists(docstore_path) or not os.path.exists(pickle_path):
+        return
+
+    import pickle
+
+    with open(pickle_path, "rb") as f:
+        docstore, index_to_docstore_id = pickle.load(f)
+
+    documents = []
+    for ordinal in range(len(index_to_docstore_id)):
+        doc_id = index_to_docstore_id[ordinal]
+        doc = docstore.search(doc_id)
+        documents.append((doc_id, Document(id=doc_id, page_content=doc.page_content, metadata=doc.metadata)))
+
+    SqliteDocstore.write(docstore_path, documents)
+    os.remove(pickle_path)
+    print(f"📦 Docstore de '{os.path.basename(shard_path)}' convertido para SQLite ({len(documents)} documentos).")
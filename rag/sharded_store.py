@@ -0,0 +1,653 @@
+# ============================================================================= #
+# Project: Multimodal RAG Pipeline
+# Develop by: Thiago Piovesan
+# Description: Append-only, sharded FAISS persistence
+# Date: 2026-01-08 // YYYY-MM-DD
+# Version: 0.1.0
+# License: MIT
+# ============================================================================= #
+# Libs Importation:
+import os
+import json
+import time
+import uuid
+import shutil
+import threading
+
+import faiss
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from rag.ann_index import IndexConfig, build_index
+from rag.lexical_index import LEXICAL_DIR, LexicalSegment, bm25_search
+from rag.metadata_index import MetadataFilter, clear_bits
+from rag.shard import Shard, write_shard, shard_needs_upgrade, upgrade_shard, INDEX_FILE
+from rag.telemetry import get_telemetry
+
+# ============================================================================= #
+MANIFEST_FILE = "manifest.json"
+SHARDS_DIR = "shards"
+LEGACY_FILES = ("index.faiss", "index.pkl")
+LEGACY_SHARD = "shard-000000-legacy"
+
+COMPACT_MIN_SHARD_SIZE = int(os.getenv("COMPACT_MIN_SHARD_SIZE", "50000"))  # Shards menores que isso são "pequenos"
+COMPACT_TRIGGER = int(os.getenv("COMPACT_TRIGGER", "8"))                      # Nº de shards pequenos que dispara a compactação
+HYBRID_FETCH_K = 20                                                            # Candidatos de cada busca antes da fusão
+RRF_K = 60                                                                     # Constante do Reciprocal Rank Fusion
+COMPACT_DELETED_RATIO = 0.1                                                    # Shards com 10%+ de vetores apagados são reescritos
+SHARD_RETIRE_GRACE_SECONDS = float(os.getenv("SHARD_RETIRE_GRACE_SECONDS", "600"))  # Shards substituídos ficam no disco por esse tempo
+
+# ============================================================================= #
+class ManifestLock:
+    """
+    Cross-process lock for manifest updates, based on an exclusively created lock file.
+    A lock older than `stale_after` seconds is considered abandoned (crashed writer).
+    """
+
+    def __init__(self, index_path: str, timeout: float = 120.0, stale_after: float = 600.0):
+        self.path = os.path.join(index_path, "manifest.lock")
+        self.timeout = timeout
+        self.stale_after = stale_after
+
+    def __enter__(self):
+        deadline = time.time() + self.timeout
+        while True:
+            try:
+                fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.write(fd, str(os.getpid()).encode())
+                os.close(fd)
+                return self
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(self.path) > self.stale_after:
+                        os.remove(self.path)
+                        continue
+                except FileNotFoundError:
+                    continue
+                if time.time() > deadline:
+                    raise TimeoutError(f"Não foi possível obter a trava do índice em '{self.path}'.")
+                time.sleep(0.05)
+
+    def __exit__(self, *exc):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+# ============================================================================= #
+def read_manifest(index_path: str) -> dict | None:
+    """
+    Reads the shard manifest of an index directory.
+
+    Args:
+        index_path (str): Directory of the index.
+
+    Returns:
+        dict | None: The manifest, or None if the directory has no manifest yet.
+    """
+    try:
+        with open(os.path.join(index_path, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def write_manifest(index_path: str, manifest: dict) -> None:
+    # Escrita atômica: leitores nunca veem um manifesto pela metade
+    tmp_path = os.path.join(index_path, f"{MANIFEST_FILE}.{uuid.uuid4().hex}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(index_path, MANIFEST_FILE))
+
+# ============================================================================= #
+def _sweep_retired(manifest: dict, grace_seconds: float = SHARD_RETIRE_GRACE_SECONDS) -> list[str]:
+    """
+    Drops from the manifest the retired shards whose grace period is over.
+
+    Returns:
+        list[str]: Names of the shards that can now be deleted from disk.
+    """
+    now = time.time()
+    retired = manifest.get("retired", [])
+    expired = [entry["name"] for entry in retired if now - entry["retired_at"] >= grace_seconds]
+    manifest["retired"] = [entry for entry in retired if now - entry["retired_at"] < grace_seconds]
+    return expired
+
+def _outdated_shards(index_path: str, manifest: dict) -> list[str]:
+    return [
+        entry["name"] for entry in manifest["shards"]
+        if shard_needs_upgrade(os.path.join(index_path, SHARDS_DIR, entry["name"]))
+    ]
+
+def _has_legacy_files(index_path: str) -> bool:
+    # Arquivos na raiz, ou já movidos para o shard por uma migração interrompida
+    shard_path = os.path.join(index_path, SHARDS_DIR, LEGACY_SHARD)
+    return all(os.path.exists(os.path.join(index_path, f)) for f in LEGACY_FILES) \
+        or os.path.exists(os.path.join(shard_path, INDEX_FILE))
+
+def migrate_legacy_index(index_path: str) -> None:
+    """
+    Turns a single-file index (`index.faiss` + `index.pkl` written by `save_local`)
+    into the first shard of a sharded index, and upgrades shards written by older
+    versions (pickled docstore, no BM25 segment or metadata bitmaps). Everything runs
+    once, under the manifest lock, so opening a shard never writes to it.
+
+    Args:
+        index_path (str): Directory of the index.
+    """
+    manifest = read_manifest(index_path)
+    if manifest is None and not _has_legacy_files(index_path):
+        return
+    if manifest is not None and not _outdated_shards(index_path, manifest):
+        return
+
+    with ManifestLock(index_path):
+        manifest = read_manifest(index_path)
+        if manifest is None:
+            if not _has_legacy_files(index_path):
+                return
+
+            name = LEGACY_SHARD
+            shard_path = os.path.join(index_path, SHARDS_DIR, name)
+            os.makedirs(shard_path, exist_ok=True)
+            for file_name in LEGACY_FILES:
+                if os.path.exists(os.path.join(index_path, file_name)):
+                    os.replace(os.path.join(index_path, file_name), os.path.join(shard_path, file_name))
+            # O shard é atualizado antes de entrar no manifesto (nenhum leitor o vê pela metade)
+            upgrade_shard(shard_path)
+
+            count = faiss.read_index(os.path.join(shard_path, INDEX_FILE), faiss.IO_FLAG_MMAP).ntotal
+            write_manifest(index_path, {
+                "version": 1,
+                "generation": 1,
+                "shards": [{"name": name, "count": count, "created_at": time.time()}],
+            })
+            print(f"📦 Índice legado migrado para o formato em shards ({count} vetores).")
+            return
+
+        for name in _outdated_shards(index_path, manifest):
+            upgrade_shard(os.path.join(index_path, SHARDS_DIR, name))
+
+# ============================================================================= #
+class _NullEmbeddings(Embeddings):
+    # Usado só para abrir shards durante manutenção (sem consultas)
+    def embed_documents(self, texts):
+        raise NotImplementedError
+
+    def embed_query(self, text):
+        raise NotImplementedError
+
+# ============================================================================= #
+class ShardedVectorStore:
+    """
+    Logical vector store made of several FAISS shards listed in `manifest.json`.
+    Each ingest writes a new shard (append-only), searches fan out over all shards
+    and merge the results by distance, and small shards are merged in the background.
+    Deleted vectors are tombstones (`deleted_ids` in the manifest) filtered at search
+    time and physically removed when their shard is compacted. Compacted shards are
+    retired, not deleted: other processes may still read them until their next refresh,
+    so their directories are removed by a later commit after a grace period. Each shard also has a
+    BM25 segment for lexical and hybrid search, and metadata bitmaps that restrict
+    both searches to a `MetadataFilter` inside the search itself.
+
+    Shards are memory-mapped and their documents live in SQLite, so opening the store
+    is cheap and only the returned hits are read from disk.
+
+    The FAISS index type (Flat, HNSW, IVF-Flat, IVF-PQ) comes from the `index` entry of
+    the manifest (or the `FAISS_INDEX_KIND` env var); shards too small to train stay Flat.
+    """
+
+    def __init__(self, index_path: str, embeddings: Embeddings):
+        self.index_path = index_path
+        self.embeddings = embeddings
+        self.generation = 0
+        self.index_config = IndexConfig.from_env()
+        self._shards = {}           # nome -> Shard
+        self._segments = {}         # nome -> LexicalSegment (BM25)
+        self._deleted = frozenset() # ids apagados (tombstones)
+        self._deleted_per_shard = {}
+        self._deleted_ordinals = {} # nome -> ordinais apagados no shard
+        self._pending = {}          # chave -> documentos e vetores ainda não salvos
+        self._lock = threading.RLock()
+        self._compacting = False
+
+        os.makedirs(index_path, exist_ok=True)
+        migrate_legacy_index(index_path)
+        self.refresh()
+
+    # ---------------------------------------------------------------------------- #
+    def _shard_path(self, name: str) -> str:
+        return os.path.join(self.index_path, SHARDS_DIR, name)
+
+    def _load_shard(self, name: str) -> Shard:
+        return Shard(self._shard_path(name), self.index_config)
+
+    def _load_segment(self, name: str) -> LexicalSegment:
+        return LexicalSegment(os.path.join(self._shard_path(name), LEXICAL_DIR))
+
+    # ---------------------------------------------------------------------------- #
+    def refresh(self) -> bool:
+        """
+        Re-reads the manifest and opens only the shards that are new since the last call.
+
+        Returns:
+            bool: True if the set of live shards changed.
+        """
+        for _ in range(3):
+            manifest = read_manifest(self.index_path) or {"generation": 0, "shards": []}
+            if manifest["generation"] == self.generation:
+                return False
+
+            self.index_config = IndexConfig.from_dict(manifest.get("index"))
+            try:
+                shards, segments = {}, {}
+                for entry in manifest["shards"]:
+                    name = entry["name"]
+                    shards[name] = self._shards.get(name) or self._load_shard(name)
+                    segments[name] = self._segments.get(name) or self._load_segment(name)
+            except (FileNotFoundError, RuntimeError):
+                # Uma compactação removeu um shard entre a leitura do manifesto e a carga
+                time.sleep(0.1)
+                continue
+
+            deleted = frozenset(manifest.get("deleted_ids", []))
+            deleted_ordinals = {
+                name: shard.docstore.ordinals_by_id(deleted) for name, shard in shards.items()
+            } if deleted else {}
+            deleted_per_shard = {name: len(ordinals) for name, ordinals in deleted_ordinals.items()}
+
+            with self._lock:
+                self._shards = shards
+                self._segments = segments
+                self._deleted = deleted
+                self._deleted_per_shard = deleted_per_shard
+                self._deleted_ordinals = deleted_ordinals
+                self.generation = manifest["generation"]
+            return True
+
+        raise RuntimeError(f"Não foi possível carregar um estado consistente de '{self.index_path}'.")
+
+    # ---------------------------------------------------------------------------- #
+    @property
+    def shards(self) -> list[Shard]:
+        return list(self._shards.values())
+
+    @property
+    def ntotal(self) -> int:
+        return sum(shard.ntotal for shard in self.shards)
+
+    def count_ids(self, doc_ids: list[str]) -> int:
+        """
+        Returns how many of the given ids are live documents of the store.
+        """
+        doc_ids = [doc_id for doc_id in doc_ids if doc_id not in self._deleted]
+        return sum(shard.docstore.count_ids(doc_ids) for shard in self.shards)
+
+    def iter_documents(self):
+        """
+        Yields (doc_id, Document) for every live (not deleted) document, streaming from disk.
+        """
+        deleted = self._deleted
+        for shard in self.shards:
+            for doc_id, doc in shard.docstore.iter_documents():
+                if doc_id not in deleted:
+                    yield doc_id, doc
+
+    def vectors_by_id(self, doc_ids: list[str]) -> dict:
+        """
+        Returns the stored vectors of the given documents (e.g. the hits of a search),
+        read from their shards by ordinal instead of embedding the texts again.
+
+        Returns:
+            dict: doc_id -> vector (float32); ids not found are left out.
+        """
+        vectors, missing = {}, set(doc_ids)
+        for shard in self.shards:
+            if not missing:
+                break
+            ordinals = shard.docstore.ordinal_by_id(missing)
+            if ordinals:
+                ids = list(ordinals)
+                vectors.update(zip(ids, shard.vectors_by_ordinal([ordinals[doc_id] for doc_id in ids])))
+                missing -= ordinals.keys()
+        return vectors
+
+    def live_vectors(self) -> np.ndarray:
+        """
+        Returns the raw vectors of every live document as one float32 matrix.
+        """
+        parts = []
+        for shard in self.shards:
+            keep = [doc_id not in self._deleted for doc_id in shard.docstore.ids()]
+            parts.append(np.asarray(shard.vectors())[np.array(keep, dtype=bool)])
+        return np.concatenate(parts) if parts else np.empty((0, 0), dtype=np.float32)
+
+    # ---------------------------------------------------------------------------- #
+    def allowed_bitmaps(self, metadata_filter: MetadataFilter) -> dict:
+        """
+        Resolves a metadata filter into one packed bitmap per shard (live documents only).
+
+        Returns:
+            dict: Shard name -> bitmap of the ordinals the searches may return.
+        """
+        shards, deleted_ordinals = self._shards, self._deleted_ordinals
+        allowed = {}
+        for name, shard in shards.items():
+            bitmap = shard.metadata.bitmap(metadata_filter)
+            if len(deleted_ordinals.get(name, ())):
+                clear_bits(bitmap, deleted_ordinals[name])
+            allowed[name] = bitmap
+        return allowed
+
+    def similarity_search_with_score_by_vector(self, embedding: list[float], k: int = 4,
+                                               metadata_filter: MetadataFilter | None = None,
+                                               allowed: dict | None = None) -> list[tuple[Document, float]]:
+        """
+        Dense search over every shard.
+
+        Args:
+            embedding (list[float]): The query vector.
+            k (int): Number of documents to return.
+            metadata_filter (MetadataFilter | None): Restricts the hits (type, source, pages).
+            allowed (dict | None): Bitmaps already resolved by `allowed_bitmaps`.
+
+        Returns:
+            list[tuple[Document, float]]: (document, L2 distance), best first.
+        """
+        shards, deleted, deleted_per_shard = self._shards, self._deleted, self._deleted_per_shard
+        if allowed is None and metadata_filter is not None and not metadata_filter.is_empty:
+            allowed = self.allowed_bitmaps(metadata_filter)
+
+        candidates = []
+        for name, shard in list(shards.items()):
+            if allowed is not None:
+                # Filtro (e tombstones) aplicados dentro da busca do FAISS
+                # (um shard publicado depois da resolução do filtro fica para a próxima busca)
+                if name not in allowed:
+                    continue
+                hits = shard.search(embedding, k, allowed[name])
+                candidates.extend((score, name, ordinal) for ordinal, score in hits)
+                continue
+
+            # Busca k + nº de tombstones do shard para sempre sobrar k vetores vivos
+            hits = shard.search(embedding, k + deleted_per_shard.get(name, 0))
+            if deleted:
+                ids = shard.docstore.ids_by_ordinal([ordinal for ordinal, _ in hits])
+                hits = [(ordinal, score) for ordinal, score in hits if ids.get(ordinal) not in deleted]
+            candidates.extend((score, name, ordinal) for ordinal, score in hits)
+
+        # Distância L2: menor é melhor. Só os k vencedores são lidos do docstore
+        candidates.sort()
+        best = candidates[:k]
+
+        by_shard = {}
+        for _, name, ordinal in best:
+            by_shard.setdefault(name, []).append(ordinal)
+        docs = {name: shards[name].docstore.documents_by_ordinal(ordinals) for name, ordinals in by_shard.items()}
+        return [(docs[name][ordinal], score) for score, name, ordinal in best]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, metadata_filter: MetadataFilter | None = None,
+                                     allowed: dict | None = None) -> list[tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self.embeddings.embed_query(query), k, metadata_filter, allowed)
+
+    def similarity_search(self, query: str, k: int = 4, metadata_filter: MetadataFilter | None = None) -> list[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, metadata_filter)]
+
+    # ---------------------------------------------------------------------------- #
+    def lexical_search_with_score(self, query: str, k: int = 4, metadata_filter: MetadataFilter | None = None,
+                                  allowed: dict | None = None) -> list[tuple[Document, float]]:
+        """
+        BM25 search over the inverted index of every shard (restricted by the metadata filter, if any).
+        """
+        shards, segments = self._shards, self._segments
+        if allowed is None and metadata_filter is not None and not metadata_filter.is_empty:
+            allowed = self.allowed_bitmaps(metadata_filter)
+        if allowed is not None:
+            segments = {name: segment for name, segment in segments.items() if name in allowed}
+        hits = bm25_search(segments, query, k, self._deleted, allowed)
+        return [(shards[name].docstore.search(doc_id), score) for name, doc_id, score in hits]
+
+    def hybrid_search(self, query: str, k: int = 4, fetch_k: int = HYBRID_FETCH_K, rrf_k: int = RRF_K,
+                      metadata_filter: MetadataFilter | None = None) -> list[Document]:
+        """
+        Fuses dense (FAISS) and lexical (BM25) results with Reciprocal Rank Fusion.
+
+        Args:
+            query (str): The query text.
+            k (int): Number of documents to return.
+            fetch_k (int): Candidates taken from each retriever.
+            rrf_k (int): RRF constant (higher flattens the rank weights).
+            metadata_filter (MetadataFilter | None): Restricts both searches (type, source, pages).
+
+        Returns:
+            list[Document]: The fused top-k documents.
+        """
+        return [doc for doc, _ in self.hybrid_search_with_score(query, k, fetch_k, rrf_k, metadata_filter)]
+
+    def hybrid_search_with_score(self, query: str, k: int = 4, fetch_k: int = HYBRID_FETCH_K,
+                                 rrf_k: int = RRF_K, metadata_filter: MetadataFilter | None = None) -> list[tuple[Document, float]]:
+        """
+        Same as `hybrid_search`, with the RRF score of each document (higher is better).
+        RRF scores depend only on ranks, so they can be merged across stores.
+        """
+        telemetry = get_telemetry()
+        allowed = None
+        if metadata_filter is not None and not metadata_filter.is_empty:
+            # Resolvido uma vez e usado pelas duas buscas
+            with telemetry.span("resolve_filter"):
+                allowed = self.allowed_bitmaps(metadata_filter)
+        with telemetry.span("dense_search", k=fetch_k):
+            dense = self.similarity_search_with_score(query, fetch_k, allowed=allowed)
+        with telemetry.span("lexical_search", k=fetch_k):
+            lexical = self.lexical_search_with_score(query, fetch_k, allowed=allowed)
+
+        scores, docs = {}, {}
+        for results in (dense, lexical):
+            for rank, (doc, _) in enumerate(results):
+                scores[doc.id] = scores.get(doc.id, 0.0) + 1.0 / (rrf_k + rank + 1)
+                docs[doc.id] = doc
+
+        best = sorted(scores, key=scores.get, reverse=True)[:k]
+        return [(docs[doc_id], scores[doc_id]) for doc_id in best]
+
+    # ---------------------------------------------------------------------------- #
+    def add_embedded_documents(self, docs: list[Document], vectors: list[list[float]], pending_key: str | None = None) -> list[str]:
+        """
+        Adds already embedded documents to a pending (in-memory) shard.
+
+        Args:
+            docs (list[Document]): The documents to add.
+            vectors (list[list[float]]): One embedding per document.
+            pending_key (str | None): Pending shard to use, so concurrent ingestions commit independently.
+
+        Returns:
+            list[str]: The ids of the new documents.
+        """
+        ids = [str(uuid.uuid4()) for _ in docs]
+        documents = [(doc_id, Document(id=doc_id, page_content=doc.page_content, metadata=doc.metadata))
+                     for doc_id, doc in zip(ids, docs)]
+
+        with self._lock:
+            pending = self._pending.setdefault(pending_key, {"documents": [], "vectors": []})
+            pending["documents"].extend(documents)
+            pending["vectors"].append(np.asarray(vectors, dtype=np.float32))
+        return ids
+
+    def discard(self, pending_key: str | None = None) -> None:
+        """
+        Drops a pending shard without writing it (e.g. after a failed ingestion).
+        """
+        with self._lock:
+            self._pending.pop(pending_key, None)
+
+    # ---------------------------------------------------------------------------- #
+    def commit(self, pending_key: str | None = None, deleted_ids: list[str] | None = None) -> str | None:
+        """
+        Writes a pending shard to its own directory and records it in the manifest,
+        together with the ids it replaces. Existing shards are never rewritten.
+
+        Args:
+            pending_key (str | None): Pending shard to write.
+            deleted_ids (list[str] | None): Ids to tombstone in the same manifest update.
+
+        Returns:
+            str | None: Name of the new shard, or None if there was no pending shard.
+        """
+        with self._lock:
+            pending = self._pending.pop(pending_key, None)
+        return self._publish(pending, deleted_ids)
+
+    def delete(self, ids: list[str]) -> None:
+        """
+        Tombstones the given ids; they are dropped from searches right away.
+        """
+        self._publish(None, ids)
+
+    # ---------------------------------------------------------------------------- #
+    def _publish(self, pending: dict | None, deleted_ids: list[str] | None) -> str | None:
+        if pending is None and not deleted_ids:
+            return None
+
+        name, count = None, 0
+        if pending is not None:
+            name = f"shard-{int(time.time() * 1000):013d}-{uuid.uuid4().hex[:8]}"
+            vectors = np.concatenate(pending["vectors"])
+            count = len(vectors)
+            # Ingestões grandes já saem no tipo de índice configurado
+            with get_telemetry().span("write_shard", vectors=count, kind=self.index_config.kind):
+                write_shard(self._shard_path(name), build_index(vectors, self.index_config), vectors, pending["documents"])
+            get_telemetry().incr("vectors_added_total", count)
+
+        with ManifestLock(self.index_path):
+            manifest = read_manifest(self.index_path) or {"version": 1, "generation": 0, "shards": []}
+            expired = _sweep_retired(manifest)
+            if name is not None:
+                manifest["shards"].append({"name": name, "count": count, "created_at": time.time()})
+            if deleted_ids:
+                manifest["deleted_ids"] = sorted(set(manifest.get("deleted_ids", [])) | set(deleted_ids))
+            manifest["generation"] += 1
+            write_manifest(self.index_path, manifest)
+
+        self._remove_shards(expired)
+        self.refresh()
+
+        if name is not None:
+            print(f"✅ Shard '{name}' salvo com {count} vetores.")
+        if deleted_ids:
+            print(f"🗑️ {len(deleted_ids)} vetores marcados como apagados.")
+        self.maybe_compact_in_background()
+        return name
+
+    def _remove_shards(self, names: list[str]) -> None:
+        for name in names:
+            shutil.rmtree(self._shard_path(name), ignore_errors=True)
+
+    # ---------------------------------------------------------------------------- #
+    def small_shards(self, min_shard_size: int = COMPACT_MIN_SHARD_SIZE) -> list[str]:
+        """
+        Returns the shards worth compacting: small ones and ones with many tombstones.
+        """
+        manifest = read_manifest(self.index_path) or {"shards": []}
+        return [
+            entry["name"] for entry in manifest["shards"]
+            if entry["count"] < min_shard_size
+            or self._deleted_per_shard.get(entry["name"], 0) >= COMPACT_DELETED_RATIO * max(entry["count"], 1)
+        ]
+
+    def maybe_compact_in_background(self, trigger: int = COMPACT_TRIGGER) -> threading.Thread | None:
+        """
+        Starts a background compaction if there are at least `trigger` small shards.
+        """
+        with self._lock:
+            if self._compacting or len(self.small_shards()) < trigger:
+                return None
+            self._compacting = True
+
+        def _run():
+            try:
+                self.compact()
+            except Exception as e:
+                print(f"⚠️ Falha na compactação do índice: {e}")
+            finally:
+                with self._lock:
+                    self._compacting = False
+
+        thread = threading.Thread(target=_run, name="index-compaction", daemon=True)
+        thread.start()
+        return thread
+
+    # ---------------------------------------------------------------------------- #
+    def compact(self, min_shard_size: int = COMPACT_MIN_SHARD_SIZE) -> str | None:
+        """
+        Merges all small shards into a single new shard (dropping deleted vectors)
+        and swaps it in the manifest.
+
+        Args:
+            min_shard_size (int): Shards with fewer vectors than this are merged.
+
+        Returns:
+            str | None: Name of the merged shard, or None if there was nothing to merge.
+        """
+        names = self.small_shards(min_shard_size)
+        if not names or (len(names) == 1 and not self._deleted_per_shard.get(names[0])):
+            return None
+        return self._replace_shards(names, self.index_config)
+
+    def rebuild(self, config: IndexConfig) -> str | None:
+        """
+        Rebuilds the whole index into a single shard of the given index type and makes
+        that type the default for future shards (e.g. Flat -> IVF-PQ migration).
+
+        Args:
+            config (IndexConfig): The new index type and parameters.
+
+        Returns:
+            str | None: Name of the rebuilt shard, or None if the index is empty.
+        """
+        names = list(self._shards)
+        if not names:
+            return None
+        return self._replace_shards(names, config, store_config=True)
+
+    # ---------------------------------------------------------------------------- #
+    def _replace_shards(self, names: list[str], config: IndexConfig, store_config: bool = False) -> str | None:
+        # Junta os vetores originais e reconstrói o índice (índices treinados não se fundem)
+        parts, documents, purged = [], [], []
+        for name in names:
+            shard = self._shards.get(name) or self._load_shard(name)
+            shard_documents = list(shard.docstore.iter_documents())
+            keep = np.array([doc_id not in self._deleted for doc_id, _ in shard_documents], dtype=bool)
+
+            parts.append(np.asarray(shard.vectors())[keep])
+            documents.extend(item for item, live in zip(shard_documents, keep) if live)
+            purged.extend(doc_id for (doc_id, _), live in zip(shard_documents, keep) if not live)
+        vectors = np.concatenate(parts)
+
+        merged_name = f"shard-{int(time.time() * 1000):013d}-{uuid.uuid4().hex[:8]}-merged"
+        index = build_index(vectors, config)
+        write_shard(self._shard_path(merged_name), index, vectors, documents)
+
+        with ManifestLock(self.index_path):
+            manifest = read_manifest(self.index_path)
+            live = {entry["name"] for entry in manifest["shards"]}
+            if not set(names) <= live:
+                # Outro processo já compactou esses shards
+                shutil.rmtree(self._shard_path(merged_name), ignore_errors=True)
+                return None
+
+            expired = _sweep_retired(manifest)
+            manifest["shards"] = [entry for entry in manifest["shards"] if entry["name"] not in names]
+            manifest["shards"].append({"name": merged_name, "count": len(vectors), "created_at": time.time()})
+            # Outros processos ainda podem ler os shards antigos até o próximo refresh:
+            # eles só são apagados depois do período de carência (em um commit futuro)
+            manifest.setdefault("retired", []).extend({"name": name, "retired_at": time.time()} for name in names)
+            if purged:
+                manifest["deleted_ids"] = sorted(set(manifest.get("deleted_ids", [])) - set(purged))
+            if store_config:
+                manifest["index"] = config.to_dict()
+            manifest["generation"] += 1
+            write_manifest(self.index_path, manifest)
+
+        self._remove_shards(expired)
+        self.refresh()
+        print(f"🧹 {len(names)} shards compactados em '{merged_name}' ({len(vectors)} vetores, índice {type(index).__name__}).")
+        return merged_name
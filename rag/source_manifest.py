@@ -0,0 +1,231 @@
+# ============================================================================= #
+# Project: Multimodal RAG Pipeline
+# Develop by: Thiago Piovesan
+# Description: Source manifest (source -> content hash, vector ids)
+# Date: 2026-01-08 // YYYY-MM-DD
+# Version: 0.1.0
+# License: MIT
+# ============================================================================= #
+# Libs Importation:
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+# ============================================================================= #
+SOURCES_FILE = "sources.sqlite"
+
+SKIP = "skip"           # Mesmo conteúdo já indexado (mesmo nome ou outro nome)
+NEW = "new"             # Fonte ainda não indexada
+REPLACE = "replace"     # Fonte já indexada com conteúdo diferente
+
+# ============================================================================= #
+def file_content_hash(path: str) -> str:
+    """
+    Returns the sha256 of a file, read in blocks.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+# ============================================================================= #
+class SourceManifest:
+    """
+    Persisted map of source -> content hash, vector ids, shard and ingest time,
+    stored next to the index. Skip/replace decisions are indexed lookups instead
+    of a scan over the whole docstore.
+
+    The content hash is always the sha256 of the source file (`file_content_hash`).
+    An ingest records its new vector ids as pending before the shard is committed,
+    so a crash between the commit and `put` is finished by `recover` instead of
+    indexing the source again.
+    """
+
+    def __init__(self, index_path: str):
+        self.path = os.path.join(index_path, SOURCES_FILE)
+        self._local = threading.local()
+
+        os.makedirs(index_path, exist_ok=True)
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS sources (
+                source TEXT PRIMARY KEY,
+                content_hash TEXT,
+                vector_ids TEXT NOT NULL,
+                chunk_count INTEGER NOT NULL,
+                shard TEXT,
+                ingested_at REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_sources_hash ON sources(content_hash)")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS pending (
+                source TEXT PRIMARY KEY,
+                content_hash TEXT,
+                vector_ids TEXT NOT NULL,
+                started_at REAL NOT NULL
+            )
+        """)
+
+    # ---------------------------------------------------------------------------- #
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    # ---------------------------------------------------------------------------- #
+    def is_empty(self) -> bool:
+        return self._connect().execute("SELECT 1 FROM sources LIMIT 1").fetchone() is None
+
+    def bootstrap(self, iter_documents) -> int:
+        """
+        Builds the manifest from an existing docstore (one-time scan for indexes created
+        before the manifest existed). Their content hash is unknown, so a new upload
+        with the same name re-indexes them once.
+
+        Args:
+            iter_documents (iterable): (doc_id, Document) pairs of the store.
+
+        Returns:
+            int: Number of sources registered.
+        """
+        ids_by_source = {}
+        for doc_id, doc in iter_documents:
+            source = doc.metadata.get("source")
+            if source is not None:
+                ids_by_source.setdefault(source, []).append(doc_id)
+
+        now = time.time()
+        self._connect().executemany(
+            "INSERT OR IGNORE INTO sources VALUES (?, NULL, ?, ?, NULL, ?)",
+            [(source, json.dumps(ids), len(ids), now) for source, ids in ids_by_source.items()],
+        )
+        return len(ids_by_source)
+
+    # ---------------------------------------------------------------------------- #
+    def get(self, source: str) -> dict | None:
+        row = self._connect().execute(
+            "SELECT source, content_hash, vector_ids, chunk_count, shard, ingested_at FROM sources WHERE source = ?",
+            (source,),
+        ).fetchone()
+        return self._to_dict(row) if row else None
+
+    def find_by_hash(self, content_hash: str) -> str | None:
+        row = self._connect().execute(
+            "SELECT source FROM sources WHERE content_hash = ? LIMIT 1", (content_hash,)
+        ).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def _to_dict(row) -> dict:
+        return {
+            "source": row[0],
+            "content_hash": row[1],
+            "vector_ids": json.loads(row[2]),
+            "chunk_count": row[3],
+            "shard": row[4],
+            "ingested_at": row[5],
+        }
+
+    # ---------------------------------------------------------------------------- #
+    def decide(self, source: str, content_hash: str | None) -> tuple[str, str | list]:
+        """
+        Decides what to do with an upload.
+
+        Args:
+            source (str): Source name of the upload.
+            content_hash (str | None): Hash of its content, if known.
+
+        Returns:
+            tuple: (SKIP, reason), (NEW, None) or (REPLACE, old vector ids).
+        """
+        entry = self.get(source)
+        if entry is not None:
+            if content_hash is None or entry["content_hash"] == content_hash:
+                return SKIP, f"O arquivo '{source}' já está no índice"
+            return REPLACE, entry["vector_ids"]
+
+        if content_hash is not None:
+            duplicate = self.find_by_hash(content_hash)
+            if duplicate is not None:
+                return SKIP, f"Conteúdo idêntico já indexado como '{duplicate}'"
+
+        return NEW, None
+
+    # ---------------------------------------------------------------------------- #
+    def begin(self, source: str, content_hash: str | None, vector_ids: list[str]) -> None:
+        """
+        Records the vector ids of an ingest that is about to be committed (see `recover`).
+        """
+        self._connect().execute(
+            "INSERT OR REPLACE INTO pending VALUES (?, ?, ?, ?)",
+            (source, content_hash, json.dumps(vector_ids), time.time()),
+        )
+
+    def put(self, source: str, content_hash: str | None, vector_ids: list[str], shard: str | None) -> None:
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?, ?, ?)",
+                (source, content_hash, json.dumps(vector_ids), len(vector_ids), shard, time.time()),
+            )
+            conn.execute("DELETE FROM pending WHERE source = ?", (source,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def recover(self, count_ids) -> int:
+        """
+        Finishes the ingests interrupted between the shard commit and `put`: a pending
+        entry whose vectors are in the index is recorded, any other is dropped (its
+        shard was never committed).
+
+        Args:
+            count_ids (callable): Returns how many of the given ids are in the index.
+
+        Returns:
+            int: Number of sources recorded.
+        """
+        conn = self._connect()
+        recovered = 0
+        for source, content_hash, vector_ids in conn.execute(
+            "SELECT source, content_hash, vector_ids FROM pending"
+        ).fetchall():
+            vector_ids = json.loads(vector_ids)
+            if vector_ids and count_ids(vector_ids):
+                self.put(source, content_hash, vector_ids, None)
+                recovered += 1
+            else:
+                conn.execute("DELETE FROM pending WHERE source = ? AND vector_ids = ?", (source, json.dumps(vector_ids)))
+        return recovered
+
+    def delete(self, source: str) -> list[str]:
+        """
+        Removes a source from the manifest.
+
+        Returns:
+            list[str]: The vector ids that belonged to it.
+        """
+        entry = self.get(source)
+        if entry is None:
+            return []
+        self._connect().execute("DELETE FROM sources WHERE source = ?", (source,))
+        return entry["vector_ids"]
+
+    def list_sources(self) -> list[dict]:
+        rows = self._connect().execute(
+            "SELECT source, content_hash, vector_ids, chunk_count, shard, ingested_at FROM sources ORDER BY ingested_at"
+        ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def __contains__(self, source: str) -> bool:
+        return self._connect().execute("SELECT 1 FROM sources WHERE source = ?", (source,)).fetchone() is not None
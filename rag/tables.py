@@ -0,0 +1,250 @@
+# ============================================================================= #
+# Project: Multimodal RAG Pipeline
+# Develop by: Thiago Piovesan
+# Description: Compact table representation and original HTML store
+# Date: 2026-01-08 // YYYY-MM-DD
+# Version: 0.1.0
+# License: MIT
+# ============================================================================= #
+# Libs Importation:
+import os
+import sqlite3
+import hashlib
+import threading
+from html.parser import HTMLParser
+
+# ============================================================================= #
+TABLES_FILE = "tables.sqlite"
+
+# ============================================================================= #
+class _TableParser(HTMLParser):
+    # Lê <tr>/<th>/<td> (com colspan) de um <table> gerado pelo unstructured
+    def __init__(self):
+        super().__init__()
+        self.rows = []
+        self.header_rows = 0
+        self._row = None
+        self._cell = None
+        self._colspan = 1
+        self._in_thead = False
+        self._row_has_th = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "thead":
+            self._in_thead = True
+        elif tag == "tr":
+            self._row, self._row_has_th = [], False
+        elif tag in ("td", "th") and self._row is not None:
+            self._cell = []
+            self._colspan = int(dict(attrs).get("colspan") or 1)
+            self._row_has_th |= tag == "th"
+
+    def handle_endtag(self, tag):
+        if tag == "thead":
+            self._in_thead = False
+        elif tag in ("td", "th") and self._cell is not None:
+            text = " ".join("".join(self._cell).split())
+            self._row.extend([text] * self._colspan)
+            self._cell = None
+        elif tag == "tr" and self._row is not None:
+            if self._row:
+                if (self._in_thead or self._row_has_th) and len(self.rows) == self.header_rows:
+                    self.header_rows += 1
+                self.rows.append(self._row)
+            self._row = None
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell.append(data)
+
+# ============================================================================= #
+def parse_html_table(html: str) -> tuple[list[str], list[list[str]]]:
+    """
+    Parses an HTML table into a header and its body rows. Without <th>/<thead>
+    the first row is used as the header.
+
+    Args:
+        html (str): The `text_as_html` of a Table element.
+
+    Returns:
+        tuple: (header cells, body rows).
+    """
+    parser = _TableParser()
+    parser.feed(html)
+    rows = parser.rows
+    if not rows:
+        return [], []
+
+    header_rows = rows[:max(parser.header_rows, 1)]
+    width = max(len(row) for row in rows)
+    # Cabeçalhos em várias linhas viram "Grupo / Coluna"
+    header = []
+    for col in range(width):
+        parts = []
+        for row in header_rows:
+            cell = row[col] if col < len(row) else ""
+            if cell and (not parts or parts[-1] != cell):
+                parts.append(cell)
+        header.append(" / ".join(parts))
+    return header, rows[len(header_rows):]
+
+def _markdown_row(cells: list[str]) -> str:
+    return "| " + " | ".join(cell.replace("|", "/") for cell in cells) + " |"
+
+def table_to_markdown(header: list[str], rows: list[list[str]]) -> str:
+    lines = [_markdown_row(header), _markdown_row(["---"] * len(header))]
+    lines.extend(_markdown_row(row + [""] * (len(header) - len(row))) for row in rows)
+    return "\n".join(lines)
+
+# ============================================================================= #
+def split_table(html: str, max_chars: int) -> list[str]:
+    """
+    Converts an HTML table into markdown, split into row groups of at most `max_chars`.
+    Every group repeats the header, so each chunk can be read on its own.
+
+    Args:
+        html (str): The table HTML.
+        max_chars (int): Size budget of each group.
+
+    Returns:
+        list[str]: The markdown groups (empty if the HTML has no rows).
+    """
+    header, rows = parse_html_table(html)
+    if not header:
+        return []
+
+    groups, current = [], []
+    base_size = len(table_to_markdown(header, []))
+    size = base_size
+    for row in rows:
+        row_size = len(_markdown_row(row)) + 1
+        if current and size + row_size > max_chars:
+            groups.append(current)
+            current, size = [], base_size
+        current.append(row)
+        size += row_size
+
+    if current or not groups:
+        groups.append(current)
+    return [table_to_markdown(header, group) for group in groups]
+
+def table_id(html: str) -> str:
+    return hashlib.sha256(html.encode("utf-8")).hexdigest()[:16]
+
+# ============================================================================= #
+class TableStore:
+    """
+    Original HTML of the indexed tables, stored next to the index and keyed by
+    `table_id` and the source that contains it. Only the compact markdown is embedded
+    and sent to the LLM; the HTML is read when someone asks for the full table. Rows
+    are removed with their source (deleted or replaced), so `get` never returns a
+    table of a document that is no longer indexed.
+    """
+
+    def __init__(self, index_path: str):
+        self.path = os.path.join(index_path, TABLES_FILE)
+        self._local = threading.local()
+
+        os.makedirs(index_path, exist_ok=True)
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(tables)")]
+            if columns and "source" not in columns:
+                # Store antigo, sem a fonte: as linhas ficam com fonte '' até `assign_sources`
+                conn.execute("ALTER TABLE tables RENAME TO tables_legacy")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS tables "
+                "(table_id TEXT NOT NULL, source TEXT NOT NULL, html TEXT NOT NULL, PRIMARY KEY (table_id, source))"
+            )
+            if columns and "source" not in columns:
+                conn.execute("INSERT OR IGNORE INTO tables SELECT table_id, '', html FROM tables_legacy")
+                conn.execute("DROP TABLE tables_legacy")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    # ---------------------------------------------------------------------------- #
+    def put_many(self, source: str, tables: dict) -> None:
+        if tables:
+            self._connect().executemany(
+                "INSERT OR IGNORE INTO tables VALUES (?, ?, ?)",
+                [(table_id, source, html) for table_id, html in tables.items()],
+            )
+
+    def get(self, table_id: str) -> str | None:
+        row = self._connect().execute("SELECT html FROM tables WHERE table_id = ? LIMIT 1", (table_id,)).fetchone()
+        return row[0] if row else None
+
+    def delete_source(self, source: str, keep=()) -> int:
+        """
+        Removes the tables of a source, except the ones in `keep` (the tables of the
+        version that replaces it).
+
+        Args:
+            source (str): The source name.
+            keep (Iterable[str]): Table ids of the source that stay.
+
+        Returns:
+            int: Number of removed tables.
+        """
+        keep = set(keep)
+        conn = self._connect()
+        table_ids = [row[0] for row in conn.execute("SELECT table_id FROM tables WHERE source = ?", (source,))]
+        removed = [(table_id, source) for table_id in table_ids if table_id not in keep]
+        conn.executemany("DELETE FROM tables WHERE table_id = ? AND source = ?", removed)
+        return len(removed)
+
+    # ---------------------------------------------------------------------------- #
+    def has_legacy_rows(self) -> bool:
+        return self._connect().execute("SELECT 1 FROM tables WHERE source = '' LIMIT 1").fetchone() is not None
+
+    def assign_sources(self, documents) -> None:
+        """
+        Gives the rows of an old store (without a source) the sources whose documents
+        reference them; rows no live document references are dropped.
+
+        Args:
+            documents (Iterable[tuple[str, Document]]): The live documents of the index.
+        """
+        pairs = {
+            (doc.metadata["table_id"], doc.metadata.get("source", ""))
+            for _, doc in documents if doc.metadata.get("table_id")
+        }
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT OR IGNORE INTO tables SELECT table_id, ?, html FROM tables WHERE table_id = ? AND source = ''",
+                [(source, table_id) for table_id, source in pairs if source],
+            )
+            conn.execute("DELETE FROM tables WHERE source = ''")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+# ============================================================================= #
+def document_table_ids(docs: list) -> set[str]:
+    return {doc.metadata["table_id"] for doc in docs if doc.metadata.get("table_id")}
+
+def save_tables(chunks: list[dict], index_path: str, source: str) -> None:
+    """
+    Stores the original HTML of the table chunks (see `LayoutChunker`) of a source
+    in the table store.
+    """
+    tables = {
+        chunk["metadata"]["table_id"]: chunk["metadata"]["text_as_html"]
+        for chunk in chunks if chunk["metadata"].get("table_id") and chunk["metadata"].get("text_as_html")
+    }
+    if tables:
+        TableStore(index_path).put_many(source, tables)
@@ -0,0 +1,335 @@
+# ============================================================================= #
+# Project: Multimodal RAG Pipeline
+# Develop by: Thiago Piovesan
+# Description: Stage timings (spans), counters and exporters
+# Date: 2026-01-08 // YYYY-MM-DD
+# Version: 0.1.0
+# License: MIT
+# ============================================================================= #
+# Libs Importation:
+import os
+import json
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+# ============================================================================= #
+TELEMETRY_JSON_LOG = os.getenv("TELEMETRY_JSON_LOG", "")            # Ex.: data/logs/telemetry.jsonl
+TELEMETRY_PROM_FILE = os.getenv("TELEMETRY_PROM_FILE", "")          # Ex.: data/logs/metrics.prom
+TELEMETRY_PROM_PORT = int(os.getenv("TELEMETRY_PROM_PORT", "0"))    # 0 = sem endpoint HTTP
+TELEMETRY_PROM_HOST = os.getenv("TELEMETRY_PROM_HOST", "127.0.0.1") # 0.0.0.0 expõe o endpoint na rede
+TELEMETRY_LOG_MAX_BYTES = int(os.getenv("TELEMETRY_LOG_MAX_BYTES", str(50 * 1024 * 1024)))  # Log JSON é rotacionado acima disso
+
+# Limites dos buckets do histograma de duração (segundos)
+DURATION_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+# ============================================================================= #
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+def _escape_label(value) -> str:
+    # Formato de texto do Prometheus: \\, \" e \n dentro do valor de um label
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label(value)}"' for key, value in labels) + "}"
+
+def summarize_spans(spans) -> list[dict]:
+    """
+    Per-stage count, mean, max and last duration of a list of spans (for the UI).
+    """
+    stages = {}
+    for span in spans:
+        stages.setdefault(span["stage"], []).append(span["seconds"])
+    return [
+        {
+            "etapa": stage,
+            "chamadas": len(values),
+            "média (s)": round(sum(values) / len(values), 3),
+            "máx (s)": round(max(values), 3),
+            "última (s)": round(values[-1], 3),
+        }
+        for stage, values in sorted(stages.items())
+    ]
+
+def read_span_log(path: str, max_spans: int = 500, max_bytes: int = 4 * 1024 * 1024) -> list[dict]:
+    """
+    Reads the most recent spans of a JSON span log (see `JsonLogExporter`), e.g. the
+    one the ingestion workers write, so other processes can show their timings.
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - max_bytes))
+        lines = f.read().splitlines()
+    if len(lines) > 1 and os.path.getsize(path) > max_bytes:
+        lines = lines[1:]   # Primeira linha pode estar cortada
+
+    spans = []
+    for line in lines[-max_spans:]:
+        try:
+            spans.append(json.loads(line))
+        except ValueError:
+            continue    # Linha sendo escrita por outro processo
+    return spans
+
+# ============================================================================= #
+class Telemetry:
+    """
+    In-process registry of stage spans and counters.
+
+    - `span(stage)` times a block, keeps it in a ring of recent spans and in a
+      per-stage duration histogram;
+    - `incr(name, value, **labels)` adds to a counter (cache hits, retries, vectors, tokens...);
+    - exporters (`add_exporter`) receive every finished span, and `prometheus_text`
+      renders all metrics in the Prometheus text format.
+    """
+
+    def __init__(self, max_recent: int = 500):
+        self.recent = deque(maxlen=max_recent)
+        self._histograms = {}   # stage -> [contagens por bucket, soma, total]
+        self._counters = {}     # (nome, labels) -> valor
+        self._exporters = []
+        self._lock = threading.Lock()
+
+    # ---------------------------------------------------------------------------- #
+    @contextmanager
+    def span(self, stage: str, **attributes):
+        """
+        Times the enclosed block as one occurrence of `stage`.
+        Attributes (e.g. file name, number of items) are kept with the span.
+        """
+        start_time = time.time()
+        start = time.perf_counter()
+        error = None
+        try:
+            yield attributes
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            self.record(stage, time.perf_counter() - start, start_time, error=error, **attributes)
+
+    def record(self, stage: str, seconds: float, start_time: float | None = None, error: str | None = None, **attributes) -> None:
+        """
+        Records a span measured elsewhere (e.g. by a callback).
+        """
+        span = {
+            "stage": stage,
+            "start": start_time or time.time() - seconds,
+            "seconds": round(seconds, 6),
+            "error": error,
+            "pid": os.getpid(),
+            **attributes,
+        }
+
+        with self._lock:
+            self.recent.append(span)
+            histogram = self._histograms.setdefault(stage, [[0] * len(DURATION_BUCKETS), 0.0, 0])
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if seconds <= bound:
+                    histogram[0][i] += 1
+            histogram[1] += seconds
+            histogram[2] += 1
+            exporters = list(self._exporters)
+
+        for exporter in exporters:
+            try:
+                exporter.export(span)
+            except Exception as e:
+                print(f"⚠️ Falha no exportador de telemetria: {e}")
+
+    # ---------------------------------------------------------------------------- #
+    def incr(self, name: str, value: float = 1, **labels) -> None:
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def add_exporter(self, exporter) -> None:
+        with self._lock:
+            self._exporters.append(exporter)
+
+    # ---------------------------------------------------------------------------- #
+    def summary(self) -> list[dict]:
+        """
+        Per-stage count, mean and last duration of the recent spans (for the UI).
+        """
+        with self._lock:
+            spans = list(self.recent)
+        return summarize_spans(spans)
+
+    def counters(self) -> dict:
+        with self._lock:
+            return {f"{name}{_format_labels(labels)}": value for (name, labels), value in self._counters.items()}
+
+    def prometheus_text(self) -> str:
+        """
+        Renders counters and stage histograms in the Prometheus text exposition format.
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {stage: (list(h[0]), h[1], h[2]) for stage, h in self._histograms.items()}
+
+        lines = []
+        for name in sorted({name for name, _ in counters}):
+            lines.append(f"# TYPE rag_{name} counter")
+            for (counter_name, labels), value in sorted(counters.items()):
+                if counter_name == name:
+                    lines.append(f"rag_{name}{_format_labels(labels)} {value}")
+
+        lines.append("# TYPE rag_stage_duration_seconds histogram")
+        for stage, (buckets, total, count) in sorted(histograms.items()):
+            for bound, bucket_count in zip(DURATION_BUCKETS, buckets):
+                lines.append(f'rag_stage_duration_seconds_bucket{_format_labels([("stage", stage), ("le", bound)])} {bucket_count}')
+            lines.append(f'rag_stage_duration_seconds_bucket{_format_labels([("stage", stage), ("le", "+Inf")])} {count}')
+            lines.append(f'rag_stage_duration_seconds_sum{_format_labels([("stage", stage)])} {total}')
+            lines.append(f'rag_stage_duration_seconds_count{_format_labels([("stage", stage)])} {count}')
+        return "\n".join(lines) + "\n"
+
+# ============================================================================= #
+class JsonLogExporter:
+    """
+    Appends every finished span as one JSON line (safe to share between processes).
+    Above `max_bytes` the file is moved to `<path>.1` and a new one is started.
+    """
+
+    def __init__(self, path: str, max_bytes: int = TELEMETRY_LOG_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def export(self, span: dict) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(span, ensure_ascii=False, default=str) + "\n")
+            size = f.tell()
+        if self.max_bytes and size > self.max_bytes:
+            try:
+                os.replace(self.path, f"{self.path}.1")
+            except OSError:
+                pass    # Outro processo já rotacionou
+
+class PrometheusFileExporter:
+    """
+    Rewrites a Prometheus text file (e.g. for node_exporter's textfile collector)
+    at most every `interval` seconds.
+    """
+
+    def __init__(self, path: str, telemetry: "Telemetry", interval: float = 5.0):
+        self.path = path
+        self.telemetry = telemetry
+        self.interval = interval
+        self._last = 0.0
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def export(self, span: dict) -> None:
+        now = time.monotonic()
+        if now - self._last < self.interval:
+            return
+        self._last = now
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.telemetry.prometheus_text())
+        os.replace(tmp_path, self.path)
+
+def start_prometheus_server(telemetry: "Telemetry", port: int, host: str = TELEMETRY_PROM_HOST) -> ThreadingHTTPServer:
+    """
+    Serves `/metrics` in a daemon thread. Only on localhost by default; set
+    TELEMETRY_PROM_HOST (e.g. 0.0.0.0) for a scraper on another machine.
+    """
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = telemetry.prometheus_text().encode("utf-8")
+            self.send_response(200 if self.path.startswith("/metrics") else 404)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), _Handler)
+    threading.Thread(target=server.serve_forever, name="prometheus-metrics", daemon=True).start()
+    return server
+
+# ============================================================================= #
+class TelemetryCallbackHandler(BaseCallbackHandler):
+    """
+    LangChain callback that records each LLM turn and tool call of the agent as a
+    span, plus the token usage reported by the model.
+    """
+
+    def __init__(self, telemetry: "Telemetry"):
+        self.telemetry = telemetry
+        self._starts = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._starts[run_id] = time.perf_counter()
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._starts[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        start = self._starts.pop(run_id, None)
+        if start is not None:
+            self.telemetry.record("llm_call", time.perf_counter() - start)
+
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                if usage.get("input_tokens"):
+                    self.telemetry.incr("llm_tokens_total", usage["input_tokens"], direction="input")
+                if usage.get("output_tokens"):
+                    self.telemetry.incr("llm_tokens_total", usage["output_tokens"], direction="output")
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        self._starts[run_id] = time.perf_counter()
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        start = self._starts.pop(run_id, None)
+        if start is not None:
+            self.telemetry.record("tool_call", time.perf_counter() - start)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._starts.pop(run_id, None)
+        self.telemetry.incr("errors_total", stage="llm_call")
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._starts.pop(run_id, None)
+        self.telemetry.incr("errors_total", stage="tool_call")
+
+# ============================================================================= #
+_telemetry = None
+_telemetry_lock = threading.Lock()
+
+def get_telemetry() -> Telemetry:
+    """
+    Returns the process-wide telemetry registry, with the exporters configured by the
+    TELEMETRY_JSON_LOG / TELEMETRY_PROM_FILE / TELEMETRY_PROM_PORT env vars.
+    """
+    global _telemetry
+
+    with _telemetry_lock:
+        if _telemetry is None:
+            telemetry = Telemetry()
+            if TELEMETRY_JSON_LOG:
+                telemetry.add_exporter(JsonLogExporter(TELEMETRY_JSON_LOG))
+            if TELEMETRY_PROM_FILE:
+                telemetry.add_exporter(PrometheusFileExporter(TELEMETRY_PROM_FILE, telemetry))
+            if TELEMETRY_PROM_PORT:
+                try:
+                    start_prometheus_server(telemetry, TELEMETRY_PROM_PORT)
+                except OSError as e:
+                    # Porta já em uso (ex.: outro processo do Streamlit)
+                    print(f"⚠️ Endpoint de métricas não iniciado na porta {TELEMETRY_PROM_PORT}: {e}")
+            _telemetry = telemetry
+        return _telemetry
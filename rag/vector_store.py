@@ -9,15 +9,70 @@
 # Libs Importation:
 import os
 import json
+from functools import lru_cache
 
 # from memchunk import Chunker
-from langchain.tools import tool
+from langchain_core.tools import tool
 from langchain_core.documents import Document
-from langchain_community.vectorstores import FAISS
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_huggingface import HuggingFaceEmbeddings
+from rag.chunking import chunk_elements
+from rag.context_packer import CONTEXT_FETCH_K, pack_context
+from rag.embeddings import CachedEmbeddings
+from rag.metadata_index import MetadataFilter
+from rag.query_cache import QueryCache
+from rag.tables import TableStore, save_tables, document_table_ids
+from rag.sharded_store import ShardedVectorStore, MANIFEST_FILE, LEGACY_FILES
+from rag.source_manifest import SourceManifest, SKIP, REPLACE
+from rag.telemetry import get_telemetry
 # from langchain_text_splitters import RecursiveCharacterTextSplitter
 
+# ============================================================================= #
+INDEX_PATH = "rag/faiss_rag_index"
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+RETRIEVAL_CACHE_THRESHOLD = float(os.getenv("RETRIEVAL_CACHE_THRESHOLD")) if os.getenv("RETRIEVAL_CACHE_THRESHOLD") else None  # Só a mesma consulta; com valor, similaridade mínima
+RETRIEVAL_CACHE_TTL_SECONDS = float(os.getenv("RETRIEVAL_CACHE_TTL_SECONDS", "3600"))
+
+# ============================================================================= #
+@lru_cache(maxsize=1)
+def get_embeddings() -> CachedEmbeddings:
+    """
+    Returns the process-wide embedding model, built only on the first call.
+    Document vectors are cached on disk and hot query vectors in memory.
+
+    Returns:
+        CachedEmbeddings: The shared embedding model.
+    """
+    # Importado aqui: sentence-transformers/torch só carregam quando o modelo é usado
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    return CachedEmbeddings(
+        HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL_NAME),
+        model_name=EMBEDDING_MODEL_NAME,
+        batch_size=EMBEDDING_BATCH_SIZE,
+    )
+
+# ============================================================================= #
+def get_index_generation(index_path: str = INDEX_PATH) -> tuple | None:
+    """
+    Returns a cheap fingerprint of the index on disk (mtime and size of the shard
+    manifest, or of the legacy single-file index). It changes after every commit.
+
+    Args:
+        index_path (str): Directory of the FAISS index.
+
+    Returns:
+        tuple | None: The fingerprint, or None if the index does not exist.
+    """
+    generation = []
+    for file_name in (MANIFEST_FILE,) if os.path.exists(os.path.join(index_path, MANIFEST_FILE)) else LEGACY_FILES:
+        try:
+            stat = os.stat(os.path.join(index_path, file_name))
+        except FileNotFoundError:
+            return None
+        generation.append((stat.st_mtime_ns, stat.st_size))
+        
+    return tuple(generation)
+
 # ============================================================================= #
 def create_document(json_data: json, base_file_name: str) -> list[Document]:
     """
@@ -39,107 +94,237 @@ def create_document(json_data: json, base_file_name: str) -> list[Document]:
         metadata = {
             "source": base_file_name,
             "page": item["metadata"].get("page_number"),
-            "type": item["type"] # Ex: 'Table', 'Image', 'NarrativeText'
+            "type": item["type"] # Ex: 'Table', 'Image', 'NarrativeText', 'CompositeElement'
         }
         
+        # Chunks (ver rag/chunking.py) trazem a seção, o intervalo de páginas e os tipos dos elementos
+        for key in ("section", "parent_id", "page_end", "table_id", "element_types"):
+            if item["metadata"].get(key) is not None:
+                metadata[key] = item["metadata"][key]
+        
         docs.append(Document(page_content=content, metadata=metadata))
         
     return docs
 
 # ============================================================================= #
-def vectorize_json(json_data: json, base_file_name: str) -> FAISS:
+def vectorize_json(json_data: json, base_file_name: str, index_path: str | None = None,
+                   content_hash: str | None = None) -> ShardedVectorStore:
     """
     Vectorizes the provided JSON data using FAISS and HuggingFace embeddings.
 
     Args:
         json_data (str): The JSON data as a string.
+        index_path (str | None): Index directory (e.g. of a collection). Defaults to INDEX_PATH.
+        content_hash (str | None): `file_content_hash` of the source PDF, the same hash the
+            PDF ingestion records; None if the PDF is not available.
 
     Returns:
-        FAISS: The FAISS vector store containing the embedded documents.
+        ShardedVectorStore: The vector store containing the embedded documents.
     """
     
-    # 1. Cria os documentos novos a partir do JSON atual
-    new_docs = create_document(json_data, base_file_name)
+    # 1. Abre o índice em shards (cria se ainda não existir)
+    index_path = index_path or INDEX_PATH
+    print(f"🔄 Carregando índice em '{index_path}'...")
+    vector_store = load_vector_store(index_path)
+    sources = get_source_manifest(vector_store)
     
-    embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-    index_path = "rag/faiss_rag_index"
-
     # ============================================================================= #
-    # 2. Verifica se o índice já existe
-    if os.path.exists(index_path) and os.path.exists(f"{index_path}/index.faiss"):
-        print(f"🔄 Carregando índice existente em '{index_path}'...")
-        
-        # Carrega o índice existente (permitindo a desserialização perigosa se for local e seguro)
-        vector_store = FAISS.load_local(
-            index_path, 
-            embeddings, 
-            allow_dangerous_deserialization=True
-        )
-        
+    # Verifica se o documento já foi indexado antes de qualquer chunking (consulta direta no manifesto)
+    action, detail = sources.decide(base_file_name, content_hash)
+
+    if action == SKIP:
+        print(f"⚠️ {detail}. Pulando processamento.")
+        return vector_store
+    
     # ============================================================================= #
-        # Verifica se o documento já foi indexado
-        existing_sources = set()
-        if vector_store.docstore._dict: # Verifica se há documentos
-            for doc_id, doc in vector_store.docstore._dict.items():
-                if "source" in doc.metadata:
-                    existing_sources.add(doc.metadata["source"])
-
-        if base_file_name in existing_sources:
-            print(f"⚠️ O arquivo '{base_file_name}' já está no índice. Pulando processamento.")
-            return vector_store
+    # 2. Agrupa os elementos em chunks por seção e cria os documentos novos
+    chunks = chunk_elements(json_data)
+    new_docs = create_document(chunks, base_file_name)
         
     # ============================================================================= #
-        # ADICIONA os novos documentos ao índice carregado
-        vector_store.add_documents(new_docs)
-        print(f"➕ Adicionados {len(new_docs)} novos chunks ao índice.")
-        
-    else:
-        print("🆕 Criando um novo índice do zero...")
-        # Cria o índice pela primeira vez
-        vector_store = FAISS.from_documents(new_docs, embeddings)
+    # ADICIONA os novos documentos em um novo shard (o HTML das tabelas fica à parte)
+    save_tables(chunks, index_path, base_file_name)
+    vectors = get_embeddings().embed_documents([doc.page_content for doc in new_docs])
+    ids = vector_store.add_embedded_documents(new_docs, vectors)
+    print(f"➕ Adicionados {len(new_docs)} novos chunks ao índice.")
 
-    # 3. Salva o índice atualizado (sobrescrevendo a pasta com a versão combinada)
-    vector_store.save_local(index_path)
+    # 3. Salva apenas o novo shard (os existentes não são reescritos)
+    # Se o arquivo mudou, os vetores antigos são apagados na mesma atualização do manifesto;
+    # os ids ficam pendentes no manifesto de fontes até o `put` (um crash entre os dois é recuperado)
+    sources.begin(base_file_name, content_hash, ids)
+    shard = vector_store.commit(deleted_ids=detail if action == REPLACE else None)
+    sources.put(base_file_name, content_hash, ids, shard)
+    if action == REPLACE:
+        get_table_store(vector_store).delete_source(base_file_name, keep=document_table_ids(new_docs))
     print("✅ Índice atualizado salvo com sucesso.")
     
     return vector_store
     
 # ============================================================================= #
-def load_vector_store() -> FAISS:
-    embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+def get_source_manifest(vector_store: ShardedVectorStore) -> SourceManifest:
+    """
+    Opens the source manifest of the index, finishing the ingests interrupted after
+    their commit and building it once from the docstore for indexes created before
+    the manifest existed.
+
+    Args:
+        vector_store (ShardedVectorStore): The loaded vector store.
+
+    Returns:
+        SourceManifest: The source manifest.
+    """
+    sources = SourceManifest(vector_store.index_path)
+    recovered = sources.recover(vector_store.count_ids)
+    if recovered:
+        print(f"📋 {recovered} fonte(s) interrompida(s) após o commit registrada(s) no manifesto.")
+    if sources.is_empty() and vector_store.ntotal:
+        print("📋 Construindo o manifesto de fontes a partir do índice existente...")
+        sources.bootstrap(vector_store.iter_documents())
+        
+    return sources
+
+def get_table_store(vector_store: ShardedVectorStore) -> TableStore:
+    """
+    Opens the table store of the index, giving the tables of an older store
+    (saved without their source) the sources found in the docstore.
+
+    Args:
+        vector_store (ShardedVectorStore): The loaded vector store.
+
+    Returns:
+        TableStore: The table store.
+    """
+    tables = TableStore(vector_store.index_path)
+    if tables.has_legacy_rows():
+        print("📋 Associando as tabelas existentes às suas fontes...")
+        tables.assign_sources(vector_store.iter_documents())
+
+    return tables
+
+# ============================================================================= #
+def list_sources(index_path: str = INDEX_PATH) -> list[dict]:
+    """
+    Lists the indexed sources with their content hash, chunk count and ingest time.
+    """
+    return get_source_manifest(load_vector_store(index_path)).list_sources()
+
+# ============================================================================= #
+def delete_source(source: str, index_path: str = INDEX_PATH) -> int:
+    """
+    Deletes every vector of a source from the index, and its tables.
+
+    Args:
+        source (str): The source name.
+        index_path (str): Directory of the index.
+
+    Returns:
+        int: Number of deleted vectors.
+    """
+    vector_store = load_vector_store(index_path)
+    sources = get_source_manifest(vector_store)
     
-    # IMPORTANTE: allow_dangerous_deserialization=True
-    vector_store = FAISS.load_local(
-        "rag/faiss_rag_index", 
-        embeddings, 
-        allow_dangerous_deserialization=True 
-    )
-    return vector_store
+    entry = sources.get(source)
+    if entry is None:
+        return 0
+    
+    vector_store.delete(entry["vector_ids"])
+    sources.delete(source)
+    get_table_store(vector_store).delete_source(source)
+    return len(entry["vector_ids"])
 
-def get_retriever_tool(vector_store: FAISS):
+# ============================================================================= #
+def load_vector_store(index_path: str = INDEX_PATH) -> ShardedVectorStore:
     """
-    Factory function to create the tool with the vector_store pre-loaded.
+    Opens every shard of the index as one logical store. A legacy single-file
+    index is migrated to the sharded layout on first use.
+
+    Args:
+        index_path (str): Directory of the index.
+
+    Returns:
+        ShardedVectorStore: The loaded vector store.
+    """
+    return ShardedVectorStore(index_path, get_embeddings())
+
+# ============================================================================= #
+def get_retriever_tool(vector_store: ShardedVectorStore):
+    """
+    Factory function to create the tool with the vector_store pre-loaded (a single store
+    or a `CollectionSearcher` over several collections).
+    Results of repeated queries are reused until the index changes (near-identical queries
+    only with RETRIEVAL_CACHE_THRESHOLD). The tool accepts
+    metadata filters (type, source, page range), applied inside the search.
+
+    The search over-fetches candidates and `pack_context` turns them into a deduplicated,
+    diverse and cited context that fits the token budget.
     """
+    retrieval_cache = QueryCache(
+        vector_store.embeddings.embed_query,
+        threshold=RETRIEVAL_CACHE_THRESHOLD,
+        ttl_seconds=RETRIEVAL_CACHE_TTL_SECONDS,
+    )
     
     @tool(response_format="content_and_artifact")
-    def search_knowledge_base(query: str):
+    def search_knowledge_base(query: str, doc_type: str | None = None, source: str | None = None,
+                              page_from: int | None = None, page_to: int | None = None):
         """
         Call this tool to search for technical documents, pdfs, images and tables.
         Always use this tool to answer questions about the user's files.
+        Optional filters: doc_type (element type: 'Table', 'Image', 'NarrativeText', 'ListItem',
+        'Title', 'FigureCaption', 'Formula'; text chunks match the types of the elements they contain),
+        source (file name) and page_from / page_to (page range). Use them only when the question asks for them.
         """
-        # 1. Cria o objeto retriever
-        retriever = vector_store.as_retriever(search_kwargs={"k": 5})
+        metadata_filter = MetadataFilter(
+            types=[doc_type] if doc_type else None,
+            sources=[source] if source else None,
+            page_min=page_from,
+            page_max=page_to,
+        )
         
-        # 2. EXECUTA a busca (faltava o invoke!)
-        docs = retriever.invoke(query)
+        def _retrieve():
+            # 1. Busca híbrida (densa + BM25) com mais candidatos do que cabem no contexto
+            with telemetry.span("retrieval", k=CONTEXT_FETCH_K, filtered=not metadata_filter.is_empty):
+                hits = vector_store.hybrid_search_with_score(query, k=CONTEXT_FETCH_K, metadata_filter=metadata_filter)
+                vectors = vector_store.vectors_by_id([doc.id for doc, _ in hits])
+            # 2. Sem duplicados, diverso (MMR) e dentro do orçamento de tokens, com citações
+            return pack_context(query, hits, vector_store.embeddings, vectors=vectors)
         
-        # 3. Serializa para a LLM ler
-        serialized = "\n\n".join(
-            (f"Source: {doc.metadata.get('source', 'Unknown')} (Page {doc.metadata.get('page_number')})\nContent: {doc.page_content}")
-            for doc in docs
-        )
+        telemetry = get_telemetry()
+        if not metadata_filter.is_empty:
+            # Filtros são resolvidos por bitmaps pré-computados dentro da própria busca
+            serialized, docs = _retrieve()
+        else:
+            generation = vector_store.generation
+            cached = retrieval_cache.get(query, generation)
+            telemetry.incr("cache_lookups_total", cache="retrieval", result="miss" if cached is None else "hit")
+            if cached is None:
+                cached = _retrieve()
+                retrieval_cache.put(query, cached, generation)
+            serialized, docs = cached
         
-        # Retorna o texto para a LLM e os docs originais como artefato (opcional)
+        # Retorna o texto para a LLM e os docs usados como artefato (opcional)
         return serialized, docs
 
-    return search_knowledge_base
\ No newline at end of file
+    return search_knowledge_base
+
+# ============================================================================= #
+def get_table_tool(index_path: str | list[str] = INDEX_PATH):
+    """
+    Factory function to create the tool that returns the original HTML of a table.
+    Several index paths (collections) are searched in order.
+    """
+    table_stores = [TableStore(path) for path in ([index_path] if isinstance(index_path, str) else index_path)]
+
+    @tool
+    def get_table(table_id: str) -> str:
+        """
+        Returns the full original HTML of a table found by 'search_knowledge_base'.
+        Use it only when the compact table text is not enough (e.g. merged cells or missing rows).
+        """
+        for table_store in table_stores:
+            html = table_store.get(table_id)
+            if html is not None:
+                return html
+        return f"Tabela '{table_id}' não encontrada."
+
+    return get_table
\ No newline at end of file
@@ -0,0 +1,39 @@
+# ============================================================================= #
+# Project: Multimodal RAG Pipeline
+# Develop by: Thiago Piovesan
+# Description: Shared fixtures of the test suite (offline embeddings, temporary stores)
+# Date: 2026-01-08 // YYYY-MM-DD
+# Version: 0.1.0
+# License: MIT
+# ============================================================================= #
+# Libs Importation:
+import pytest
+from langchain_core.documents import Document
+
+from benchmarks.offline_benchmark import DeterministicEmbeddings
+from rag.sharded_store import ShardedVectorStore
+
+# ============================================================================= #
+@pytest.fixture
+def embeddings():
+    # Vetores determinísticos (md5 do texto): sem download de modelo nem rede
+    return DeterministicEmbeddings(dim=32)
+
+@pytest.fixture
+def store(tmp_path, embeddings):
+    return ShardedVectorStore(str(tmp_path / "index"), embeddings)
+
+@pytest.fixture
+def make_doc():
+    def _make_doc(text: str, **metadata) -> Document:
+        return Document(page_content=text, metadata={"source": "a.pdf", "type": "CompositeElement", "page": 1, **metadata})
+    return _make_doc
+
+@pytest.fixture
+def add_docs():
+    def _add_docs(store: ShardedVectorStore, docs: list[Document], deleted_ids: list[str] | None = None) -> list[str]:
+        # Os documentos viram um novo shard; retorna os seus ids
+        ids = store.add_embedded_documents(docs, store.embeddings.embed_documents([doc.page_content for doc in docs]))
+        store.commit(deleted_ids=deleted_ids)
+        return ids
+    return _add_docs
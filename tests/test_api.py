@@ -0,0 +1,85 @@
+# ============================================================================= #
+# Project: Multimodal RAG Pipeline
+# Develop by: Thiago Piovesan
+# Description: Tests of the headless API input handling
+# Date: 2026-01-08 // YYYY-MM-DD
+# Version: 0.1.0
+# License: MIT
+# ============================================================================= #
+# Libs Importation:
+import os
+import tarfile
+import zipfile
+
+import pytest
+
+from rag.api import expand_inputs, read_questions, safe_file_name
+
+# ============================================================================= #
+def _touch(path, content=b"%PDF-1.4"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(content)
+    return str(path)
+
+def test_directories_globs_and_files(tmp_path):
+    _touch(tmp_path / "docs" / "a.pdf")
+    _touch(tmp_path / "docs" / "sub" / "b.pdf")
+    _touch(tmp_path / "docs" / "notas.txt")
+    _touch(tmp_path / "outros" / "c.pdf")
+    _touch(tmp_path / "d-output.json", b"[]")
+
+    files = expand_inputs([
+        str(tmp_path / "docs"),
+        str(tmp_path / "outros" / "*.pdf"),
+        str(tmp_path / "d-output.json"),
+        str(tmp_path / "docs" / "notas.txt"),
+    ], str(tmp_path))
+
+    assert [source for _, source in files] == ["a.pdf", "b.pdf", "c.pdf", "d.pdf"]
+    assert all(os.path.exists(path) for path, _ in files)
+
+def test_archives_are_extracted_with_member_names(tmp_path):
+    with zipfile.ZipFile(tmp_path / "lote.zip", "w") as archive:
+        archive.writestr("relatorios/a.pdf", b"%PDF a")
+        archive.writestr("__MACOSX/relatorios/._a.pdf", b"lixo")
+        archive.writestr("leia-me.txt", b"texto")
+    _touch(tmp_path / "b.pdf", b"%PDF b")
+    with tarfile.open(tmp_path / "lote.tgz", "w:gz") as archive:
+        archive.add(tmp_path / "b.pdf", arcname="../b.pdf")
+
+    extract_dir = tmp_path / "extraido"
+    extract_dir.mkdir()
+    files = expand_inputs([str(tmp_path / "lote.zip"), str(tmp_path / "lote.tgz")], str(extract_dir))
+
+    assert [source for _, source in files] == ["relatorios/a.pdf", "../b.pdf"]
+    for path, _ in files:
+        # Nada é escrito fora da pasta de extração
+        assert os.path.realpath(path).startswith(os.path.realpath(extract_dir))
+    assert open(files[0][0], "rb").read() == b"%PDF a"
+
+def test_repeated_sources_are_kept_once(tmp_path):
+    first = _touch(tmp_path / "x" / "a.pdf")
+    _touch(tmp_path / "y" / "a.pdf")
+    files = expand_inputs([first, str(tmp_path / "y" / "a.pdf")], str(tmp_path))
+    assert files == [(first, "a.pdf")]
+
+def test_read_questions(tmp_path):
+    path = tmp_path / "perguntas.jsonl"
+    path.write_text('"Qual a receita?"\n\n{"id": "q2", "query": "E os custos?"}\n', encoding="utf-8")
+    records = read_questions(str(path))
+    assert [(record["id"], record["question"]) for record in records] == [(1, "Qual a receita?"), ("q2", "E os custos?")]
+
+def test_safe_file_name():
+    assert safe_file_name("C:\\Users\\ana\\relatório \"final\".pdf") == "relatório _final_.pdf"
+    assert safe_file_name("../../etc/passwd") == "passwd"
+    assert safe_file_name("..") == "documento.pdf"
+
+def test_read_questions_normalizes_collections(tmp_path):
+    path = tmp_path / "perguntas.jsonl"
+    path.write_text('{"question": "a", "collections": "papers"}\n{"question": "b", "collections": ["x", "y"]}\n', encoding="utf-8")
+    assert [record["collections"] for record in read_questions(str(path))] == [["papers"], ["x", "y"]]
+
+    path.write_text('{"question": "a"}\n{"question": "b", "collections": {"nome": "x"}}\n', encoding="utf-8")
+    with pytest.raises(ValueError, match=":2:"):
+        read_questions(str(path))
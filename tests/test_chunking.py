@@ -0,0 +1,38 @@
+# ============================================================================= #
+# Project: Multimodal RAG Pipeline
+# Develop by: Thiago Piovesan
+# Description: Tests of the layout-aware chunker
+# Date: 2026-01-08 // YYYY-MM-DD
+# Version: 0.1.0
+# License: MIT
+# ============================================================================= #
+# Libs Importation:
+from rag.chunking import chunk_elements, estimate_tokens
+
+# ============================================================================= #
+def _element(text, element_type="NarrativeText", page=1):
+    return {"type": element_type, "text": text, "metadata": {"page_number": page}}
+
+def test_text_under_a_title_is_merged_with_it():
+    chunks = chunk_elements([_element("Introdução", "Title"), _element("Primeiro parágrafo."), _element("Segundo parágrafo.")])
+    assert len(chunks) == 1
+    assert chunks[0]["text"] == "Introdução\nPrimeiro parágrafo.\nSegundo parágrafo."
+    assert chunks[0]["metadata"]["element_types"] == ["NarrativeText", "Title"]
+
+def test_long_run_of_titles_does_not_push_the_body_past_the_budget():
+    # Linhas curtas que o `unstructured` marca como Title
+    elements = [_element(f"Linha curta número {i}", "Title", page=1 + i // 50) for i in range(200)]
+    body = "O corpo do documento que precisa ser indexado. " * 10
+    chunks = chunk_elements(elements + [_element(body, page=5)], max_tokens=256)
+
+    assert all(estimate_tokens(chunk["text"]) <= 256 for chunk in chunks)
+    assert body.strip() in chunks[-1]["text"]
+    # Nenhum título é perdido
+    titles = "\n".join(chunk["text"] for chunk in chunks)
+    assert all(f"Linha curta número {i}\n" in titles for i in range(200))
+
+def test_long_text_is_split_within_the_budget():
+    chunks = chunk_elements([_element("Seção", "Title"), _element("Uma frase do relatório. " * 200)], max_tokens=64)
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk["text"]) <= 64 for chunk in chunks)
+    assert chunks[0]["text"].startswith("Seção\n")
@@ -0,0 +1,39 @@
+# ============================================================================= #
+# Project: Multimodal RAG Pipeline
+# Develop by: Thiago Piovesan
+# Description: Tests of the headless command line output
+# Date: 2026-01-08 // YYYY-MM-DD
+# Version: 0.1.0
+# License: MIT
+# ============================================================================= #
+# Libs Importation:
+import json
+import subprocess
+
+import pytest
+
+from rag import api, cli
+
+# ============================================================================= #
+def test_batch_stdout_has_only_jsonl(tmp_path, monkeypatch, capfd):
+    def _query_batch(records, collections=None, max_workers=1, on_result=None):
+        # Mensagens da biblioteca, de processos filhos e de código nativo
+        print("🔄 Carregando coleções ...")
+        subprocess.run(["echo", "mensagem de um processo filho"])
+        for done, record in enumerate(records, start=1):
+            result = {**record, "answer": f"resposta {done}", "seconds": 0.0, "error": None}
+            on_result(done, len(records), result)
+            yield result
+
+    monkeypatch.setattr(api, "query_batch", _query_batch)
+    questions = tmp_path / "perguntas.jsonl"
+    questions.write_text('"Qual a receita?"\n"E os custos?"\n', encoding="utf-8")
+
+    with pytest.raises(SystemExit) as exit_info:
+        cli.main(["batch", str(questions)])
+
+    out, err = capfd.readouterr()
+    assert exit_info.value.code == 0
+    assert [json.loads(line)["answer"] for line in out.splitlines()] == ["resposta 1", "resposta 2"]
+    assert "Carregando coleções" in err
+    assert "processo filho" in err
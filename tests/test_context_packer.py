@@ -0,0 +1,68 @@
+# ============================================================================= #
+# Project: Multimodal RAG Pipeline
+# Develop by: Thiago Piovesan
+# Description: Tests of the token-budgeted context packing
+# Date: 2026-01-08 // YYYY-MM-DD
+# Version: 0.1.0
+# License: MIT
+# ============================================================================= #
+# Libs Importation:
+from rag.chunking import estimate_tokens
+from rag.context_packer import pack_context, truncate_table
+
+# ============================================================================= #
+def _hits(make_doc, texts):
+    return [(make_doc(text, page=i + 1), 1.0 / (i + 1)) for i, text in enumerate(texts)]
+
+def test_context_fits_the_token_budget(make_doc, embeddings):
+    texts = [f"Trecho {i}. " + "A receita cresceu no período analisado. " * 40 for i in range(10)]
+    context, packed = pack_context("receita", _hits(make_doc, texts), embeddings, token_budget=500, max_chunks=8, chunk_tokens=200)
+
+    assert estimate_tokens(context) <= 500
+    assert 1 < len(packed) <= 8
+    # Cada trecho traz a sua citação numerada
+    assert context.startswith("[1] Source: a.pdf")
+
+def test_max_chunks_and_exact_duplicates(make_doc, embeddings):
+    texts = ["Receita  subiu.", "receita subiu.", "Custos caíram.", "Margem estável.", "Dívida menor."]
+    _, packed = pack_context("receita", _hits(make_doc, texts), embeddings, token_budget=1000, max_chunks=3)
+
+    assert len(packed) == 3
+    contents = [doc.page_content.lower().replace("  ", " ") for doc in packed]
+    assert len(set(contents)) == len(contents)
+
+def test_most_relevant_chunk_comes_first(make_doc, embeddings):
+    texts = ["Primeiro trecho.", "Segundo trecho.", "Terceiro trecho."]
+    _, packed = pack_context("trecho", _hits(make_doc, texts), embeddings, token_budget=1000)
+    assert packed[0].page_content == "Primeiro trecho."
+
+def test_long_table_keeps_header_and_counts_omitted_rows():
+    table = "Table:\n| a | b |\n| --- | --- |\n" + "\n".join(f"| {i} | {i * 10} |" for i in range(200))
+    truncated = truncate_table(table, 50)
+
+    assert truncated.startswith("Table:\n| a | b |\n| --- | --- |\n| 0 | 0 |")
+    assert truncated.endswith("linhas omitidas |")
+    assert estimate_tokens(truncated) < estimate_tokens(table)
+
+def test_stored_vectors_are_used_instead_of_embedding(make_doc, embeddings, store, add_docs):
+    texts = ["Receita subiu.", "Custos caíram.", "Margem estável."]
+    add_docs(store, [make_doc(text) for text in texts])
+    hits = store.hybrid_search_with_score("receita", k=10)
+
+    embedded = []
+    class _CountingEmbeddings:
+        def embed_query(self, text):
+            return embeddings.embed_query(text)
+        def embed_documents(self, texts):
+            embedded.extend(texts)
+            return embeddings.embed_documents(texts)
+
+    vectors = store.vectors_by_id([doc.id for doc, _ in hits])
+    _, packed = pack_context("receita", hits, _CountingEmbeddings(), vectors=vectors)
+    assert embedded == []
+    assert len(packed) == 3
+
+    # Sem vetor guardado (ex.: outro backend): só esses são embedados
+    del vectors[hits[0][0].id]
+    pack_context("receita", hits, _CountingEmbeddings(), vectors=vectors)
+    assert embedded == [hits[0][0].page_content]
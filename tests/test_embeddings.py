@@ -0,0 +1,78 @@
+# ============================================================================= #
+# Project: Multimodal RAG Pipeline
+# Develop by: Thiago Piovesan
+# Description: Tests of the persistent embedding cache
+# Date: 2026-01-08 // YYYY-MM-DD
+# Version: 0.1.0
+# License: MIT
+# ============================================================================= #
+# Libs Importation:
+import os
+
+import numpy as np
+import pytest
+
+from rag.embeddings import CachedEmbeddings, EmbeddingCache
+
+# ============================================================================= #
+@pytest.fixture
+def cache(tmp_path):
+    return EmbeddingCache("modelo/teste", cache_dir=str(tmp_path))
+
+def _vectors(cache, texts, dim=8):
+    return {cache.text_hash(text): np.full(dim, i + 1, dtype=np.float32) for i, text in enumerate(texts)}
+
+def _assert_found(cache, items):
+    found = cache.get_many(list(items))
+    assert sorted(found) == sorted(items)
+    for key, vector in items.items():
+        np.testing.assert_array_equal(found[key], vector)
+
+# ============================================================================= #
+def test_round_trip_across_instances(cache, tmp_path):
+    items = _vectors(cache, ["a", "b", "c"])
+    cache.put_many(items)
+    _assert_found(EmbeddingCache("modelo/teste", cache_dir=str(tmp_path)), items)
+
+def test_partial_row_from_an_interrupted_write_is_discarded(cache):
+    first = _vectors(cache, ["a", "b"])
+    cache.put_many(first)
+    # Crash no meio de `f.write`: meia linha sem registro no SQLite
+    with open(cache.vectors_path, "ab") as f:
+        f.write(b"\x00" * 10)
+
+    second = {cache.text_hash(text): np.full(8, value, dtype=np.float32) for text, value in (("c", 7), ("d", 9))}
+    cache.put_many(second)
+
+    _assert_found(cache, {**first, **second})
+    assert os.path.getsize(cache.vectors_path) == 4 * 8 * 4
+
+def test_truncated_file_drops_the_lost_rows(cache):
+    items = _vectors(cache, ["a", "b", "c"])
+    cache.put_many(items)
+    # Arquivo cortado no meio da segunda linha
+    with open(cache.vectors_path, "r+b") as f:
+        f.truncate(8 * 4 + 5)
+
+    new = {cache.text_hash("d"): np.full(8, 5, dtype=np.float32)}
+    cache.put_many(new)
+
+    keys = list(items)
+    _assert_found(cache, {keys[0]: items[keys[0]], **new})
+    assert cache.get_many(keys[1:]) == {}
+
+def test_cached_embeddings_embed_only_the_misses(tmp_path, embeddings):
+    calls = []
+
+    class _Counting(type(embeddings)):
+        def embed_documents(self, texts):
+            calls.append(list(texts))
+            return super().embed_documents(texts)
+
+    model = CachedEmbeddings(_Counting(dim=32), "modelo", cache=EmbeddingCache("modelo", cache_dir=str(tmp_path)))
+    first = model.embed_documents(["x", "y", "x"])
+    second = model.embed_documents(["y", "z"])
+
+    assert calls == [["x", "y"], ["z"]]
+    assert first[0] == first[2] == embeddings.embed_documents(["x"])[0]
+    assert second[0] == first[1]
@@ -0,0 +1,105 @@
+# ============================================================================= #
+# Project: Multimodal RAG Pipeline
+# Develop by: Thiago Piovesan
+# Description: Tests of the concurrent image description against local stub models
+# Date: 2026-01-08 // YYYY-MM-DD
+# Version: 0.1.0
+# License: MIT
+# ============================================================================= #
+# Libs Importation:
+import time
+import threading
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from agents.image_descriptor import ImageDescriptionError, TokenBucket, describe_images_batch
+from benchmarks.offline_benchmark import StubVisionModel
+
+# ============================================================================= #
+class EchoVisionModel:
+    """
+    Describes each image by its base64 payload, failing as scripted per image and
+    recording how many calls run at the same time.
+    """
+
+    def __init__(self, failures: dict | None = None, delay: float = 0.0):
+        self.failures = {image: list(errors) for image, errors in (failures or {}).items()}
+        self.delay = delay
+        self.calls = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def invoke(self, messages):
+        image = messages[0].content[1]["image_url"]["url"].split(",", 1)[1]
+        with self._lock:
+            self.calls[image] = self.calls.get(image, 0) + 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            errors = self.failures.get(image)
+            error = errors.pop(0) if errors else None
+        try:
+            time.sleep(self.delay)
+            if error is not None:
+                raise error
+            return AIMessage(content=f"descrição de {image}")
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+def _limiter():
+    return TokenBucket(rate=1e6)
+
+# ============================================================================= #
+def test_stub_model_describes_every_image():
+    descriptions = describe_images_batch(["aGVsbG8="] * 3, model=StubVisionModel(), rate_limiter=_limiter())
+    assert descriptions == ["Stub description: a diagram with boxes and arrows."] * 3
+
+def test_concurrency_is_bounded_and_order_is_kept():
+    model = EchoVisionModel(delay=0.02)
+    images = [f"img{i}" for i in range(12)]
+    delivered = {}
+
+    descriptions = describe_images_batch(images, model=model, rate_limiter=_limiter(), max_concurrency=4,
+                                         on_result=delivered.__setitem__)
+
+    assert descriptions == [f"descrição de {image}" for image in images]
+    assert delivered == dict(enumerate(descriptions))
+    assert 1 < model.max_in_flight <= 4
+
+def test_transient_errors_are_retried_with_backoff():
+    model = EchoVisionModel(failures={"img1": [TimeoutError("deadline"), RuntimeError("503 UNAVAILABLE")]})
+    descriptions = describe_images_batch(["img0", "img1"], model=model, rate_limiter=_limiter(),
+                                         base_delay=0.01, max_delay=0.01)
+    assert descriptions == ["descrição de img0", "descrição de img1"]
+    assert model.calls == {"img0": 1, "img1": 3}
+
+def test_permanent_error_is_not_retried():
+    model = EchoVisionModel(failures={"img0": [ValueError("imagem inválida")]})
+    with pytest.raises(ImageDescriptionError):
+        describe_images_batch(["img0"], model=model, rate_limiter=_limiter(), base_delay=0.01)
+    assert model.calls == {"img0": 1}
+
+def test_partial_failure_delivers_every_success_before_raising():
+    # img0 falha primeiro; as descrições que chegam depois ainda vão para o cache
+    model = EchoVisionModel(failures={"img0": [ValueError("imagem inválida")]}, delay=0.01)
+    images = [f"img{i}" for i in range(6)]
+    delivered = {}
+
+    with pytest.raises(ImageDescriptionError) as excinfo:
+        describe_images_batch(images, model=model, rate_limiter=_limiter(), max_concurrency=2,
+                              on_result=delivered.__setitem__)
+
+    assert sorted(delivered) == [1, 2, 3, 4, 5]
+    assert list(excinfo.value.errors) == [0]
+    assert excinfo.value.descriptions == [None] + [f"descrição de {image}" for image in images[1:]]
+    assert isinstance(excinfo.value.__cause__, ValueError)
+
+def test_token_bucket_paces_requests():
+    limiter = TokenBucket(rate=50.0, capacity=1.0)
+    started = time.monotonic()
+    for _ in range(6):
+        limiter.acquire()
+    # 1 token inicial + 5 a 50/s
+    assert time.monotonic() - started >= 0.09
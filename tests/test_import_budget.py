@@ -0,0 +1,35 @@
+# ============================================================================= #
+# Project: Multimodal RAG Pipeline
+# Develop by: Thiago Piovesan
+# Description: Import-time budget of the app and worker entry points
+# Date: 2026-01-08 // YYYY-MM-DD
+# Version: 0.1.0
+# License: MIT
+# ============================================================================= #
+# Libs Importation:
+import re
+
+import pytest
+
+from benchmarks.import_budget import MODULES, IMPORT_BUDGET_SECONDS, measure_import
+
+# ============================================================================= #
+# Dependências do app que podem faltar no ambiente de testes (só a interface usa)
+OPTIONAL_DEPENDENCIES = ("streamlit", "pandas")
+
+_MISSING_MODULE_RE = re.compile(r"^ModuleNotFoundError: No module named '([^']+)'")
+
+# ============================================================================= #
+@pytest.mark.parametrize("module", MODULES)
+def test_import_is_light(module):
+    # Cada módulo é importado em um interpretador novo (nada em cache deste processo)
+    report = measure_import(module)
+    if "error" in report:
+        missing = _MISSING_MODULE_RE.match(report["error"])
+        # Um import quebrado no nosso código continua falhando o teste
+        if missing and missing.group(1).split(".")[0] in OPTIONAL_DEPENDENCIES:
+            pytest.skip(f"dependência não instalada: {report['error']}")
+        pytest.fail(f"falha no import de {module}: {report['error']}")
+
+    assert report["heavy_modules"] == [], f"{module} carregou {report['heavy_modules']} no import"
+    assert report["seconds"] <= IMPORT_BUDGET_SECONDS
@@ -0,0 +1,45 @@
+# ============================================================================= #
+# Project: Multimodal RAG Pipeline
+# Develop by: Thiago Piovesan
+# Description: Tests of the streaming ingestion stages
+# Date: 2026-01-08 // YYYY-MM-DD
+# Version: 0.1.0
+# License: MIT
+# ============================================================================= #
+# Libs Importation:
+import queue
+import threading
+
+from rag.ingestion import _iter_queue, _run_stage
+
+# ============================================================================= #
+def _producer(state, count=100):
+    try:
+        for i in range(count):
+            yield i
+    finally:
+        # Ex.: o pool de processos de `iter_adaptive_batches` sai aqui
+        state["closed"] = True
+
+def test_stage_forwards_every_item():
+    state = {}
+    out_queue = queue.Queue(maxsize=2)
+    _run_stage(_producer(state, 5), out_queue, threading.Event())
+    assert list(_iter_queue(out_queue)) == [0, 1, 2, 3, 4]
+    assert state["closed"]
+
+def test_stopped_stage_closes_its_producer():
+    state = {}
+    stop = threading.Event()
+    out_queue = queue.Queue(maxsize=1)
+    # Referência mantida: o fechamento não pode depender da coleta de lixo
+    producer = _producer(state)
+    thread = _run_stage(producer, out_queue, stop)
+
+    assert out_queue.get(timeout=5) == 0
+    # Consumidor abortou (ex.: erro na descrição): a fila não é mais lida
+    stop.set()
+    thread.join(timeout=5)
+
+    assert not thread.is_alive()
+    assert state.get("closed")
@@ -0,0 +1,73 @@
+# ============================================================================= #
+# Project: Multimodal RAG Pipeline
+# Develop by: Thiago Piovesan
+# Description: Tests of the background job queue
+# Date: 2026-01-08 // YYYY-MM-DD
+# Version: 0.1.0
+# License: MIT
+# ============================================================================= #
+# Libs Importation:
+import pytest
+
+from rag.job_queue import JobQueue, run_job, RUNNING, DONE, SKIPPED
+from rag.source_manifest import SourceManifest
+
+# ============================================================================= #
+@pytest.fixture
+def job_queue(tmp_path):
+    return JobQueue(str(tmp_path / "jobs"))
+
+@pytest.fixture
+def pdf(tmp_path):
+    path = tmp_path / "a.pdf"
+    path.write_bytes(b"%PDF a")
+    return str(path)
+
+# ============================================================================= #
+def test_locked_collection_jobs_wait(job_queue, pdf):
+    job_id = job_queue.enqueue(pdf, "a.pdf", collection="papers")
+    other_id = job_queue.enqueue(pdf, "b.pdf")
+
+    assert job_queue.lock_collection("papers", "cli")
+    # Os jobs de outras coleções continuam andando
+    assert job_queue.claim("worker")["id"] == other_id
+    assert job_queue.claim("worker") is None
+
+    job_queue.unlock_collection("papers", "cli")
+    assert job_queue.claim("worker")["id"] == job_id
+
+def test_running_job_blocks_the_collection_lock(job_queue, pdf):
+    job_queue.enqueue(pdf, "a.pdf")
+    assert job_queue.claim("worker")["status"] == RUNNING
+
+    assert not job_queue.lock_collection(None, "cli")
+    assert job_queue.lock_collection("papers", "cli")
+
+def test_collection_lock_has_one_owner(job_queue):
+    assert job_queue.lock_collection("papers", "cli-1")
+    assert not job_queue.lock_collection("papers", "cli-2")
+    job_queue.unlock_collection("papers", "cli-1")
+    assert job_queue.lock_collection("papers", "cli-2")
+
+class _SkippingWriter:
+    """
+    Index writer whose manifest already has the content (under `indexed_as`).
+    """
+
+    def __init__(self, tmp_path, indexed_as, content_hash):
+        self.sources = SourceManifest(str(tmp_path / "index"))
+        self.sources.put(indexed_as, content_hash, ["id-1"], "shard-1")
+
+    def check(self, source, content_hash):
+        return self.sources.decide(source, content_hash)
+
+@pytest.mark.parametrize("indexed_as, expected", [("a.pdf", DONE), ("copia.pdf", SKIPPED)])
+def test_resumed_job_is_done_only_if_this_source_was_committed(job_queue, pdf, tmp_path, indexed_as, expected):
+    job = job_queue.get(job_queue.enqueue(pdf, "a.pdf"))
+    job["stage"] = "embedded"
+    writer = _SkippingWriter(tmp_path, indexed_as, job["content_hash"])
+
+    status, message = run_job(job_queue, job, writer)
+    assert status == expected
+    if expected == SKIPPED:
+        assert "copia.pdf" in message
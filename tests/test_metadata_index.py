@@ -0,0 +1,104 @@
+# ============================================================================= #
+# Project: Multimodal RAG Pipeline
+# Develop by: Thiago Piovesan
+# Description: Tests of the metadata bitmaps (type / source / pages filters)
+# Date: 2026-01-08 // YYYY-MM-DD
+# Version: 0.1.0
+# License: MIT
+# ============================================================================= #
+# Libs Importation:
+import numpy as np
+import pytest
+
+from rag.chunking import chunk_elements
+from rag.metadata_index import MetadataFilter, MetadataIndex, build_metadata_index, clear_bits, test_bits as bits_set
+from rag.vector_store import create_document
+
+# ============================================================================= #
+@pytest.fixture
+def index(tmp_path, make_doc):
+    docs = [
+        make_doc("texto", source="relatorio.pdf", type="CompositeElement", page=1, element_types=["ListItem", "NarrativeText"]),
+        make_doc("tabela", source="relatorio.pdf", type="Table", page=2),
+        make_doc("imagem", source="manual.pdf", type="Image", page=3),
+        make_doc("texto longo", source="manual.pdf", type="CompositeElement", page=4, page_end=6),
+        make_doc("sem página", source="manual.pdf", type="CompositeElement", page=None),
+    ]
+    path = str(tmp_path / "metadata")
+    build_metadata_index(path, [(str(i), doc) for i, doc in enumerate(docs)])
+    return MetadataIndex(path)
+
+def _ordinals(index, **filters) -> list[int]:
+    bitmap = index.bitmap(MetadataFilter(**filters))
+    return np.flatnonzero(np.unpackbits(bitmap, bitorder="little")[:index.num_docs]).tolist()
+
+# ============================================================================= #
+def test_empty_filter_allows_everything(index):
+    assert _ordinals(index) == [0, 1, 2, 3, 4]
+
+def test_type_and_source_filters(index):
+    assert _ordinals(index, types=["table"]) == [1]
+    assert _ordinals(index, types=["Table", "Image"]) == [1, 2]
+    # Sem extensão e sem diferenciar maiúsculas
+    assert _ordinals(index, sources=["MANUAL"]) == [2, 3, 4]
+    assert _ordinals(index, types=["Image"], sources=["relatorio.pdf"]) == []
+    assert _ordinals(index, types=["Formula"]) == []
+
+def test_type_matches_elements_merged_into_a_chunk(index):
+    assert _ordinals(index, types=["NarrativeText"]) == [0]
+    assert _ordinals(index, types=["compositeelement"]) == [0, 3, 4]
+
+def test_chunks_record_their_element_types(make_doc):
+    elements = [
+        {"type": "Title", "text": "Resultados", "metadata": {"page_number": 1}},
+        {"type": "NarrativeText", "text": "A receita cresceu.", "metadata": {"page_number": 1}},
+        {"type": "ListItem", "text": "Custos caíram.", "metadata": {"page_number": 2}},
+        {"type": "Image", "text": "Gráfico de barras.", "metadata": {"page_number": 2}},
+    ]
+    docs = create_document(chunk_elements(elements), "r.pdf")
+    assert [(doc.metadata["type"], doc.metadata.get("element_types")) for doc in docs] == [
+        ("CompositeElement", ["ListItem", "NarrativeText", "Title"]),
+        ("Image", None),
+    ]
+
+def test_page_range_keeps_overlapping_chunks(index):
+    assert _ordinals(index, page_min=2, page_max=3) == [1, 2]
+    assert _ordinals(index, page_min=5) == [3]
+    assert _ordinals(index, page_max=1) == [0]
+    assert _ordinals(index, page_min=2, sources=["manual"]) == [2, 3]
+
+def test_page_index_matches_a_linear_scan(tmp_path, make_doc):
+    rng = np.random.default_rng(0)
+    docs = []
+    for i in range(500):
+        page = None if i % 20 == 0 else int(rng.integers(1, 60))
+        docs.append((str(i), make_doc("x", page=page, page_end=page and page + int(rng.integers(0, 3)))))
+    build_metadata_index(str(tmp_path / "metadata"), docs)
+    index = MetadataIndex(str(tmp_path / "metadata"))
+
+    pages = np.asarray(index.pages)
+    for page_min, page_max in [(1, 1), (10, 12), (None, 5), (30, None), (0, 100), (61, None), (5, 2)]:
+        expected = pages[:, 0] >= 0
+        if page_min is not None:
+            expected &= pages[:, 1] >= page_min
+        if page_max is not None:
+            expected &= pages[:, 0] <= page_max
+        assert _ordinals(index, page_min=page_min, page_max=page_max) == np.flatnonzero(expected).tolist()
+
+def test_bits_beyond_last_document_are_cleared(index):
+    assert index.bitmap(MetadataFilter()).nbytes == 1
+    assert np.unpackbits(index.bitmap(MetadataFilter()), bitorder="little")[index.num_docs:].sum() == 0
+
+def test_clear_and_test_bits():
+    bitmap = np.full(2, 0xFF, dtype=np.uint8)
+    clear_bits(bitmap, np.array([0, 9]))
+    assert bits_set(bitmap, np.array([0, 1, 8, 9])).tolist() == [False, True, True, False]
+
+def test_store_search_respects_filter(store, make_doc, add_docs):
+    add_docs(store, [make_doc("receita", type="Table", page=1), make_doc("receita anual", page=7)])
+    add_docs(store, [make_doc("receita mensal", source="b.pdf", page=2)])
+
+    hits = store.hybrid_search("receita", k=10, metadata_filter=MetadataFilter(page_min=2))
+    assert sorted(doc.page_content for doc in hits) == ["receita anual", "receita mensal"]
+    hits = store.similarity_search("receita", k=10, metadata_filter=MetadataFilter(types=["table"]))
+    assert [doc.page_content for doc in hits] == ["receita"]
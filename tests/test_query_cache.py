@@ -0,0 +1,47 @@
+# ============================================================================= #
+# Project: Multimodal RAG Pipeline
+# Develop by: Thiago Piovesan
+# Description: Tests of the exact + semantic query cache
+# Date: 2026-01-08 // YYYY-MM-DD
+# Version: 0.1.0
+# License: MIT
+# ============================================================================= #
+# Libs Importation:
+from rag.query_cache import QueryCache
+
+# ============================================================================= #
+def _cache(embeddings, threshold=None):
+    cache = QueryCache(embeddings.embed_query, threshold=threshold)
+    cache.get("", generation=1)     # Fixa a geração atual
+    return cache
+
+def test_exact_match_ignores_case_spaces_and_punctuation(embeddings):
+    cache = _cache(embeddings)
+    cache.put("Qual é a receita?", "resposta", generation=1)
+    assert cache.get("  qual é  a RECEITA ", generation=1) == "resposta"
+    assert cache.get("qual é a despesa", generation=1) is None
+
+def test_new_generation_drops_entries(embeddings):
+    cache = _cache(embeddings)
+    cache.put("pergunta", "resposta", generation=1)
+    assert cache.get("pergunta", generation=2) is None
+    assert cache.get("pergunta", generation=1) is None
+    assert cache.stats()["entries"] == 0
+
+def test_value_computed_against_old_generation_is_not_stored(embeddings):
+    cache = _cache(embeddings)
+    cache.get("outra", generation=2)
+    cache.put("pergunta", "resposta antiga", generation=1)
+    assert cache.get("pergunta", generation=2) is None
+
+def test_semantic_match_only_above_threshold(embeddings):
+    cache = _cache(embeddings, threshold=0.9)
+    cache.put("pergunta", "resposta", generation=1)
+    # DeterministicEmbeddings: textos diferentes têm vetores quase ortogonais
+    assert cache.get("outra pergunta", generation=1) is None
+
+    cache = QueryCache(lambda text: [1.0, 0.0], threshold=0.9)
+    cache.get("", generation=1)
+    cache.put("pergunta", "resposta", generation=1)
+    assert cache.get("outra pergunta", generation=1) == "resposta"
+    assert cache.stats()["semantic_hits"] == 1
@@ -0,0 +1,105 @@
+# ============================================================================= #
+# Project: Multimodal RAG Pipeline
+# Develop by: Thiago Piovesan
+# Description: Tests of the sharded store (tombstones, compaction, hybrid search)
+# Date: 2026-01-08 // YYYY-MM-DD
+# Version: 0.1.0
+# License: MIT
+# ============================================================================= #
+# Libs Importation:
+import os
+import shutil
+
+import pytest
+
+from rag.sharded_store import ShardedVectorStore, RRF_K, read_manifest
+
+# ============================================================================= #
+TEXTS = [
+    "receita líquida do trimestre cresceu",
+    "custos operacionais caíram no período",
+    "margem bruta ficou estável",
+]
+
+def _dense_ids(store, text, k=10):
+    return [doc.id for doc, _ in store.similarity_search_with_score(text, k)]
+
+def _lexical_ids(store, text, k=10):
+    return [doc.id for doc, _ in store.lexical_search_with_score(text, k)]
+
+# ============================================================================= #
+def test_deleted_ids_are_hidden_from_every_search(store, make_doc, add_docs):
+    ids = add_docs(store, [make_doc(text) for text in TEXTS])
+    store.delete([ids[0]])
+
+    assert ids[0] not in _dense_ids(store, TEXTS[0])
+    assert ids[0] not in _lexical_ids(store, "receita trimestre")
+    assert ids[0] not in [doc.id for doc in store.hybrid_search(TEXTS[0], k=10)]
+    assert {doc_id for doc_id, _ in store.iter_documents()} == set(ids[1:])
+
+def test_replacement_tombstones_old_version_in_the_same_commit(store, make_doc, add_docs):
+    old_ids = add_docs(store, [make_doc(TEXTS[0])])
+    new_ids = add_docs(store, [make_doc(TEXTS[0] + " muito")], deleted_ids=old_ids)
+
+    assert _dense_ids(store, TEXTS[0]) == new_ids
+    assert read_manifest(store.index_path)["deleted_ids"] == old_ids
+
+def test_compaction_drops_tombstones_and_keeps_results(store, make_doc, add_docs, embeddings):
+    ids = []
+    for text in TEXTS:
+        ids += add_docs(store, [make_doc(text)])
+    store.delete([ids[1]])
+    before = _dense_ids(store, TEXTS[0])
+
+    # Outro processo com o índice aberto antes da compactação
+    reader = ShardedVectorStore(store.index_path, embeddings)
+    assert store.compact(min_shard_size=100) is not None
+
+    manifest = read_manifest(store.index_path)
+    assert len(manifest["shards"]) == 1
+    assert manifest["shards"][0]["count"] == 2
+    assert not manifest.get("deleted_ids")
+
+    store.refresh()
+    assert store.ntotal == 2
+    assert _dense_ids(store, TEXTS[0]) == before
+    # O leitor antigo continua lendo os shards aposentados e vê o mesmo resultado depois do refresh
+    assert _dense_ids(reader, TEXTS[0]) == before
+    assert reader.refresh()
+    assert _dense_ids(reader, TEXTS[0]) == before
+
+def test_hybrid_search_fuses_ranks_with_rrf(store, make_doc, add_docs):
+    add_docs(store, [make_doc(text) for text in TEXTS])
+    query = "receita do trimestre"
+
+    dense, lexical = _dense_ids(store, query), _lexical_ids(store, query)
+    expected = {}
+    for results in (dense, lexical):
+        for rank, doc_id in enumerate(results):
+            expected[doc_id] = expected.get(doc_id, 0.0) + 1.0 / (RRF_K + rank + 1)
+
+    fused = store.hybrid_search_with_score(query, k=10)
+    assert {doc.id: score for doc, score in fused} == expected
+    assert [score for _, score in fused] == sorted(expected.values(), reverse=True)
+    # Primeiro nas duas listas: primeiro no resultado
+    assert fused[0][0].page_content == TEXTS[0]
+
+def test_vectors_by_id_reads_the_stored_vectors(store, make_doc, add_docs, embeddings):
+    ids = add_docs(store, [make_doc(text) for text in TEXTS[:2]])
+    ids += add_docs(store, [make_doc(TEXTS[2])])
+
+    vectors = store.vectors_by_id(ids + ["desconhecido"])
+    assert sorted(vectors) == sorted(ids)
+    for doc_id, text in zip(ids, TEXTS):
+        assert vectors[doc_id] == pytest.approx(embeddings.embed_query(text), abs=1e-6)
+
+def test_outdated_shard_is_upgraded_before_it_is_opened(store, make_doc, add_docs, embeddings):
+    add_docs(store, [make_doc(text) for text in TEXTS])
+    shard_path = store.shards[0].path
+    # Shard gravado antes do BM25 e dos filtros de metadados
+    for name in ("lexical", "metadata"):
+        shutil.rmtree(os.path.join(shard_path, name))
+
+    reopened = ShardedVectorStore(store.index_path, embeddings)
+    assert sorted(os.listdir(shard_path)) == ["docstore.sqlite", "index.faiss", "lexical", "metadata"]
+    assert _lexical_ids(reopened, "receita trimestre")[0] == _dense_ids(reopened, TEXTS[0])[0]
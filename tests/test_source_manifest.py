@@ -0,0 +1,62 @@
+# ============================================================================= #
+# Project: Multimodal RAG Pipeline
+# Develop by: Thiago Piovesan
+# Description: Tests of the source manifest (skip / new / replace decisions)
+# Date: 2026-01-08 // YYYY-MM-DD
+# Version: 0.1.0
+# License: MIT
+# ============================================================================= #
+# Libs Importation:
+import pytest
+
+from rag.source_manifest import SourceManifest, SKIP, NEW, REPLACE
+
+# ============================================================================= #
+@pytest.fixture
+def sources(tmp_path):
+    manifest = SourceManifest(str(tmp_path))
+    manifest.put("a.pdf", "hash-a", ["id-1", "id-2"], "shard-1")
+    return manifest
+
+def test_unknown_source_is_new(sources):
+    assert sources.decide("b.pdf", "hash-b") == (NEW, None)
+
+def test_same_content_is_skipped(sources):
+    action, _ = sources.decide("a.pdf", "hash-a")
+    assert action == SKIP
+
+def test_unknown_hash_of_indexed_source_is_skipped(sources):
+    action, _ = sources.decide("a.pdf", None)
+    assert action == SKIP
+
+def test_same_content_under_another_name_is_skipped(sources):
+    action, reason = sources.decide("copy.pdf", "hash-a")
+    assert action == SKIP
+    assert "a.pdf" in reason
+
+def test_changed_content_replaces_old_vectors(sources):
+    assert sources.decide("a.pdf", "hash-a2") == (REPLACE, ["id-1", "id-2"])
+
+def test_deleted_source_is_new_again(sources):
+    assert sources.delete("a.pdf") == ["id-1", "id-2"]
+    assert sources.decide("a.pdf", "hash-a") == (NEW, None)
+
+def test_ingest_interrupted_after_commit_is_recorded(sources):
+    sources.begin("b.pdf", "hash-b", ["id-3"])
+    # Crash depois do commit do shard e antes do put: os vetores estão no índice
+    assert sources.recover(lambda ids: len(ids)) == 1
+    assert sources.decide("b.pdf", "hash-b")[0] == SKIP
+    assert sources.recover(lambda ids: len(ids)) == 0
+
+def test_ingest_interrupted_before_commit_is_dropped(sources):
+    sources.begin("b.pdf", "hash-b", ["id-3"])
+    assert sources.recover(lambda ids: 0) == 0
+    assert sources.decide("b.pdf", "hash-b") == (NEW, None)
+    # A entrada pendente foi descartada
+    assert sources.recover(lambda ids: len(ids)) == 0
+
+def test_put_clears_the_pending_entry(sources):
+    sources.begin("b.pdf", "hash-b", ["id-3"])
+    sources.put("b.pdf", "hash-b", ["id-3"], "shard-2")
+    assert sources.recover(lambda ids: len(ids)) == 0
+    assert sources.get("b.pdf")["shard"] == "shard-2"